@@ -0,0 +1,92 @@
+"""
+Column definitions for the accounting CSV / XLSX exports (see common.export).
+
+Accounting documents have no list pages, so each export covers the whole
+table newest first, optionally narrowed with ?status=.
+"""
+from common.export import user_display
+
+from .models import CheckVoucher, DebitMemo, Disbursement, Liquidation
+
+
+def _display(model, field):
+    choices = dict(model._meta.get_field(field).choices)
+    return lambda value: choices.get(value, value)
+
+
+LIQUIDATION_COLUMNS = (
+    ('Liquidation Number', 'liquidation_number'),
+    ('Liquidation Date', 'liquidation_date'),
+    ('Employee', user_display('employee')),
+    ('Project', 'project_name'),
+    ('Cash Advance Date', 'cash_advance_date'),
+    ('Cash Advance', 'cash_advance_amount'),
+    ('Total Expenses', 'total_expenses'),
+    ('Status', 'status', _display(Liquidation, 'status')),
+    ('Approved By', user_display('approved_by')),
+    ('Approved Date', 'approved_date'),
+    ('Remarks', 'remarks'),
+)
+
+DEBIT_MEMO_COLUMNS = (
+    ('Memo Number', 'memo_number'),
+    ('Memo Date', 'memo_date'),
+    ('Vendor', 'vendor_name'),
+    ('Reference Invoice', 'reference_invoice'),
+    ('Reason', 'reason'),
+    ('Amount', 'amount'),
+    ('Status', 'status', _display(DebitMemo, 'status')),
+    ('Prepared By', user_display('prepared_by')),
+    ('Approved By', user_display('approved_by')),
+    ('Remarks', 'remarks'),
+)
+
+CHECK_VOUCHER_COLUMNS = (
+    ('Voucher Number', 'voucher_number'),
+    ('Voucher Date', 'voucher_date'),
+    ('Payee', 'payee_name'),
+    ('Check Number', 'check_number'),
+    ('Check Date', 'check_date'),
+    ('Bank', 'bank_name'),
+    ('Amount', 'amount'),
+    ('Particulars', 'particulars'),
+    ('Invoice Number', 'invoice_number'),
+    ('Project', 'project_name'),
+    ('Status', 'status', _display(CheckVoucher, 'status')),
+    ('Prepared By', user_display('prepared_by')),
+    ('Approved By', user_display('approved_by')),
+    ('Remarks', 'remarks'),
+)
+
+DISBURSEMENT_COLUMNS = (
+    ('Disbursement Number', 'disbursement_number'),
+    ('Disbursement Date', 'disbursement_date'),
+    ('Recipient', 'recipient_name'),
+    ('Recipient Type', 'recipient_type'),
+    ('Amount', 'amount'),
+    ('Payment Method', 'payment_method', _display(Disbursement, 'payment_method')),
+    ('Reference Number', 'reference_number'),
+    ('Category', 'category'),
+    ('Project', 'project_name'),
+    ('Purpose', 'purpose'),
+    ('Check Voucher', 'check_voucher__voucher_number'),
+    ('Status', 'status', _display(Disbursement, 'status')),
+    ('Processed By', user_display('processed_by')),
+    ('Remarks', 'remarks'),
+)
+
+# URL name -> (model, columns, ordering, file name)
+EXPORTS = {
+    'liquidations': (Liquidation, LIQUIDATION_COLUMNS, ('-created_at', '-id'), 'liquidations'),
+    'debit-memos': (DebitMemo, DEBIT_MEMO_COLUMNS, ('-created_at', '-id'), 'debit-memos'),
+    'check-vouchers': (CheckVoucher, CHECK_VOUCHER_COLUMNS, ('-created_at', '-id'), 'check-vouchers'),
+    'disbursements': (Disbursement, DISBURSEMENT_COLUMNS, ('-disbursement_date', '-id'), 'disbursements'),
+}
+
+# (URL name, label) for the overview page's export menu
+EXPORT_CHOICES = [
+    ('liquidations', 'Liquidations'),
+    ('debit-memos', 'Debit Memos'),
+    ('check-vouchers', 'Check Vouchers'),
+    ('disbursements', 'Disbursements'),
+]
@@ -0,0 +1,93 @@
+import random
+import time
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.db.models import Sum
+
+from accounting import summary
+from accounting.models import Disbursement
+
+
+class Command(BaseCommand):
+    help = 'Prints query plans and timings for the accounting overview queries'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=0,
+                            help='Insert this many synthetic disbursements before measuring')
+        parser.add_argument('--repeat', type=int, default=20, help='Timed runs per query')
+        parser.add_argument('--keep', action='store_true',
+                            help='Keep the synthetic rows instead of rolling them back (and rebuild the summary rollups)')
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            if options['rows']:
+                self.insert_disbursements(options['rows'])
+            self.stdout.write(f"Backend: {connection.vendor}, disbursements: {Disbursement.objects.count()}\n")
+            for label, run, queryset in self.queries():
+                self.report(label, run, queryset, options['repeat'])
+            if not options['keep']:
+                transaction.set_rollback(True)
+            elif options['rows']:
+                # bulk_create skips the signals that keep the overview rollups current
+                summary.rebuild()
+
+    def insert_disbursements(self, rows):
+        user = User.objects.order_by('id').first() or User.objects.create(username='benchmark')
+        rng = random.Random(0)
+        start = date.today() - timedelta(days=3 * 365)
+        statuses = ['completed'] * 8 + ['pending', 'cancelled']
+        batch = []
+        began = time.perf_counter()
+        for i in range(rows):
+            batch.append(Disbursement(
+                disbursement_number=f"BENCH-{i:08d}",
+                disbursement_date=start + timedelta(days=rng.randrange(3 * 365)),
+                recipient_name='Benchmark Supplier',
+                recipient_type='Supplier',
+                amount=Decimal(rng.randrange(100, 10_000_000)) / 100,
+                payment_method='bank_transfer',
+                purpose='Benchmark',
+                category='Project Cost',
+                status=rng.choice(statuses),
+                processed_by=user,
+            ))
+            if len(batch) == 5000:
+                Disbursement.objects.bulk_create(batch)
+                batch = []
+        Disbursement.objects.bulk_create(batch)
+        self.stdout.write(f"Inserted {rows} disbursements in {time.perf_counter() - began:.1f}s")
+
+    def queries(self):
+        today = date.today()
+        month_start = today.replace(day=1)
+        next_month = (month_start + timedelta(days=32)).replace(day=1)
+        completed = Disbursement.objects.filter(status='completed')
+
+        recent = completed.order_by('-disbursement_date')[:5]
+        by_lookup = completed.filter(disbursement_date__month=today.month, disbursement_date__year=today.year)
+        by_range = completed.filter(disbursement_date__gte=month_start, disbursement_date__lt=next_month)
+        return [
+            ('recent completed disbursements', lambda: list(recent.all()), recent),
+            ('month total via __month/__year', lambda: by_lookup.aggregate(total=Sum('amount')), by_lookup),
+            ('month total via half-open range', lambda: by_range.aggregate(total=Sum('amount')), by_range),
+            ('completed count', lambda: completed.all().count(), completed),
+        ]
+
+    def report(self, label, run, queryset, repeat):
+        timings = []
+        for _ in range(repeat):
+            began = time.perf_counter()
+            run()
+            timings.append((time.perf_counter() - began) * 1000)
+        timings.sort()
+        p50 = timings[len(timings) // 2]
+        p95 = timings[min(len(timings) - 1, int(len(timings) * 0.95))]
+        self.stdout.write(self.style.MIGRATE_HEADING(label))
+        self.stdout.write(f"  p50 {p50:.2f} ms, p95 {p95:.2f} ms over {repeat} runs")
+        for line in queryset.explain().splitlines():
+            self.stdout.write(f"  {line}")
+        self.stdout.write('')
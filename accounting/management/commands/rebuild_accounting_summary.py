@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from accounting import summary
+from accounting.models import MonthlyDisbursementTotal
+
+
+class Command(BaseCommand):
+    help = 'Rebuilds the accounting overview rollups from the document tables'
+
+    def handle(self, *args, **options):
+        status_rows = summary.rebuild()
+        month_rows = MonthlyDisbursementTotal.objects.count()
+        self.stdout.write(self.style.SUCCESS(
+            f'Accounting summary rebuilt: {status_rows} status counts, {month_rows} monthly disbursement totals'
+        ))
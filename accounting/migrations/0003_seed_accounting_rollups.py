@@ -0,0 +1,55 @@
+# Generated by Django 5.2.7 on 2026-10-18 05:20
+
+from django.db import migrations
+from django.db.models import Count, Sum
+from django.db.models.functions import TruncMonth
+
+
+DOCUMENT_TYPES = [
+    ('Liquidation', 'liquidation'),
+    ('CheckVoucher', 'check_voucher'),
+    ('Disbursement', 'disbursement'),
+    ('DebitMemo', 'debit_memo'),
+]
+
+
+def seed_rollups(apps, schema_editor):
+    """Populate the rollup tables from existing documents (same as rebuild_accounting_summary)"""
+    DocumentStatusCount = apps.get_model('accounting', 'DocumentStatusCount')
+    MonthlyDisbursementTotal = apps.get_model('accounting', 'MonthlyDisbursementTotal')
+    Disbursement = apps.get_model('accounting', 'Disbursement')
+
+    status_counts = []
+    for model_name, document_type in DOCUMENT_TYPES:
+        model = apps.get_model('accounting', model_name)
+        for row in model.objects.order_by().values('status').annotate(total=Count('id')):
+            status_counts.append(DocumentStatusCount(document_type=document_type, status=row['status'], count=row['total']))
+    DocumentStatusCount.objects.bulk_create(status_counts)
+
+    monthly = (
+        Disbursement.objects.filter(status='completed')
+        .annotate(month=TruncMonth('disbursement_date'))
+        .order_by()
+        .values('month')
+        .annotate(total=Sum('amount'), disbursements=Count('id'))
+    )
+    MonthlyDisbursementTotal.objects.bulk_create(
+        MonthlyDisbursementTotal(month=row['month'], total_amount=row['total'], disbursement_count=row['disbursements'])
+        for row in monthly
+    )
+
+
+def clear_rollups(apps, schema_editor):
+    apps.get_model('accounting', 'DocumentStatusCount').objects.all().delete()
+    apps.get_model('accounting', 'MonthlyDisbursementTotal').objects.all().delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounting', '0002_accounting_rollups'),
+    ]
+
+    operations = [
+        migrations.RunPython(seed_rollups, clear_rollups),
+    ]
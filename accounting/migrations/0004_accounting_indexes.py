@@ -0,0 +1,55 @@
+# Generated by Django 5.2.7 on 2026-10-18 05:00
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounting', '0003_seed_accounting_rollups'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='checkvoucher',
+            index=models.Index(fields=['status', 'created_at'], name='cv_status_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='checkvoucher',
+            index=models.Index(fields=['-created_at'], name='cv_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='debitmemo',
+            index=models.Index(fields=['status', 'created_at'], name='dm_status_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='debitmemo',
+            index=models.Index(fields=['-created_at'], name='dm_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='disbursement',
+            index=models.Index(fields=['status', 'disbursement_date'], name='disb_status_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='disbursement',
+            index=models.Index(fields=['-disbursement_date'], name='disb_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='disbursement',
+            index=models.Index(fields=['status', 'created_at'], name='disb_status_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='liquidation',
+            index=models.Index(fields=['status', 'created_at'], name='liq_status_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='liquidation',
+            index=models.Index(fields=['-created_at'], name='liq_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='liquidationitem',
+            index=models.Index(fields=['liquidation', 'date'], name='liq_item_liq_date_idx'),
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.7 on 2026-10-18 05:15
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounting', '0005_project_links'),
+        ('core', '0004_alter_project_name_key'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='checkvoucher',
+            index=models.Index(fields=['project', 'status'], name='cv_project_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='disbursement',
+            index=models.Index(fields=['project', 'status'], name='disb_project_status_idx'),
+        ),
+    ]
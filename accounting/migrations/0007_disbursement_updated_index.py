@@ -0,0 +1,20 @@
+# Generated by Django 5.2.7 on 2026-10-18 05:35
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounting', '0006_project_status_indexes'),
+        ('core', '0004_alter_project_name_key'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='disbursement',
+            index=models.Index(fields=['updated_at'], name='disb_updated_idx'),
+        ),
+    ]
@@ -2,6 +2,9 @@ from django.db import models
 from django.contrib.auth.models import User
 from django.utils import timezone
 
+from common.numbering import next_number
+from core.models import link_project
+
 
 class Liquidation(models.Model):
     """Liquidation Report for cash advances and expenses"""
@@ -16,6 +19,7 @@ class Liquidation(models.Model):
     liquidation_number = models.CharField(max_length=50, unique=True, blank=True)
     employee = models.ForeignKey(User, on_delete=models.CASCADE, related_name='liquidations')
     project_name = models.CharField(max_length=200)
+    project = models.ForeignKey('core.Project', on_delete=models.SET_NULL, null=True, blank=True, related_name='liquidations')
     
     # Cash Advance Details
     cash_advance_amount = models.DecimalField(max_digits=12, decimal_places=2, default=0)
@@ -36,16 +40,18 @@ class Liquidation(models.Model):
     
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', 'created_at'], name='liq_status_created_idx'),
+            models.Index(fields=['-created_at'], name='liq_created_idx'),
+        ]
     
     def __str__(self):
         return f"{self.liquidation_number} - {self.employee.get_full_name()}"
     
     def save(self, *args, **kwargs):
         if not self.liquidation_number:
-            today = timezone.now().date()
-            date_str = today.strftime('%Y%m%d')
-            count = Liquidation.objects.filter(created_at__date=today).count() + 1
-            self.liquidation_number = f"LIQ-{date_str}-{count:03d}"
+            self.liquidation_number = next_number('LIQ')
+        link_project(self)
         super().save(*args, **kwargs)
     
     @property
@@ -77,6 +83,9 @@ class LiquidationItem(models.Model):
     
     class Meta:
         ordering = ['date']
+        indexes = [
+            models.Index(fields=['liquidation', 'date'], name='liq_item_liq_date_idx'),
+        ]
     
     def __str__(self):
         return f"{self.description} - ₱{self.amount}"
@@ -116,16 +125,17 @@ class DebitMemo(models.Model):
     
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', 'created_at'], name='dm_status_created_idx'),
+            models.Index(fields=['-created_at'], name='dm_created_idx'),
+        ]
     
     def __str__(self):
         return f"{self.memo_number} - {self.vendor_name}"
     
     def save(self, *args, **kwargs):
         if not self.memo_number:
-            today = timezone.now().date()
-            date_str = today.strftime('%Y%m%d')
-            count = DebitMemo.objects.filter(created_at__date=today).count() + 1
-            self.memo_number = f"DM-{date_str}-{count:03d}"
+            self.memo_number = next_number('DM')
         super().save(*args, **kwargs)
 
 
@@ -159,6 +169,7 @@ class CheckVoucher(models.Model):
     # References
     invoice_number = models.CharField(max_length=100, blank=True)
     project_name = models.CharField(max_length=200, blank=True)
+    project = models.ForeignKey('core.Project', on_delete=models.SET_NULL, null=True, blank=True, related_name='check_vouchers')
     
     # Status and Approval
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
@@ -173,16 +184,19 @@ class CheckVoucher(models.Model):
     
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', 'created_at'], name='cv_status_created_idx'),
+            models.Index(fields=['-created_at'], name='cv_created_idx'),
+            models.Index(fields=['project', 'status'], name='cv_project_status_idx'),
+        ]
     
     def __str__(self):
         return f"{self.voucher_number} - {self.payee_name}"
     
     def save(self, *args, **kwargs):
         if not self.voucher_number:
-            today = timezone.now().date()
-            date_str = today.strftime('%Y%m%d')
-            count = CheckVoucher.objects.filter(created_at__date=today).count() + 1
-            self.voucher_number = f"CV-{date_str}-{count:03d}"
+            self.voucher_number = next_number('CV')
+        link_project(self)
         super().save(*args, **kwargs)
 
 
@@ -218,6 +232,7 @@ class Disbursement(models.Model):
     purpose = models.TextField()
     category = models.CharField(max_length=100)  # Operating Expense, Project Cost, Payroll, etc.
     project_name = models.CharField(max_length=200, blank=True)
+    project = models.ForeignKey('core.Project', on_delete=models.SET_NULL, null=True, blank=True, related_name='disbursements')
     
     # References
     check_voucher = models.ForeignKey(CheckVoucher, on_delete=models.SET_NULL, null=True, blank=True, related_name='disbursements')
@@ -233,14 +248,49 @@ class Disbursement(models.Model):
     
     class Meta:
         ordering = ['-disbursement_date']
+        indexes = [
+            models.Index(fields=['status', 'disbursement_date'], name='disb_status_date_idx'),
+            models.Index(fields=['-disbursement_date'], name='disb_date_idx'),
+            models.Index(fields=['status', 'created_at'], name='disb_status_created_idx'),
+            models.Index(fields=['project', 'status'], name='disb_project_status_idx'),
+            models.Index(fields=['updated_at'], name='disb_updated_idx'),
+        ]
     
     def __str__(self):
         return f"{self.disbursement_number} - {self.recipient_name}"
     
     def save(self, *args, **kwargs):
         if not self.disbursement_number:
-            today = timezone.now().date()
-            date_str = today.strftime('%Y%m%d')
-            count = Disbursement.objects.filter(created_at__date=today).count() + 1
-            self.disbursement_number = f"DISB-{date_str}-{count:03d}"
+            self.disbursement_number = next_number('DISB')
+        link_project(self)
         super().save(*args, **kwargs)
+
+
+class DocumentStatusCount(models.Model):
+    """Rollup of accounting documents per type and status, kept current by accounting.signals"""
+    
+    document_type = models.CharField(max_length=30)
+    status = models.CharField(max_length=20)
+    count = models.IntegerField(default=0)
+    
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['document_type', 'status'], name='unique_document_status_count'),
+        ]
+    
+    def __str__(self):
+        return f"{self.document_type} / {self.status}: {self.count}"
+
+
+class MonthlyDisbursementTotal(models.Model):
+    """Rollup of completed disbursements per calendar month, kept current by accounting.signals"""
+    
+    month = models.DateField(unique=True, help_text="First day of the month")
+    total_amount = models.DecimalField(max_digits=16, decimal_places=2, default=0)
+    disbursement_count = models.IntegerField(default=0)
+    
+    class Meta:
+        ordering = ['-month']
+    
+    def __str__(self):
+        return f"{self.month:%Y-%m}: ₱{self.total_amount}"
@@ -0,0 +1,47 @@
+from django.db.models.signals import post_delete, post_init, post_save, pre_save
+
+from . import summary
+from .models import CheckVoucher, DebitMemo, Disbursement, Liquidation
+
+
+TRACKED_MODELS = (Liquidation, CheckVoucher, Disbursement, DebitMemo)
+ROLLUP_FIELDS = {'status', 'disbursement_date', 'amount'}
+
+
+def remember_loaded_state(sender, instance, **kwargs):
+    """Snapshot rows loaded from the database so later saves can compute deltas"""
+    # Don't trigger extra queries for rows loaded with .only()/.defer()
+    if ROLLUP_FIELDS & instance.get_deferred_fields():
+        return
+    instance._rollup_state = summary.snapshot(instance)
+
+
+def load_missing_state(sender, instance, **kwargs):
+    """Fetch the stored row when the instance was loaded without its rollup fields"""
+    if instance._state.adding or hasattr(instance, '_rollup_state'):
+        return
+    previous = sender.objects.filter(pk=instance.pk).first()
+    if previous is not None:
+        instance._rollup_state = summary.snapshot(previous)
+
+
+def update_rollups_on_save(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    old_state = None if created else getattr(instance, '_rollup_state', None)
+    new_state = summary.snapshot(instance)
+    summary.apply_change(instance, old_state, new_state)
+    instance._rollup_state = new_state
+
+
+def update_rollups_on_delete(sender, instance, **kwargs):
+    old_state = getattr(instance, '_rollup_state', None) or summary.snapshot(instance)
+    summary.apply_change(instance, old_state, None)
+
+
+def connect():
+    for model in TRACKED_MODELS:
+        post_init.connect(remember_loaded_state, sender=model)
+        pre_save.connect(load_missing_state, sender=model)
+        post_save.connect(update_rollups_on_save, sender=model)
+        post_delete.connect(update_rollups_on_delete, sender=model)
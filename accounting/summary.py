@@ -0,0 +1,155 @@
+"""
+Incrementally maintained rollups behind the Accounting Overview.
+
+accounting.signals snapshots each document's rollup fields (snapshot()) when
+it is loaded (post_init), or reads them before a save when they were deferred
+(pre_save), and calls apply_change() from post_save/post_delete, so every save
+or delete through the ORM adjusts the counters by delta. The deltas are
+applied when the transaction that saved the document commits, so a rolled-back
+save leaves the rollups alone. QuerySet.update(), bulk_create() and raw SQL
+bypass those signals; run `manage.py rebuild_accounting_summary` after such
+bulk writes.
+"""
+from decimal import Decimal
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Sum
+from django.db.models.functions import TruncMonth
+from django.utils.dateparse import parse_date
+
+from .models import (
+    CheckVoucher, DebitMemo, Disbursement, DocumentStatusCount, Liquidation,
+    MonthlyDisbursementTotal,
+)
+
+
+DOCUMENT_TYPES = {
+    Liquidation: 'liquidation',
+    CheckVoucher: 'check_voucher',
+    Disbursement: 'disbursement',
+    DebitMemo: 'debit_memo',
+}
+
+DISBURSED_STATUS = 'completed'
+
+
+def month_start(value):
+    """First day of the month containing `value` (a date or ISO date string)"""
+    if isinstance(value, str):
+        value = parse_date(value)
+    return value.replace(day=1) if value else None
+
+
+def snapshot(instance):
+    """Capture the fields of `instance` that the rollups depend on"""
+    state = {'status': instance.status}
+    if isinstance(instance, Disbursement):
+        state['month'] = month_start(instance.disbursement_date)
+        state['amount'] = Decimal(str(instance.amount or 0))
+    return state
+
+
+def _bump_status(document_type, status, delta):
+    updated = DocumentStatusCount.objects.filter(
+        document_type=document_type, status=status,
+    ).update(count=F('count') + delta)
+    if updated:
+        return
+    try:
+        with transaction.atomic():
+            DocumentStatusCount.objects.create(document_type=document_type, status=status, count=delta)
+    except IntegrityError:
+        # Another worker created the row first; apply the delta to it instead
+        DocumentStatusCount.objects.filter(
+            document_type=document_type, status=status,
+        ).update(count=F('count') + delta)
+
+
+def _bump_month(month, amount, delta):
+    updated = MonthlyDisbursementTotal.objects.filter(month=month).update(
+        total_amount=F('total_amount') + amount * delta,
+        disbursement_count=F('disbursement_count') + delta,
+    )
+    if updated:
+        return
+    try:
+        with transaction.atomic():
+            MonthlyDisbursementTotal.objects.create(
+                month=month, total_amount=amount * delta, disbursement_count=delta,
+            )
+    except IntegrityError:
+        MonthlyDisbursementTotal.objects.filter(month=month).update(
+            total_amount=F('total_amount') + amount * delta,
+            disbursement_count=F('disbursement_count') + delta,
+        )
+
+
+def _apply(document_type, state, delta):
+    _bump_status(document_type, state['status'], delta)
+    if state.get('month') and state['status'] == DISBURSED_STATUS:
+        _bump_month(state['month'], state['amount'], delta)
+
+
+def apply_change(instance, old_state, new_state):
+    """
+    Move the contribution of `instance` from `old_state` to `new_state` (either
+    may be None) once the current transaction commits; dropped if it rolls back.
+    """
+    if old_state == new_state:
+        return
+    document_type = DOCUMENT_TYPES[type(instance)]
+
+    def apply():
+        with transaction.atomic():
+            if old_state is not None:
+                _apply(document_type, old_state, -1)
+            if new_state is not None:
+                _apply(document_type, new_state, 1)
+
+    transaction.on_commit(apply)
+
+
+def rebuild():
+    """Recompute every rollup row from the document tables"""
+    with transaction.atomic():
+        DocumentStatusCount.objects.all().delete()
+        MonthlyDisbursementTotal.objects.all().delete()
+
+        status_counts = []
+        for model, document_type in DOCUMENT_TYPES.items():
+            rows = model.objects.order_by().values('status').annotate(total=Count('id'))
+            status_counts.extend(
+                DocumentStatusCount(document_type=document_type, status=row['status'], count=row['total'])
+                for row in rows
+            )
+        DocumentStatusCount.objects.bulk_create(status_counts)
+
+        monthly = (
+            Disbursement.objects.filter(status=DISBURSED_STATUS)
+            .annotate(month=TruncMonth('disbursement_date'))
+            .order_by()
+            .values('month')
+            .annotate(total=Sum('amount'), disbursements=Count('id'))
+        )
+        MonthlyDisbursementTotal.objects.bulk_create(
+            MonthlyDisbursementTotal(month=row['month'], total_amount=row['total'], disbursement_count=row['disbursements'])
+            for row in monthly
+        )
+    return len(status_counts)
+
+
+def status_counts():
+    """Mapping of (document_type, status) -> count"""
+    return {
+        (row.document_type, row.status): row.count
+        for row in DocumentStatusCount.objects.all()
+    }
+
+
+def disbursed_totals(*months):
+    """Mapping of month start -> completed disbursement total for the given months"""
+    totals = dict.fromkeys(months, Decimal('0'))
+    totals.update(
+        MonthlyDisbursementTotal.objects.filter(month__in=months).values_list('month', 'total_amount')
+    )
+    return totals
@@ -1,3 +1,64 @@
+import datetime
+import io
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db import transaction
 from django.test import TestCase
 
-# Create your tests here.
+from . import summary
+from .models import Disbursement
+
+
+class BenchmarkCommandTests(TestCase):
+    """benchmark_accounting_queries leaves the rollups matching the rows it keeps"""
+
+    def run_benchmark(self, *args):
+        call_command('benchmark_accounting_queries', '--rows', '30', '--repeat', '1', *args, stdout=io.StringIO())
+
+    def test_rows_are_rolled_back_by_default(self):
+        self.run_benchmark()
+        self.assertFalse(Disbursement.objects.exists())
+        self.assertEqual(summary.status_counts(), {})
+
+    def test_kept_rows_are_counted_in_the_summary(self):
+        self.run_benchmark('--keep')
+        counts = summary.status_counts()
+        self.assertEqual(sum(counts.values()), 30)
+        self.assertEqual(
+            counts.get(('disbursement', 'completed'), 0),
+            Disbursement.objects.filter(status='completed').count(),
+        )
+
+
+class SummaryTests(TestCase):
+    """Rollups follow document saves once they commit"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='cashier')
+
+    def disbursement(self, number):
+        return Disbursement.objects.create(
+            disbursement_number=number, disbursement_date=datetime.date(2026, 3, 15), recipient_name='Supplier',
+            recipient_type='Supplier', amount=Decimal('150.00'), payment_method='bank_transfer', purpose='Testing',
+            category='Project Cost', status='completed', processed_by=self.user,
+        )
+
+    def test_committed_save_is_counted(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.disbursement('DISB-1')
+        self.assertEqual(summary.status_counts(), {('disbursement', 'completed'): 1})
+        march = datetime.date(2026, 3, 1)
+        self.assertEqual(summary.disbursed_totals(march), {march: Decimal('150.00')})
+
+    def test_rolled_back_save_is_not_counted(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            try:
+                with transaction.atomic():
+                    self.disbursement('DISB-1')
+                    raise RuntimeError('rolled back')
+            except RuntimeError:
+                pass
+        self.assertEqual(summary.status_counts(), {})
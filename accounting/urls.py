@@ -9,4 +9,5 @@ urlpatterns = [
     path('debit-memo/', views.debit_memo_view, name='debit_memo'),
     path('check-voucher/', views.check_voucher_view, name='check_voucher'),
     path('disbursement/', views.disbursement_view, name='disbursement'),
+    path('export/<slug:document_type>/', views.export_view, name='export'),
 ]
\ No newline at end of file
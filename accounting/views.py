@@ -1,43 +1,48 @@
+from datetime import timedelta
+from decimal import Decimal, InvalidOperation
+
+from django.http import Http404
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.views.decorators.cache import never_cache
 from django.contrib import messages
 from django.utils import timezone
-from django.db import models
+from django.utils.dateparse import parse_date
+from django.db import transaction
+from django.db.models import Max
+from common.caching import private_page
 from .models import Liquidation, LiquidationItem, DebitMemo, CheckVoucher, Disbursement
 
 
-@never_cache
+def _overview_changed(request):
+    """Newest disbursement change (recent list, monthly totals) and the status counts the cards show"""
+    from . import summary
+    
+    latest = Disbursement.objects.aggregate(latest=Max('updated_at'))['latest']
+    return latest, sorted(summary.status_counts().items())
+
+
+@private_page(_overview_changed)
 @login_required
 def overview_view(request):
     """Accounting Overview view"""
+    from . import summary
+    from .exports import EXPORT_CHOICES
     
-    # Get summary statistics
-    pending_liquidations = Liquidation.objects.filter(status='submitted').count()
-    pending_check_vouchers = CheckVoucher.objects.filter(status='pending').count()
-    total_disbursements = Disbursement.objects.filter(status='completed').count()
-    total_debit_memos = DebitMemo.objects.filter(status='posted').count()
+    # Status counts and monthly totals come from the rollup tables kept by accounting.signals
+    counts = summary.status_counts()
+    pending_liquidations = counts.get(('liquidation', 'submitted'), 0)
+    pending_check_vouchers = counts.get(('check_voucher', 'pending'), 0)
+    total_disbursements = counts.get(('disbursement', 'completed'), 0)
+    total_debit_memos = counts.get(('debit_memo', 'posted'), 0)
     recent_disbursements = Disbursement.objects.filter(status='completed').order_by('-disbursement_date')[:5]
     
-    # Current month
-    current_month = timezone.now().month
-    current_year = timezone.now().year
-    
-    total_disbursed_this_month = Disbursement.objects.filter(
-        disbursement_date__month=current_month,
-        disbursement_date__year=current_year,
-        status='completed'
-    ).aggregate(total=models.Sum('amount'))['total'] or 0
-    
-    # Last month
-    last_month = current_month - 1 if current_month > 1 else 12
-    last_month_year = current_year if current_month > 1 else current_year - 1
-    
-    total_disbursed_last_month = Disbursement.objects.filter(
-        disbursement_date__month=last_month,
-        disbursement_date__year=last_month_year,
-        status='completed'
-    ).aggregate(total=models.Sum('amount'))['total'] or 0
+    # Current and last month
+    this_month = timezone.now().date().replace(day=1)
+    last_month = (this_month - timedelta(days=1)).replace(day=1)
+    totals = summary.disbursed_totals(this_month, last_month)
+    total_disbursed_this_month = totals[this_month]
+    total_disbursed_last_month = totals[last_month]
     
     context = {
         'page_title': 'Accounting Overview',
@@ -49,51 +54,123 @@ def overview_view(request):
         'recent_disbursements': recent_disbursements,
         'total_disbursed_this_month': total_disbursed_this_month,
         'total_disbursed_last_month': total_disbursed_last_month,
+        'export_types': EXPORT_CHOICES,
     }
     return render(request, 'accounting/overview.html', context)
 
 
-@never_cache
+def _parse_amount(value, max_digits=12):
+    """Parse a peso amount into a 2-place Decimal, or None if it isn't a valid non-negative number"""
+    try:
+        amount = Decimal(value).quantize(Decimal('0.01'))
+    except (InvalidOperation, TypeError, ValueError):
+        return None
+    if not amount.is_finite() or amount < 0 or len(amount.as_tuple().digits) > max_digits:
+        return None
+    return amount
+
+
+def _parse_date(value):
+    """Parse a YYYY-MM-DD string, or None if it is missing or not a real date"""
+    try:
+        return parse_date(value or '')
+    except ValueError:
+        return None
+
+
+def _collect_liquidation_items(post):
+    """
+    Validate every submitted expense row at once.
+
+    Returns (items, total_expenses, errors); items are unsaved LiquidationItem
+    instances without a parent, and nothing should be saved if errors is non-empty.
+    """
+    item_dates = post.getlist('item_date[]')
+    item_descriptions = post.getlist('item_description[]')
+    item_categories = post.getlist('item_category[]')
+    item_amounts = post.getlist('item_amount[]')
+    item_receipts = post.getlist('item_receipt[]')
+    
+    items = []
+    errors = []
+    total_expenses = Decimal('0.00')
+    for i, description in enumerate(item_descriptions):
+        if not description:
+            continue
+        row = i + 1
+        item_date = _parse_date(item_dates[i]) if i < len(item_dates) else None
+        amount = _parse_amount(item_amounts[i], max_digits=10) if i < len(item_amounts) else None
+        category = item_categories[i] if i < len(item_categories) else ''
+        row_errors = []
+        if item_date is None:
+            row_errors.append(f'Item {row} - date: Enter a valid date.')
+        if not category:
+            row_errors.append(f'Item {row} - category: This field is required.')
+        if amount is None:
+            row_errors.append(f'Item {row} - amount: Enter a valid amount.')
+        if row_errors:
+            errors.extend(row_errors)
+            continue
+        total_expenses += amount
+        items.append(LiquidationItem(
+            date=item_date,
+            description=description,
+            category=category,
+            amount=amount,
+            receipt_number=item_receipts[i] if i < len(item_receipts) else '',
+        ))
+    
+    if not items and not errors:
+        errors.append('At least one expense item is required.')
+    return items, total_expenses, errors
+
+
+@private_page()
 @login_required
 def liquidation_form_view(request):
     """Liquidation Form view"""
     if request.method == 'POST':
-        # Create liquidation
-        liquidation = Liquidation.objects.create(
-            employee=request.user,
-            project_name=request.POST.get('project_name'),
-            cash_advance_amount=request.POST.get('cash_advance_amount'),
-            cash_advance_date=request.POST.get('cash_advance_date'),
-            liquidation_date=request.POST.get('liquidation_date'),
-            status='submitted'
-        )
+        project_name = request.POST.get('project_name', '').strip()
+        cash_advance_amount = _parse_amount(request.POST.get('cash_advance_amount'))
+        cash_advance_date = _parse_date(request.POST.get('cash_advance_date'))
+        liquidation_date = _parse_date(request.POST.get('liquidation_date'))
         
-        # Create liquidation items from form data
-        item_dates = request.POST.getlist('item_date[]')
-        item_descriptions = request.POST.getlist('item_description[]')
-        item_categories = request.POST.getlist('item_category[]')
-        item_amounts = request.POST.getlist('item_amount[]')
-        item_receipts = request.POST.getlist('item_receipt[]')
+        errors = []
+        if not project_name:
+            errors.append('project_name: This field is required.')
+        if cash_advance_amount is None:
+            errors.append('cash_advance_amount: Enter a valid amount.')
+        if cash_advance_date is None:
+            errors.append('cash_advance_date: Enter a valid date.')
+        if liquidation_date is None:
+            errors.append('liquidation_date: Enter a valid date.')
         
-        total_expenses = 0
-        for i in range(len(item_dates)):
-            if item_descriptions[i]:
-                amount = float(item_amounts[i])
-                total_expenses += amount
-                LiquidationItem.objects.create(
-                    liquidation=liquidation,
-                    date=item_dates[i],
-                    description=item_descriptions[i],
-                    category=item_categories[i],
-                    amount=amount,
-                    receipt_number=item_receipts[i]
-                )
+        # Validate all rows before writing anything
+        items, total_expenses, item_errors = _collect_liquidation_items(request.POST)
+        errors.extend(item_errors)
         
-        liquidation.total_expenses = total_expenses
-        liquidation.save()
+        if not errors:
+            # One insert for the header (total already known) and one bulk insert for the lines
+            with transaction.atomic():
+                liquidation = Liquidation.objects.create(
+                    employee=request.user,
+                    project_name=project_name,
+                    cash_advance_amount=cash_advance_amount,
+                    cash_advance_date=cash_advance_date,
+                    liquidation_date=liquidation_date,
+                    total_expenses=total_expenses,
+                    status='submitted'
+                )
+                for item in items:
+                    item.liquidation = liquidation
+                LiquidationItem.objects.bulk_create(items, batch_size=500)
+            
+            messages.success(request, f'Liquidation {liquidation.liquidation_number} created successfully!')
+            return redirect('accounting:overview')
         
-        messages.success(request, f'Liquidation {liquidation.liquidation_number} created successfully!')
-        return redirect('accounting:overview')
+        for error in errors:
+            messages.error(request, error)
+        messages.error(request, 'Please correct the errors above.')
     
     context = {
         'page_title': 'Liquidation Form',
@@ -102,7 +179,7 @@ def liquidation_form_view(request):
     return render(request, 'accounting/liquidation_form.html', context)
 
 
-@never_cache
+@private_page()
 @login_required
 def debit_memo_view(request):
     """Debit Memo view"""
@@ -128,7 +205,7 @@ def debit_memo_view(request):
     return render(request, 'accounting/debit_memo.html', context)
 
 
-@never_cache
+@private_page()
 @login_required
 def check_voucher_view(request):
     """Check Voucher view"""
@@ -159,7 +236,7 @@ def check_voucher_view(request):
     return render(request, 'accounting/check_voucher.html', context)
 
 
-@never_cache
+@private_page()
 @login_required
 def disbursement_view(request):
     """Disbursement view"""
@@ -186,3 +263,22 @@ def disbursement_view(request):
         'module': 'accounting'
     }
     return render(request, 'accounting/disbursement.html', context)
+
+
+@never_cache
+@login_required
+def export_view(request, document_type):
+    """Stream liquidations, debit memos, check vouchers or disbursements as CSV or XLSX"""
+    from common.export import export_response
+    from .exports import EXPORTS
+    
+    if document_type not in EXPORTS:
+        raise Http404('Unknown export')
+    model, columns, ordering, filename = EXPORTS[document_type]
+    
+    documents = model.objects.order_by(*ordering)
+    status = request.GET.get('status')
+    if status in dict(model.STATUS_CHOICES):
+        documents = documents.filter(status=status)
+        filename = f'{filename}-{status}'
+    return export_response(request, documents, columns, filename)
@@ -0,0 +1,97 @@
+"""
+Private, revalidated browser caching for signed-in pages.
+
+private_page() replaces never_cache on HTML views: the browser may keep a copy
+but must revalidate it on every visit (Cache-Control: private, no-cache), so
+each visit still runs login_required and a signed-out browser is sent to the
+login page instead of being shown the stored copy. Revalidation is cheap
+because the view's `validators` function reports when its data last changed
+(usually an indexed MAX(updated_at)), and an unchanged page is answered with
+304 before any of its queries or template rendering run.
+
+The ETag also covers the user, the session, the CSRF cookie and the deployed
+code, so a copy stored for another login, with a stale CSRF token or from an
+older release never matches. Pages with pending flash messages are always
+rendered in full so the messages are shown and consumed. Last-Modified is sent
+too, but only the ETag can produce a 304 since only it identifies the login.
+"""
+import functools
+import hashlib
+import os
+
+from django.apps import apps
+from django.conf import settings
+from django.contrib.messages import get_messages
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date
+
+
+@functools.cache
+def release():
+    """Newest modification time of the project's templates and code, read once per process"""
+    roots = [str(directory) for engine in settings.TEMPLATES for directory in engine.get('DIRS', [])]
+    roots += [
+        app.path for app in apps.get_app_configs()
+        if app.path.startswith(str(settings.BASE_DIR)) and 'site-packages' not in app.path
+    ]
+    newest = 0
+    for root in roots:
+        for directory, _, filenames in os.walk(root):
+            for filename in filenames:
+                if filename.endswith(('.py', '.html')):
+                    newest = max(newest, os.stat(os.path.join(directory, filename)).st_mtime_ns)
+    return str(newest)
+
+
+def _revalidatable(request):
+    if request.method not in ('GET', 'HEAD') or not request.user.is_authenticated:
+        return False
+    return not len(get_messages(request))
+
+
+def page_etag(request, last_modified=None, version=None):
+    """Weak ETag for the page at request's URL as rendered for this login"""
+    parts = [
+        release(),
+        request.get_full_path(),
+        str(request.user.pk),
+        request.session.session_key or '',
+        request.META['CSRF_COOKIE'],
+        last_modified.isoformat() if last_modified else '',
+        str(version or ''),
+    ]
+    return f'W/"{hashlib.md5(chr(31).join(parts).encode()).hexdigest()}"'
+
+
+def private_page(validators=None):
+    """
+    Decorator for signed-in HTML views; see the module docstring.
+
+    `validators(request, *args, **kwargs)` returns (last_modified, version):
+    the datetime the page's data last changed and/or any other value that
+    changes with it. Leave it out for pages whose content only depends on
+    the template and the user.
+    """
+
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(request, *args, **kwargs):
+            revalidatable = _revalidatable(request)
+            response = None
+            if revalidatable:
+                last_modified, version = validators(request, *args, **kwargs) if validators else (None, None)
+                # Without a CSRF cookie yet, the stored copy (if any) has a token the render is about to replace
+                if 'CSRF_COOKIE' in request.META:
+                    response = get_conditional_response(request, etag=page_etag(request, last_modified, version))
+            if response is None:
+                response = view(request, *args, **kwargs)
+            if revalidatable and response.status_code in (200, 304) and 'CSRF_COOKIE' in request.META:
+                response.headers.setdefault('ETag', page_etag(request, last_modified, version))
+                if last_modified:
+                    response.headers.setdefault('Last-Modified', http_date(last_modified.timestamp()))
+            patch_cache_control(response, private=True, no_cache=True, must_revalidate=True)
+            return response
+
+        return wrapper
+
+    return decorator
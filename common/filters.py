@@ -0,0 +1,212 @@
+"""
+Server-side filters, sort keys and facet counts for list pages.
+
+A ListFilter declares what a list can be narrowed and ordered by:
+
+- Facets: exact matches on one column (a status, a category, a user), read from
+  repeatable GET parameters, e.g. ?status=pending&status=approved.
+- A date range on one column: ?from=YYYY-MM-DD&to=YYYY-MM-DD, both inclusive.
+- Sort keys: ?sort=<key>, each a unique ordering for KeysetPaginator.
+
+Each facet and sort key should have a composite index ending in the list's
+ordering (see the models' Meta.indexes), so a filtered page stays an index
+range scan.
+
+Facet counts come from one grouped query over all of the list's facet columns,
+shared through the cache for COUNT_CACHE_TIMEOUT seconds like the page totals.
+A facet's counts apply the other facets' selections but not its own, so each
+number says how many rows choosing that value would show. The same rows give
+the filtered total, so the paginator doesn't need its own COUNT.
+"""
+import datetime
+
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.db.models import Count
+from django.utils import timezone
+from django.utils.functional import cached_property
+
+from .pagination import COUNT_CACHE_TIMEOUT, query_cache_key
+
+
+class Facet:
+    """
+    Exact-match filter on `field`.
+
+    Options are labelled from `choices` when given (and listed in that order,
+    zero counts included); otherwise `label(value, *label_values)` labels each
+    value found, where `label_fields` are grouped alongside `field`, e.g. the
+    name columns of a user foreign key.
+    """
+
+    def __init__(self, name, field, title, choices=None, label_fields=(), label=None):
+        self.name = name
+        self.field = field
+        self.title = title
+        self.choices = choices
+        self.label_fields = tuple(label_fields)
+        self.label = label or (lambda value, *label_values: str(value))
+
+    def parse(self, model, values):
+        """Selected values from the request that are valid for the column"""
+        values = [value for value in values if value]
+        if self.choices is not None:
+            allowed = {str(value) for value, _ in self.choices}
+            return [value for value in dict.fromkeys(values) if value in allowed]
+        model_field = model._meta.get_field(self.field)
+        selected = []
+        for value in dict.fromkeys(values):
+            try:
+                selected.append(model_field.to_python(value))
+            except ValidationError:
+                continue
+        return selected
+
+
+class ListFilter:
+
+    def __init__(self, facets=(), sorts=(), date_field=None):
+        """`sorts` is a sequence of (key, label, ordering); the first is the default"""
+        self.facets = tuple(facets)
+        self.sorts = tuple(sorts)
+        self.date_field = date_field
+
+    def bind(self, request, queryset):
+        return FilteredList(self, request.GET, queryset)
+
+
+def _parse_date(value):
+    try:
+        return datetime.date.fromisoformat(value) if value else None
+    except ValueError:
+        return None
+
+
+class FilteredList:
+    """A ListFilter applied to one request's GET parameters"""
+
+    def __init__(self, list_filter, params, queryset):
+        self.list_filter = list_filter
+        model = queryset.model
+        self.selected = {
+            facet.name: facet.parse(model, params.getlist(facet.name)) for facet in list_filter.facets
+        }
+        self.date_from = _parse_date(params.get('from')) if list_filter.date_field else None
+        self.date_to = _parse_date(params.get('to')) if list_filter.date_field else None
+        sorts = {key: ordering for key, _, ordering in list_filter.sorts}
+        self.sort = params.get('sort') if params.get('sort') in sorts else next(iter(sorts), None)
+        self.ordering = sorts.get(self.sort)
+
+        # Facet counts are grouped over the date range only; selections are applied in Python
+        self.base = queryset.filter(**self._date_range(model))
+        self.queryset = self.base.filter(**{
+            f'{facet.field}__in': self.selected[facet.name]
+            for facet in list_filter.facets if self.selected[facet.name]
+        })
+
+    def _date_range(self, model):
+        field = self.list_filter.date_field
+        if field is None:
+            return {}
+        start = self.date_from
+        end = self.date_to + datetime.timedelta(days=1) if self.date_to else None
+        # Whole local days as a half-open range on the column itself, so its index can be used
+        if model._meta.get_field(field).get_internal_type() == 'DateTimeField':
+            start, end = [
+                timezone.make_aware(datetime.datetime.combine(day, datetime.time.min)) if day else None
+                for day in (start, end)
+            ]
+        lookups = {}
+        if start:
+            lookups[f'{field}__gte'] = start
+        if end:
+            lookups[f'{field}__lt'] = end
+        return lookups
+
+    @property
+    def active(self):
+        return any(self.selected.values()) or bool(self.date_from or self.date_to)
+
+    @cached_property
+    def _groups(self):
+        """(facet values, label values, rows) per combination of facet values, cached briefly"""
+        facets = self.list_filter.facets
+        columns = [facet.field for facet in facets]
+        label_columns = [field for facet in facets for field in facet.label_fields]
+        key = query_cache_key('filters:facets', self.base, columns, label_columns)
+        if key is None:
+            return []
+        groups = cache.get(key)
+        if groups is None and not columns:
+            groups = [((), (), self.base.count())]
+            cache.set(key, groups, COUNT_CACHE_TIMEOUT)
+        elif groups is None:
+            rows = self.base.order_by().values_list(*columns, *label_columns).annotate(rows=Count('pk'))
+            groups = [(row[:len(columns)], row[len(columns):-1], row[-1]) for row in rows]
+            cache.set(key, groups, COUNT_CACHE_TIMEOUT)
+        return groups
+
+    def _matches(self, values, skip=None):
+        for i, facet in enumerate(self.list_filter.facets):
+            selected = self.selected[facet.name]
+            if i != skip and selected and values[i] not in selected:
+                return False
+        return True
+
+    @cached_property
+    def count(self):
+        """Rows matching every selection, from the facet counts"""
+        return sum(rows for values, _, rows in self._groups if self._matches(values))
+
+    @cached_property
+    def facets(self):
+        """Per facet: {'facet', 'options': [{'value', 'label', 'count', 'selected'}]} for the filter bar"""
+        result = []
+        label_start = 0
+        for i, facet in enumerate(self.list_filter.facets):
+            label_end = label_start + len(facet.label_fields)
+            counts, labels = {}, {}
+            for values, label_values, rows in self._groups:
+                if self._matches(values, skip=i):
+                    counts[values[i]] = counts.get(values[i], 0) + rows
+                    labels[values[i]] = facet.label(values[i], *label_values[label_start:label_end])
+            label_start = label_end
+            if facet.choices is not None:
+                options = [(value, str(label)) for value, label in facet.choices]
+            else:
+                # A selected value no other selection leaves any rows for still needs its option
+                labels.update({value: facet.label(value) for value in self.selected[facet.name] if value not in labels})
+                options = sorted(labels.items(), key=lambda option: option[1].lower())
+            result.append({
+                'facet': facet,
+                'options': [
+                    {
+                        'value': value,
+                        'label': label,
+                        'count': counts.get(value, 0),
+                        'selected': value in self.selected[facet.name],
+                    }
+                    for value, label in options
+                ],
+            })
+        return result
+
+    @property
+    def sort_options(self):
+        return [{'key': key, 'label': label, 'selected': key == self.sort} for key, label, _ in self.list_filter.sorts]
+
+    @property
+    def params(self):
+        """(name, value) pairs of the current selections and sort, e.g. to keep them in a search form"""
+        pairs = [(facet.name, value) for facet in self.list_filter.facets for value in self.selected[facet.name]]
+        pairs += [(name, day.isoformat()) for name, day in (('from', self.date_from), ('to', self.date_to)) if day]
+        if self.list_filter.sorts and self.sort != self.list_filter.sorts[0][0]:
+            pairs.append(('sort', self.sort))
+        return pairs
+
+    def rank(self, ids):
+        """Keep the ranked ids (e.g. from common.search) that pass the filters, in rank order"""
+        if not self.active:
+            return ids
+        matching = set(self.queryset.filter(pk__in=ids).values_list('pk', flat=True))
+        return [pk for pk in ids if pk in matching]
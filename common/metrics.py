@@ -0,0 +1,241 @@
+"""
+In-process metrics with Prometheus text exposition.
+
+Counters, gauges and histograms live in a per-process dictionary. Under
+gunicorn each worker has its own, so when METRICS_DIR is set every process
+also writes its values to METRICS_DIR/<pid>.json (atomically, at most once per
+METRICS_FLUSH_INTERVAL seconds and at exit) and the /metrics view merges all
+files: counters and histograms are summed over every file, gauges over live
+processes only. Clear METRICS_DIR when the server starts, as with
+prometheus_client's multiprocess mode.
+"""
+import atexit
+import json
+import os
+import tempfile
+import threading
+import time
+
+from django.conf import settings
+
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+# Approvals take minutes to days
+APPROVAL_BUCKETS = tuple(hours * 3600 for hours in (0.25, 1, 4, 8, 24, 48, 72, 168, 336))
+
+_lock = threading.Lock()
+_values = {}  # (metric name, sample suffix, labels) -> float
+_registry = {}  # name -> metric
+_last_flush = 0.0
+
+
+def enabled():
+    return getattr(settings, 'METRICS_ENABLED', False)
+
+
+def _add(key, amount):
+    with _lock:
+        _values[key] = _values.get(key, 0.0) + amount
+    _maybe_flush()
+
+
+def _set(key, value):
+    with _lock:
+        _values[key] = value
+    _maybe_flush()
+
+
+class Metric:
+    kind = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        _registry[name] = self
+
+    def _labels(self, labels):
+        return tuple(str(labels.get(name, '')) for name in self.labelnames)
+
+
+class Counter(Metric):
+    kind = 'counter'
+
+    def inc(self, amount=1, **labels):
+        if enabled():
+            _add((self.name, '_total', self._labels(labels)), amount)
+
+
+class Gauge(Metric):
+    kind = 'gauge'
+
+    def set(self, value, **labels):
+        if enabled():
+            _set((self.name, '', self._labels(labels)), value)
+
+
+class Histogram(Metric):
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (float('inf'),)
+
+    def observe(self, value, **labels):
+        if not enabled():
+            return
+        key = self._labels(labels)
+        bucket = next(bound for bound in self.buckets if value <= bound)
+        with _lock:
+            for suffix, amount in (('_sum', value), ('_count', 1), (f'_bucket:{bucket}', 1)):
+                _values[(self.name, suffix, key)] = _values.get((self.name, suffix, key), 0.0) + amount
+        _maybe_flush()
+
+
+# File mode
+
+def _directory():
+    return getattr(settings, 'METRICS_DIR', None)
+
+
+def _maybe_flush():
+    if _directory() and time.monotonic() - _last_flush >= getattr(settings, 'METRICS_FLUSH_INTERVAL', 1.0):
+        flush()
+
+
+def flush():
+    """Write this process's values to METRICS_DIR/<pid>.json"""
+    global _last_flush
+    directory = _directory()
+    if not directory:
+        return
+    with _lock:
+        _last_flush = time.monotonic()
+        rows = [[name, suffix, list(labels), value] for (name, suffix, labels), value in _values.items()]
+    os.makedirs(directory, exist_ok=True)
+    fd, temporary = tempfile.mkstemp(dir=directory, prefix='.tmp-')
+    with os.fdopen(fd, 'w') as f:
+        json.dump(rows, f)
+    os.replace(temporary, os.path.join(directory, f'{os.getpid()}.json'))
+
+
+atexit.register(flush)
+
+
+def _alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def collect():
+    """Merged (name, suffix, labels) -> value over this process and, in file mode, every other one"""
+    directory = _directory()
+    if not directory:
+        with _lock:
+            return dict(_values)
+
+    flush()
+    merged = {}
+    for filename in os.listdir(directory):
+        if not filename.endswith('.json'):
+            continue
+        try:
+            pid = int(filename[:-5])
+            with open(os.path.join(directory, filename)) as f:
+                rows = json.load(f)
+        except (ValueError, OSError):
+            continue
+        live = _alive(pid)
+        for name, suffix, labels, value in rows:
+            metric = _registry.get(name)
+            if metric is None or (metric.kind == 'gauge' and not live):
+                continue
+            key = (name, suffix, tuple(labels))
+            merged[key] = merged.get(key, 0.0) + value
+    return merged
+
+
+# Exposition
+
+def _escape(value):
+    return value.replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_labels(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in pairs) + '}'
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+def exposition():
+    """Prometheus text format (version 0.0.4) for every registered metric"""
+    values = collect()
+    by_metric = {}
+    for (name, suffix, labels), value in values.items():
+        by_metric.setdefault(name, {}).setdefault(labels, {})[suffix] = value
+
+    lines = []
+    for name in sorted(_registry):
+        metric = _registry[name]
+        family = f'{name}_total' if metric.kind == 'counter' else name
+        lines.append(f'# HELP {family} {metric.documentation}')
+        lines.append(f'# TYPE {family} {metric.kind}')
+        for labels, samples in sorted(by_metric.get(name, {}).items()):
+            label_text = _format_labels(metric.labelnames, labels)
+            if metric.kind != 'histogram':
+                for suffix, value in samples.items():
+                    lines.append(f'{name}{suffix}{label_text} {_format_value(value)}')
+                continue
+            cumulative = 0.0
+            for bound in metric.buckets:
+                cumulative += samples.get(f'_bucket:{bound}', 0.0)
+                bucket_labels = _format_labels(metric.labelnames, labels, [('le', _format_value(bound))])
+                lines.append(f'{name}_bucket{bucket_labels} {_format_value(cumulative)}')
+            lines.append(f'{name}_sum{label_text} {_format_value(samples.get("_sum", 0.0))}')
+            lines.append(f'{name}_count{label_text} {_format_value(samples.get("_count", 0.0))}')
+    return '\n'.join(lines) + '\n'
+
+
+# ERP metrics
+
+REQUEST_LATENCY = Histogram(
+    'erp_http_request_duration_seconds', 'Time to produce a response, by URL name',
+    ['view', 'method', 'status'],
+)
+DOCUMENTS_CREATED = Counter(
+    'erp_documents_created', 'Documents created, by type', ['type'],
+)
+APPROVAL_LATENCY = Histogram(
+    'erp_approval_latency_seconds', 'Time from a document being created to its approval',
+    ['type', 'stage'], buckets=APPROVAL_BUCKETS,
+)
+DB_CONNECTIONS_OPENED = Counter(
+    'erp_db_connections_opened', 'New database connections', ['alias'],
+)
+DB_CONNECTIONS_OPEN = Gauge(
+    'erp_db_connections_open', 'Database connections open when each process last finished a request',
+    ['alias'],
+)
+DB_QUERIES = Histogram(
+    'erp_db_queries_per_request', 'Database queries issued per request, by URL name', ['view'],
+    buckets=(1, 2, 5, 10, 20, 50, 100, 200),
+)
+
+
+def observe_approvals(document_type, stage, created_ats, approved_at):
+    """Record approval latency for documents created at `created_ats` and approved at `approved_at`"""
+    for created_at in created_ats:
+        APPROVAL_LATENCY.observe(max((approved_at - created_at).total_seconds(), 0.0),
+                                 type=document_type, stage=stage)
@@ -0,0 +1,281 @@
+"""
+Opt-in per-request instrumentation.
+
+MetricsMiddleware feeds the request latency and query count histograms in
+common.metrics for every request while METRICS_ENABLED is on.
+
+RequestTimingMiddleware samples a fraction of requests (REQUEST_TIMING_SAMPLE_RATE)
+and for each sampled one records wall time, DB time and query count across all
+database connections, repeated SQL statements (the signature of an N+1 loop)
+and template render time. Results go to a structured log line on the
+`common.middleware` logger and, for staff users or under DEBUG, to a
+Server-Timing header the browser dev tools display.
+
+Unsampled requests cost one random() call. With the sample rate at 0 (the
+default) the middleware removes itself from the stack at startup.
+
+ProfilingMiddleware runs cProfile over single requests and keeps the results
+in common.profiling's on-disk ring buffer, browsable at /admin/profiles/.
+"""
+import cProfile
+import contextvars
+import json
+import logging
+import random
+import time
+from collections import Counter
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.template import base as template_base
+from django.urls import Resolver404, resolve
+
+
+logger = logging.getLogger(__name__)
+
+_current = contextvars.ContextVar('request_timing', default=None)
+
+# ?_profile= / X-Profile: values that ask for a capture; anything else (0, false, off) doesn't
+PROFILE_FLAG_VALUES = {'1', 'true', 'yes'}
+
+
+class RequestStats:
+    """Counters for one sampled request"""
+
+    def __init__(self):
+        self.db_time = 0.0
+        self.queries = 0
+        self.statements = Counter()
+        self.template_time = 0.0
+        self.template_depth = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        """Database execute wrapper: time the query and count its SQL text"""
+        began = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_time += time.perf_counter() - began
+            self.queries += 1
+            self.statements[sql] += 1
+
+    def duplicates(self, threshold):
+        """(sql, count) for statements run at least `threshold` times, most repeated first"""
+        return [(sql, count) for sql, count in self.statements.most_common() if count >= threshold]
+
+
+def _timed_render(render):
+    """Wrap Template.render so the outermost render of a sampled request is timed"""
+
+    def timed(self, context):
+        stats = _current.get()
+        if stats is None:
+            return render(self, context)
+        stats.template_depth += 1
+        began = time.perf_counter()
+        try:
+            return render(self, context)
+        finally:
+            stats.template_depth -= 1
+            if not stats.template_depth:
+                stats.template_time += time.perf_counter() - began
+
+    timed.request_timing = True
+    return timed
+
+
+def _install_template_timer():
+    if not getattr(template_base.Template.render, 'request_timing', False):
+        template_base.Template.render = _timed_render(template_base.Template.render)
+
+
+class RequestTimingMiddleware:
+    """Sampled wall/DB/template timing with N+1 detection; see the module docstring"""
+
+    def __init__(self, get_response):
+        self.sample_rate = getattr(settings, 'REQUEST_TIMING_SAMPLE_RATE', 0)
+        if self.sample_rate <= 0:
+            raise MiddlewareNotUsed
+        self.duplicate_threshold = getattr(settings, 'REQUEST_TIMING_DUPLICATE_THRESHOLD', 3)
+        self.get_response = get_response
+        _install_template_timer()
+
+    def __call__(self, request):
+        if self.sample_rate < 1 and random.random() >= self.sample_rate:
+            return self.get_response(request)
+
+        stats = RequestStats()
+        token = _current.set(stats)
+        began = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for alias in connections:
+                    stack.enter_context(connections[alias].execute_wrapper(stats))
+                response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        total = time.perf_counter() - began
+
+        duplicates = stats.duplicates(self.duplicate_threshold)
+        self.log(request, response, stats, total, duplicates)
+        if settings.DEBUG or getattr(getattr(request, 'user', None), 'is_staff', False):
+            response['Server-Timing'] = self.server_timing(stats, total, duplicates)
+        return response
+
+    def server_timing(self, stats, total, duplicates):
+        metrics = [
+            f'app;dur={total * 1000:.1f}',
+            f'db;dur={stats.db_time * 1000:.1f};desc="{stats.queries} queries"',
+            f'tpl;dur={stats.template_time * 1000:.1f}',
+        ]
+        if duplicates:
+            metrics.append(f'dup;desc="{sum(count for _, count in duplicates)} repeated queries"')
+        return ', '.join(metrics)
+
+    def log(self, request, response, stats, total, duplicates):
+        match = getattr(request, 'resolver_match', None)
+        user = getattr(request, 'user', None)
+        record = {
+            'method': request.method,
+            'path': request.path,
+            'view': match.view_name if match else None,
+            'status': response.status_code,
+            'user': user.pk if user is not None and user.is_authenticated else None,
+            'total_ms': round(total * 1000, 2),
+            'db_ms': round(stats.db_time * 1000, 2),
+            'queries': stats.queries,
+            'template_ms': round(stats.template_time * 1000, 2),
+            'duplicates': [{'sql': sql[:200], 'count': count} for sql, count in duplicates[:5]],
+        }
+        level = logging.WARNING if duplicates else logging.INFO
+        logger.log(level, 'request_timing %s', json.dumps(record), extra={'request_timing': record})
+
+
+class _QueryCounter:
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+class MetricsMiddleware:
+    """Request latency and queries per URL name, plus persistent connection usage, for /metrics"""
+
+    def __init__(self, get_response):
+        from . import metrics
+        if not metrics.enabled():
+            raise MiddlewareNotUsed
+        self.metrics = metrics
+        self.get_response = get_response
+
+    def __call__(self, request):
+        counter = _QueryCounter()
+        began = time.perf_counter()
+        with ExitStack() as stack:
+            for alias in connections:
+                stack.enter_context(connections[alias].execute_wrapper(counter))
+            response = self.get_response(request)
+        elapsed = time.perf_counter() - began
+
+        match = getattr(request, 'resolver_match', None)
+        view = match.view_name if match else 'unmatched'
+        self.metrics.REQUEST_LATENCY.observe(elapsed, view=view, method=request.method, status=response.status_code)
+        self.metrics.DB_QUERIES.observe(counter.count, view=view)
+        for alias in connections:
+            self.metrics.DB_CONNECTIONS_OPEN.set(int(connections[alias].connection is not None), alias=alias)
+        return response
+
+
+class ProfilingMiddleware:
+    """
+    cProfile captures of single requests, in two modes:
+
+    - on demand: a staff user adds ?_profile=1 (or true/yes) or an `X-Profile: 1` header; the
+      response carries X-Profile-Id naming the capture
+    - slow requests: once a request takes PROFILE_SLOW_REQUEST_MS or longer, the
+      next request to the same view is profiled and kept if it is slow as well.
+      Requests in between run unprofiled, so the mode costs one timer per
+      request instead of cProfile's 2-3x slowdown on every request.
+
+    Only the view's own thread is profiled and streaming bodies are not, since
+    they are produced after the middleware returns.
+    """
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'PROFILING_ENABLED', False):
+            raise MiddlewareNotUsed
+        from . import profiling
+        self.profiling = profiling
+        self.slow_ms = getattr(settings, 'PROFILE_SLOW_REQUEST_MS', None)
+        self.armed = set()  # view names whose next request gets profiled
+        self.get_response = get_response
+
+    def __call__(self, request):
+        reason = None
+        if self.requested(request):
+            reason = 'requested'
+        elif self.armed:
+            view = self.view_name(request)
+            if view in self.armed:
+                self.armed.discard(view)
+                reason = 'slow'
+
+        if reason is None:
+            began = time.perf_counter()
+            response = self.get_response(request)
+            if self.slow_ms and (time.perf_counter() - began) * 1000 >= self.slow_ms:
+                match = getattr(request, 'resolver_match', None)
+                if match:
+                    self.armed.add(match.view_name)
+            return response
+
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError:
+            # Another profiler is already active in this thread
+            return self.get_response(request)
+        began = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            profiler.disable()
+        elapsed_ms = (time.perf_counter() - began) * 1000
+
+        if reason == 'slow' and elapsed_ms < self.slow_ms:
+            return response
+        match = getattr(request, 'resolver_match', None)
+        user = getattr(request, 'user', None)
+        try:
+            profile_id = self.profiling.save(profiler, {
+                'reason': reason,
+                'method': request.method,
+                'path': request.get_full_path(),
+                'view': match.view_name if match else None,
+                'status': response.status_code,
+                'user': user.get_username() if user is not None and user.is_authenticated else None,
+                'duration_ms': round(elapsed_ms, 2),
+            })
+        except OSError:
+            logger.exception('Could not store request profile')
+            return response
+        if reason == 'requested':
+            response['X-Profile-Id'] = profile_id
+        return response
+
+    def requested(self, request):
+        flag = request.GET.get('_profile') or request.headers.get('X-Profile') or ''
+        if flag.strip().lower() not in PROFILE_FLAG_VALUES:
+            return False
+        return getattr(getattr(request, 'user', None), 'is_staff', False)
+
+    def view_name(self, request):
+        try:
+            return resolve(request.path_info).view_name
+        except Resolver404:
+            return None
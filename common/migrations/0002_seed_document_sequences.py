@@ -0,0 +1,48 @@
+# Generated by Django 5.2.7 on 2026-10-18 04:57
+
+import datetime
+import re
+
+from django.db import migrations
+
+
+NUMBERED_MODELS = [
+    ('inventory', 'MaterialRequest', 'request_number', 'REQ'),
+    ('accounting', 'Liquidation', 'liquidation_number', 'LIQ'),
+    ('accounting', 'DebitMemo', 'memo_number', 'DM'),
+    ('accounting', 'CheckVoucher', 'voucher_number', 'CV'),
+    ('accounting', 'Disbursement', 'disbursement_number', 'DISB'),
+]
+
+
+def seed_sequences(apps, schema_editor):
+    """Start each counter after the highest number already issued for that prefix and day"""
+    DocumentSequence = apps.get_model('common', 'DocumentSequence')
+    sequences = []
+    for app_label, model_name, field, prefix in NUMBERED_MODELS:
+        model = apps.get_model(app_label, model_name)
+        pattern = re.compile(rf'^{prefix}-(\d{{8}})-(\d+)$')
+        highest = {}
+        for number in model.objects.values_list(field, flat=True).iterator():
+            match = pattern.match(number or '')
+            if match:
+                day = datetime.datetime.strptime(match.group(1), '%Y%m%d').date()
+                highest[day] = max(highest.get(day, 0), int(match.group(2)))
+        sequences.extend(
+            DocumentSequence(prefix=prefix, day=day, last_value=value)
+            for day, value in highest.items()
+        )
+    DocumentSequence.objects.bulk_create(sequences, batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('common', '0001_initial'),
+        ('inventory', '0005_materialrequest_purchase_approved_by_and_more'),
+        ('accounting', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(seed_sequences, migrations.RunPython.noop),
+    ]
@@ -1,3 +1,17 @@
 from django.db import models
 
-# Create your models here.
+
+class DocumentSequence(models.Model):
+    """Per-prefix, per-day counter backing document numbers (REQ, LIQ, DM, CV, DISB)"""
+
+    prefix = models.CharField(max_length=10)
+    day = models.DateField()
+    last_value = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['prefix', 'day'], name='unique_document_sequence'),
+        ]
+
+    def __str__(self):
+        return f"{self.prefix}-{self.day:%Y%m%d} ({self.last_value})"
@@ -0,0 +1,71 @@
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .models import DocumentSequence
+
+
+def format_number(prefix, day, value):
+    """Render a document number as PREFIX-YYYYMMDD-NNN"""
+    return f"{prefix}-{day.strftime('%Y%m%d')}-{value:03d}"
+
+
+def _upsert_counter(prefix, day, count):
+    """Bump the counter in a single INSERT ... ON CONFLICT ... RETURNING statement"""
+    table = connection.ops.quote_name(DocumentSequence._meta.db_table)
+    sql = (
+        f"INSERT INTO {table} (prefix, day, last_value) VALUES (%s, %s, %s) "
+        f"ON CONFLICT (prefix, day) DO UPDATE SET last_value = {table}.last_value + excluded.last_value "
+        f"RETURNING last_value"
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [prefix, day, count])
+        return cursor.fetchone()[0]
+
+
+def _locked_counter(prefix, day, count):
+    """Fallback for backends without upsert/RETURNING: lock the counter row and bump it"""
+    with transaction.atomic():
+        sequence, _ = DocumentSequence.objects.select_for_update().get_or_create(prefix=prefix, day=day)
+        sequence.last_value += count
+        sequence.save(update_fields=['last_value'])
+        return sequence.last_value
+
+
+def allocate(prefix, count=1, day=None):
+    """
+    Atomically reserve `count` consecutive values for `prefix` on `day`.
+
+    Returns the last value handed out; the block is (last - count + 1) .. last.
+    """
+    if count < 1:
+        raise ValueError('count must be at least 1')
+    day = day or timezone.now().date()
+    features = connection.features
+    if features.supports_update_conflicts_with_target and features.can_return_columns_from_insert:
+        return _upsert_counter(prefix, day, count)
+    return _locked_counter(prefix, day, count)
+
+
+def next_number(prefix, day=None):
+    """Allocate and return the next document number for `prefix`"""
+    day = day or timezone.now().date()
+    return format_number(prefix, day, allocate(prefix, 1, day))
+
+
+def peek_number(prefix, day=None):
+    """
+    Preview the number the next allocation for `prefix` would get.
+
+    Reads the counter row by its unique key without locking or writing, so
+    it is only a hint: a concurrent save may take this number first.
+    """
+    day = day or timezone.now().date()
+    last = DocumentSequence.objects.filter(prefix=prefix, day=day).values_list('last_value', flat=True).first()
+    return format_number(prefix, day, (last or 0) + 1)
+
+
+def reserve_numbers(prefix, count, day=None):
+    """Allocate a block of `count` document numbers in one statement, e.g. for bulk imports"""
+    day = day or timezone.now().date()
+    last = allocate(prefix, count, day)
+    return [format_number(prefix, day, value) for value in range(last - count + 1, last + 1)]
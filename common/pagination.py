@@ -0,0 +1,242 @@
+import base64
+import datetime
+import hashlib
+import json
+
+from django.core.cache import cache
+from django.core.exceptions import EmptyResultSet, ValidationError
+from django.db import connection
+from django.db.models import Q
+from django.utils.functional import cached_property
+
+
+COUNT_CACHE_TIMEOUT = 60  # seconds
+
+
+def _cursor_value(value):
+    # Full isoformat keeps microseconds, which DjangoJSONEncoder would truncate
+    if isinstance(value, (datetime.date, datetime.time)):
+        return value.isoformat()
+    return str(value)
+
+
+def _encode_cursor(values):
+    payload = json.dumps(values, default=_cursor_value, separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+def _decode_cursor(cursor, length):
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (ValueError, TypeError):
+        return None
+    if not isinstance(values, list) or len(values) != length:
+        return None
+    return values
+
+
+def estimate_count(queryset):
+    """Planner row estimate on PostgreSQL; exact COUNT(*) elsewhere"""
+    if connection.vendor == 'postgresql':
+        plan = json.loads(queryset.order_by().explain(format='json'))
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        return int(plan[0]['Plan']['Plan Rows'])
+    return queryset.count()
+
+
+def query_cache_key(prefix, queryset, *extra):
+    """Cache key for a result computed from `queryset`; None when the queryset can't match any row"""
+    try:
+        sql, params = queryset.order_by().query.sql_with_params()
+    except EmptyResultSet:
+        return None
+    digest = hashlib.md5(f"{extra}:{sql}:{params}".encode()).hexdigest()
+    return f"{prefix}:{digest}"
+
+
+def cached_count(queryset, timeout=COUNT_CACHE_TIMEOUT, approximate=False):
+    """COUNT(*) for `queryset`, shared through the cache for `timeout` seconds"""
+    key = query_cache_key('pagination:count', queryset, approximate)
+    if key is None:
+        return 0
+    count = cache.get(key)
+    if count is None:
+        count = estimate_count(queryset) if approximate else queryset.count()
+        cache.set(key, count, timeout)
+    return count
+
+
+class KeysetPage:
+    """One page of a KeysetPaginator; iterates like a Paginator page"""
+
+    def __init__(self, object_list, paginator, has_next, has_previous):
+        self.object_list = object_list
+        self.paginator = paginator
+        self._has_next = has_next
+        self._has_previous = has_previous
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def has_next(self):
+        return self._has_next
+
+    def has_previous(self):
+        return self._has_previous
+
+    def has_other_pages(self):
+        return self._has_next or self._has_previous
+
+    @property
+    def next_cursor(self):
+        if self._has_next and self.object_list:
+            return self.paginator.cursor_for(self.object_list[-1])
+        return None
+
+    @property
+    def previous_cursor(self):
+        if self._has_previous and self.object_list:
+            return self.paginator.cursor_for(self.object_list[0])
+        return None
+
+
+class KeysetPaginator:
+    """
+    Seek pagination over a unique ordering, e.g. ('-created_at', '-id') or ('item_code',).
+
+    Pages are fetched with WHERE (key) < / > (cursor) ... LIMIT per_page + 1, so
+    every page costs the same index range scan no matter how deep it is. The
+    total is a separate COUNT shared through the cache (see cached_count); pass
+    `count_queryset` when `queryset` carries joins or aggregates the count doesn't
+    need, or `total` when the caller already knows it (e.g. from facet counts).
+    """
+
+    def __init__(self, queryset, ordering, per_page=10, count_queryset=None,
+                 count_timeout=COUNT_CACHE_TIMEOUT, approximate_count=False, total=None):
+        self.queryset = queryset
+        self.total = total
+        self.count_queryset = queryset if count_queryset is None else count_queryset
+        self.ordering = [(field.lstrip('-'), field.startswith('-')) for field in ordering]
+        self.per_page = per_page
+        self.count_timeout = count_timeout
+        self.approximate_count = approximate_count
+
+    @cached_property
+    def count(self):
+        if self.total is not None:
+            return self.total
+        return cached_count(self.count_queryset, self.count_timeout, self.approximate_count)
+
+    def cursor_for(self, obj):
+        return _encode_cursor([getattr(obj, name) for name, _ in self.ordering])
+
+    @cached_property
+    def _fields(self):
+        fields = []
+        for name, _ in self.ordering:
+            model = self.queryset.model
+            for part in name.split('__'):
+                field = model._meta.pk if part == 'pk' else model._meta.get_field(part)
+                model = field.related_model
+            fields.append(field)
+        return fields
+
+    def _cursor_values(self, cursor):
+        """The decoded cursor converted to the ordering fields' types; None when it doesn't fit them"""
+        values = _decode_cursor(cursor, len(self.ordering)) if cursor else None
+        if values is None:
+            return None
+        try:
+            values = [field.to_python(value) for field, value in zip(self._fields, values)]
+        except (ValidationError, ValueError, TypeError):
+            return None
+        # A crafted null would reach the lookups as `__lt=None`, which the ORM refuses
+        if any(value is None for value in values):
+            return None
+        return values
+
+    def _seek(self, values, forward):
+        """Q object selecting rows strictly after (forward) or before the cursor values"""
+        condition = Q()
+        for i, (name, descending) in enumerate(self.ordering):
+            lookup = 'lt' if descending == forward else 'gt'
+            clause = Q(**{f"{name}__{lookup}": values[i]})
+            for j in range(i):
+                clause &= Q(**{self.ordering[j][0]: values[j]})
+            condition = condition | clause if condition else clause
+        return condition
+
+    def _order_by(self, forward):
+        return [
+            f"{'-' if descending == forward else ''}{name}"
+            for name, descending in self.ordering
+        ]
+
+    def get_page(self, after=None, before=None):
+        """Return the page following cursor `after`, preceding cursor `before`, or the first page"""
+        after_values = self._cursor_values(after)
+        before_values = self._cursor_values(before) if not after_values else None
+
+        if before_values is not None:
+            queryset = self.queryset.filter(self._seek(before_values, forward=False)).order_by(*self._order_by(False))
+            rows = list(queryset[:self.per_page + 1])
+            has_previous = len(rows) > self.per_page
+            rows = rows[:self.per_page][::-1]
+            return KeysetPage(rows, self, has_next=True, has_previous=has_previous)
+
+        queryset = self.queryset.order_by(*self._order_by(True))
+        if after_values is not None:
+            queryset = queryset.filter(self._seek(after_values, forward=True))
+        rows = list(queryset[:self.per_page + 1])
+        has_next = len(rows) > self.per_page
+        return KeysetPage(rows[:self.per_page], self, has_next=has_next, has_previous=after_values is not None)
+
+
+class RankedPaginator:
+    """
+    Pages over primary keys already in rank order (e.g. from common.search), with
+    the same page interface as KeysetPaginator. Cursors are positions in `ids`;
+    each page fetches its rows from `queryset` by primary key.
+    """
+
+    def __init__(self, queryset, ids, per_page=10):
+        self.queryset = queryset
+        self.ids = list(ids)
+        self.per_page = per_page
+
+    @property
+    def count(self):
+        return len(self.ids)
+
+    def cursor_for(self, obj):
+        return _encode_cursor([obj.search_position])
+
+    def get_page(self, after=None, before=None):
+        """Return the page following cursor `after`, preceding cursor `before`, or the first page"""
+        after_values = _decode_cursor(after, 1) if after else None
+        before_values = _decode_cursor(before, 1) if before and not after_values else None
+        try:
+            if after_values is not None:
+                start = int(after_values[0]) + 1
+            elif before_values is not None:
+                start = max(int(before_values[0]) - self.per_page, 0)
+            else:
+                start = 0
+        except (TypeError, ValueError):
+            start = 0
+        start = max(start, 0)
+
+        page_ids = self.ids[start:start + self.per_page]
+        rows = {obj.pk: obj for obj in self.queryset.filter(pk__in=page_ids)}
+        objects = []
+        for position, pk in enumerate(page_ids, start):
+            obj = rows.get(pk)
+            if obj is not None:
+                obj.search_position = position
+                objects.append(obj)
+        return KeysetPage(objects, self, has_next=start + self.per_page < len(self.ids), has_previous=start > 0)
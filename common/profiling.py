@@ -0,0 +1,96 @@
+"""
+On-disk ring buffer of cProfile captures, written by ProfilingMiddleware and
+browsed from the admin (/admin/profiles/).
+
+Each capture is <id>.prof (pstats format, loadable with snakeviz or
+`python -m pstats`) plus <id>.json with the request details. Only the newest
+PROFILE_MAX_FILES captures are kept.
+"""
+import io
+import itertools
+import json
+import os
+import pstats
+import re
+import tempfile
+import time
+
+from django.conf import settings
+from django.utils import timezone
+
+
+PROFILE_ID = re.compile(r'^\d+-\d+-\d+$')
+SORT_KEYS = ('cumulative', 'tottime', 'ncalls')
+
+_sequence = itertools.count()
+
+
+def directory():
+    return getattr(settings, 'PROFILE_DIR', None) or os.path.join(tempfile.gettempdir(), 'erp-profiles')
+
+
+def _path(profile_id, extension):
+    if not PROFILE_ID.match(profile_id or ''):
+        raise FileNotFoundError(profile_id)
+    return os.path.join(directory(), f'{profile_id}.{extension}')
+
+
+def save(profiler, details):
+    """Store a finished cProfile.Profile with `details` and trim the buffer; returns the capture id"""
+    os.makedirs(directory(), exist_ok=True)
+    profile_id = f'{time.time_ns() // 1_000_000}-{os.getpid()}-{next(_sequence)}'
+    profiler.dump_stats(_path(profile_id, 'prof'))
+    with open(_path(profile_id, 'json'), 'w') as f:
+        json.dump({'id': profile_id, 'created': timezone.now().isoformat(timespec='seconds'), **details}, f)
+    _trim(getattr(settings, 'PROFILE_MAX_FILES', 50))
+    return profile_id
+
+
+def _trim(limit):
+    ids = sorted(_ids(), key=_sort_key)
+    for profile_id in ids[:max(len(ids) - limit, 0)]:
+        for extension in ('prof', 'json'):
+            try:
+                os.remove(_path(profile_id, extension))
+            except FileNotFoundError:
+                pass  # another worker trimmed it first
+
+
+def _ids():
+    try:
+        names = os.listdir(directory())
+    except FileNotFoundError:
+        return []
+    return [name[:-5] for name in names if name.endswith('.json') and PROFILE_ID.match(name[:-5])]
+
+
+def _sort_key(profile_id):
+    return tuple(int(part) for part in profile_id.split('-'))
+
+
+def details(profile_id):
+    with open(_path(profile_id, 'json')) as f:
+        return json.load(f)
+
+
+def recent():
+    """Details of every stored capture, newest first"""
+    captures = []
+    for profile_id in sorted(_ids(), key=_sort_key, reverse=True):
+        try:
+            captures.append(details(profile_id))
+        except (OSError, ValueError):
+            continue
+    return captures
+
+
+def report(profile_id, sort='cumulative', limit=60):
+    """pstats text report for one capture"""
+    output = io.StringIO()
+    stats = pstats.Stats(_path(profile_id, 'prof'), stream=output)
+    stats.strip_dirs().sort_stats(sort if sort in SORT_KEYS else 'cumulative').print_stats(limit)
+    return output.getvalue()
+
+
+def raw_path(profile_id):
+    return _path(profile_id, 'prof')
@@ -0,0 +1,154 @@
+"""
+Ranked substring search over a few text columns of one model.
+
+Every whitespace-separated term must appear in at least one of the columns.
+A search runs in two steps so its cost doesn't grow with the table:
+
+1. Candidates: the newest SEARCH_CANDIDATES matching rows, found through an
+   index, plus any row whose first column equals the query exactly (a unique
+   index lookup, so an exact item code always comes back).
+   - PostgreSQL: GIN indexes with gin_trgm_ops on UPPER(column) (see the
+     inventory 0009 migration) serve the icontains filters.
+   - SQLite: an external-content FTS5 table with the trigram tokenizer mirrors
+     the columns and is kept in sync by triggers; install() creates both after
+     every migrate, since SQLite table rebuilds drop triggers. Terms under three
+     characters are too short for a trigram and are applied as icontains
+     filters on the candidates; a query made only of such terms scans the table.
+   - Other databases scan with icontains.
+2. Ranking: exact first-column match, then prefix matches column by column,
+   then (PostgreSQL) trigram similarity, then newest first. At most
+   SEARCH_LIMIT ids are returned.
+
+RankedPaginator pages over the ranked ids with the KeysetPage interface, so
+list templates keep using partials/keyset_pagination.html.
+"""
+import sqlite3
+
+from django.db import OperationalError, connection
+from django.db.models import Case, IntegerField, Q, Value, When
+from django.db.models.functions import Greatest
+
+
+SEARCH_LIMIT = 500
+SEARCH_CANDIDATES = 2000
+MAX_TERMS = 8
+TRIGRAM = 3
+
+
+def search_terms(query):
+    """Distinct whitespace-separated terms of `query`, at most MAX_TERMS"""
+    return list(dict.fromkeys((query or '').split()))[:MAX_TERMS]
+
+
+class Search:
+
+    def __init__(self, model, fields):
+        self.model = model
+        self.fields = tuple(fields)
+
+    @property
+    def fts_table(self):
+        return f'{self.model._meta.db_table}_fts'
+
+    def ranked_ids(self, query, limit=SEARCH_LIMIT):
+        """Primary keys of the rows matching every term of `query`, best first"""
+        query = (query or '').strip()
+        terms = search_terms(query)
+        if not terms:
+            return []
+        manager = self.model._default_manager
+        long_terms = [term for term in terms if len(term) >= TRIGRAM]
+        if connection.vendor == 'sqlite' and long_terms and self._has_fts():
+            candidates = self._fts_candidates(long_terms)
+            queryset = manager.filter(self._filter([term for term in terms if len(term) < TRIGRAM]))
+        else:
+            queryset = manager.filter(self._filter(terms))
+            candidates = list(queryset.order_by('-pk').values_list('pk', flat=True)[:SEARCH_CANDIDATES])
+        exact = manager.filter(**{f'{self.fields[0]}__in': {query, query.upper()}}).values_list('pk', flat=True)
+
+        queryset = queryset.filter(pk__in=[*exact, *candidates]).annotate(search_rank=self._prefix_rank(query))
+        ordering = ['search_rank']
+        if connection.vendor == 'postgresql':
+            from django.contrib.postgres.search import TrigramSimilarity
+
+            queryset = queryset.annotate(search_similarity=Greatest(*[
+                TrigramSimilarity(field, query) for field in self.fields
+            ]))
+            ordering.append('-search_similarity')
+        return list(queryset.order_by(*ordering, '-pk').values_list('pk', flat=True)[:limit])
+
+    def _filter(self, terms):
+        condition = Q()
+        for term in terms:
+            matches = Q()
+            for field in self.fields:
+                matches |= Q(**{f'{field}__icontains': term})
+            condition &= matches
+        return condition
+
+    def _prefix_rank(self, query):
+        first = self.fields[0]
+        whens = [When(**{f'{first}__iexact': query}, then=Value(0))]
+        whens += [When(**{f'{field}__istartswith': query}, then=Value(i + 1)) for i, field in enumerate(self.fields)]
+        return Case(*whens, default=Value(len(self.fields) + 1), output_field=IntegerField())
+
+    # SQLite FTS5
+
+    def _has_fts(self):
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = %s", [self.fts_table])
+            return cursor.fetchone() is not None
+
+    def _fts_candidates(self, terms):
+        table = connection.ops.quote_name(self.fts_table)
+        # Each term becomes a quoted phrase: a substring match, with FTS5 syntax characters taken literally
+        match = ' '.join('"{}"'.format(term.replace('"', '""')) for term in terms)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'SELECT rowid FROM {table} WHERE {table} MATCH %s ORDER BY rowid DESC LIMIT %s',
+                [match, SEARCH_CANDIDATES],
+            )
+            return [row[0] for row in cursor.fetchall()]
+
+    def install(self, using_connection):
+        """Create the FTS5 table and its sync triggers on SQLite if missing, filling the table when created"""
+        if using_connection.vendor != 'sqlite' or sqlite3.sqlite_version_info < (3, 34):
+            return  # the trigram tokenizer arrived in SQLite 3.34
+        quote = using_connection.ops.quote_name
+        source = self.model._meta.db_table
+        pk = self.model._meta.pk.column
+        fts = self.fts_table
+        columns = ', '.join(quote(field) for field in self.fields)
+        new_values = ', '.join(f'new.{quote(field)}' for field in self.fields)
+        old_values = ', '.join(f'old.{quote(field)}' for field in self.fields)
+        triggers = {
+            f'{fts}_insert': f'AFTER INSERT ON {quote(source)} BEGIN '
+                             f'INSERT INTO {quote(fts)}(rowid, {columns}) VALUES (new.{quote(pk)}, {new_values}); END',
+            f'{fts}_delete': f'AFTER DELETE ON {quote(source)} BEGIN '
+                             f'INSERT INTO {quote(fts)}({quote(fts)}, rowid, {columns}) '
+                             f"VALUES ('delete', old.{quote(pk)}, {old_values}); END",
+            f'{fts}_update': f'AFTER UPDATE OF {columns} ON {quote(source)} BEGIN '
+                             f'INSERT INTO {quote(fts)}({quote(fts)}, rowid, {columns}) '
+                             f"VALUES ('delete', old.{quote(pk)}, {old_values}); "
+                             f'INSERT INTO {quote(fts)}(rowid, {columns}) VALUES (new.{quote(pk)}, {new_values}); END',
+        }
+        with using_connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT name FROM sqlite_master WHERE name IN (%s)" % ', '.join(['%s'] * (len(triggers) + 1)),
+                [fts, *triggers],
+            )
+            existing = {row[0] for row in cursor.fetchall()}
+            if existing == {fts, *triggers}:
+                return
+            try:
+                cursor.execute(
+                    f'CREATE VIRTUAL TABLE IF NOT EXISTS {quote(fts)} USING fts5({columns}, '
+                    f"content={quote(source)}, content_rowid={quote(pk)}, tokenize='trigram')"
+                )
+            except OperationalError:
+                return  # SQLite built without FTS5; searches fall back to icontains
+            for name, body in triggers.items():
+                cursor.execute(f'DROP TRIGGER IF EXISTS {quote(name)}')
+                cursor.execute(f'CREATE TRIGGER {quote(name)} {body}')
+            # Rows written while the triggers were missing are picked up by re-reading the source table
+            cursor.execute(f"INSERT INTO {quote(fts)}({quote(fts)}) VALUES ('rebuild')")
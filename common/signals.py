@@ -0,0 +1,30 @@
+"""Feed common.metrics from model and connection signals"""
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_save
+
+from . import metrics
+
+
+# Model label -> document type reported in erp_documents_created_total
+DOCUMENT_MODELS = {
+    'inventory.MaterialRequest': 'material_request',
+    'accounting.Liquidation': 'liquidation',
+    'accounting.DebitMemo': 'debit_memo',
+    'accounting.CheckVoucher': 'check_voucher',
+    'accounting.Disbursement': 'disbursement',
+}
+
+
+def count_document(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        metrics.DOCUMENTS_CREATED.inc(type=DOCUMENT_MODELS[sender._meta.label])
+
+
+def count_connection(sender, connection, **kwargs):
+    metrics.DB_CONNECTIONS_OPENED.inc(alias=connection.alias)
+
+
+def connect():
+    for label in DOCUMENT_MODELS:
+        post_save.connect(count_document, sender=label, dispatch_uid=f'metrics_created_{label}')
+    connection_created.connect(count_connection, dispatch_uid='metrics_connection_created')
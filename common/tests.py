@@ -1,3 +1,253 @@
-from django.test import TestCase
+import datetime
+import json
+import os
+import tempfile
+import time
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core.exceptions import MiddlewareNotUsed
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase, override_settings
+from django.urls import resolve, reverse
+
+from inventory.models import MaterialRequest
+from inventory.tests import TEST_STORAGES
+from . import metrics, profiling
+from .middleware import ProfilingMiddleware, RequestTimingMiddleware
+
+
+class RequestTimingMiddlewareTests(TestCase):
+    """Sampled requests get timings and repeated-query detection; the default leaves the stack alone"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.staff = User.objects.create_user(username='staff', is_staff=True)
+        for i in range(4):
+            User.objects.create_user(username=f'user{i}')
+
+    def request(self, user):
+        request = RequestFactory().get('/timed/')
+        request.user = user
+        return request
+
+    def test_disabled_by_default(self):
+        with self.assertRaises(MiddlewareNotUsed):
+            RequestTimingMiddleware(lambda request: HttpResponse())
+
+    @override_settings(REQUEST_TIMING_SAMPLE_RATE=1.0, REQUEST_TIMING_DUPLICATE_THRESHOLD=3)
+    def test_repeated_queries_are_reported(self):
+        def n_plus_one(request):
+            for pk in User.objects.values_list('pk', flat=True):
+                User.objects.get(pk=pk)
+            return HttpResponse()
+
+        with self.assertLogs('common.middleware', 'WARNING') as logs:
+            response = RequestTimingMiddleware(n_plus_one)(self.request(self.staff))
+        self.assertIn('desc="6 queries"', response['Server-Timing'])
+        self.assertIn('dup;desc="5 repeated queries"', response['Server-Timing'])
+        self.assertEqual(logs.records[0].request_timing['duplicates'][0]['count'], 5)
+
+    @override_settings(REQUEST_TIMING_SAMPLE_RATE=1.0, DEBUG=False)
+    def test_header_only_for_staff(self):
+        user = User.objects.get(username='user0')
+        with self.assertLogs('common.middleware', 'INFO'):
+            response = RequestTimingMiddleware(lambda request: HttpResponse())(self.request(user))
+        self.assertNotIn('Server-Timing', response)
+
+
+@override_settings(METRICS_ENABLED=True, METRICS_DIR=None, METRICS_TOKEN='scrape-token')
+class MetricsTests(TestCase):
+    """Metrics are recorded while enabled and exposed to staff or the scrape token"""
+
+    def setUp(self):
+        metrics._values.clear()
+        self.addCleanup(metrics._values.clear)
+
+    def test_exposition_format(self):
+        metrics.REQUEST_LATENCY.observe(0.03, view='inventory:purchase', method='GET', status=200)
+        metrics.REQUEST_LATENCY.observe(0.2, view='inventory:purchase', method='GET', status=200)
+        metrics.DOCUMENTS_CREATED.inc(type='disbursement')
+
+        text = metrics.exposition()
+        prefix = 'erp_http_request_duration_seconds_bucket{view="inventory:purchase",method="GET",status="200",'
+        self.assertIn(prefix + 'le="0.025"} 0', text)
+        self.assertIn(prefix + 'le="0.05"} 1', text)
+        self.assertIn(prefix + 'le="+Inf"} 2', text)
+        self.assertIn('erp_http_request_duration_seconds_count{view="inventory:purchase",method="GET",status="200"} 2', text)
+        self.assertIn('# TYPE erp_documents_created_total counter', text)
+        self.assertIn('erp_documents_created_total{type="disbursement"} 1', text)
+
+    def test_scrape_requires_staff_or_token(self):
+        url = reverse('metrics')
+        self.assertEqual(self.client.get(url).status_code, 403)
+        self.assertEqual(self.client.get(url, headers={'Authorization': 'Bearer wrong'}).status_code, 403)
+        response = self.client.get(url, headers={'Authorization': 'Bearer scrape-token'})
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(b'erp_http_request_duration_seconds', response.content)
+
+    def test_document_creation_is_counted(self):
+        user = User.objects.create_user(username='requester')
+        MaterialRequest.objects.create(requested_by=user, project_name='Project', project_location='Site',
+                                       site_supervisor='Supervisor', purpose='Testing',
+                                       delivery_date_needed=datetime.date.today())
+        self.assertIn('erp_documents_created_total{type="material_request"} 1', metrics.exposition())
+
+    @override_settings(STORAGES=TEST_STORAGES)
+    def test_rejections_are_not_approval_latency(self):
+        user = User.objects.create_user(username='purchaser')
+        requests = [
+            MaterialRequest.objects.create(requested_by=user, project_name=f'Project {i}', project_location='Site',
+                                           site_supervisor='Supervisor', purpose='Testing',
+                                           delivery_date_needed=datetime.date.today(), status='approved')
+            for i in range(3)
+        ]
+        self.client.force_login(user)
+        self.client.post(reverse('inventory:reject_purchase', args=[requests[0].pk]), {'reason': 'Over budget'},
+                         content_type='application/json')
+        self.client.post(reverse('inventory:bulk_reject_purchase'), {'ids': [requests[1].pk]},
+                         content_type='application/json')
+        self.assertNotIn('erp_approval_latency_seconds_count', metrics.exposition())
+
+        self.client.post(reverse('inventory:bulk_approve_purchase'), {'ids': [requests[2].pk]},
+                         content_type='application/json')
+        self.assertIn('erp_approval_latency_seconds_count{type="material_request",stage="purchase"} 1',
+                      metrics.exposition())
+
+    def test_workers_are_merged_from_metrics_dir(self):
+        with tempfile.TemporaryDirectory() as directory, override_settings(METRICS_DIR=directory):
+            metrics.DOCUMENTS_CREATED.inc(type='liquidation')
+            metrics.DB_CONNECTIONS_OPEN.set(1, alias='default')
+            # Another worker's file, from a process that has since exited
+            with open(os.path.join(directory, '999999999.json'), 'w') as f:
+                json.dump([['erp_documents_created', '_total', ['liquidation'], 2],
+                           ['erp_db_connections_open', '', ['default'], 1]], f)
+            text = metrics.exposition()
+        self.assertIn('erp_documents_created_total{type="liquidation"} 3', text)
+        self.assertIn('erp_db_connections_open{alias="default"} 1', text)
+
+
+@override_settings(STORAGES=TEST_STORAGES)
+class ProfilingMiddlewareTests(TestCase):
+    """Staff-requested and slow-request profiles land in the bounded directory and show in the admin"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.staff = User.objects.create_user(username='staff', is_staff=True)
+        cls.user = User.objects.create_user(username='user')
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        settings = override_settings(PROFILING_ENABLED=True, PROFILE_DIR=directory.name, PROFILE_MAX_FILES=2,
+                                     PROFILE_SLOW_REQUEST_MS=None)
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+    def request(self, user, path='/metrics', **params):
+        request = RequestFactory().get(path, params)
+        request.user = user
+        request.resolver_match = resolve(path)
+        return request
+
+    def test_disabled_by_default(self):
+        with override_settings(PROFILING_ENABLED=False), self.assertRaises(MiddlewareNotUsed):
+            ProfilingMiddleware(lambda request: HttpResponse())
+
+    def test_staff_request_is_profiled_and_buffer_is_bounded(self):
+        middleware = ProfilingMiddleware(lambda request: HttpResponse())
+        self.assertNotIn('X-Profile-Id', middleware(self.request(self.user, _profile='1')))
+        for flag in ('0', 'false', 'off', 'no'):
+            self.assertNotIn('X-Profile-Id', middleware(self.request(self.staff, _profile=flag)))
+        self.assertEqual(profiling.recent(), [])
+        ids = [middleware(self.request(self.staff, _profile='1'))['X-Profile-Id'] for _ in range(3)]
+
+        self.assertEqual([profile['id'] for profile in profiling.recent()], ids[:0:-1])
+        self.assertIn('function calls', profiling.report(ids[-1]))
+
+    def test_slow_view_is_profiled_on_its_next_request(self):
+        def slow(request):
+            time.sleep(0.01)
+            return HttpResponse()
+
+        with override_settings(PROFILE_SLOW_REQUEST_MS=5):
+            middleware = ProfilingMiddleware(slow)
+            middleware(self.request(self.user))
+            self.assertEqual(profiling.recent(), [])
+            middleware(self.request(self.user))
+        [profile] = profiling.recent()
+        self.assertEqual((profile['reason'], profile['view'], profile['user']), ('slow', 'metrics', 'user'))
+
+    def test_admin_pages(self):
+        profile_id = ProfilingMiddleware(lambda request: HttpResponse())(
+            self.request(self.staff, _profile='1'))['X-Profile-Id']
+        self.client.force_login(self.user)
+        self.assertEqual(self.client.get(reverse('profiles')).status_code, 302)
+
+        self.client.force_login(self.staff)
+        self.assertContains(self.client.get(reverse('profiles')), reverse('profile', args=[profile_id]))
+        self.assertContains(self.client.get(reverse('profile', args=[profile_id]), {'sort': 'tottime'}),
+                            'function calls')
+        self.assertEqual(self.client.get(reverse('profile', args=['..-1-1'])).status_code, 404)
+
+
+@override_settings(STORAGES=TEST_STORAGES)
+class PrivatePageTests(TestCase):
+    """Signed-in pages revalidate to 304 until their data, the login or pending messages change"""
+
+    @classmethod
+    def setUpTestData(cls):
+        from inventory.models import InventoryItem
+
+        cls.user = User.objects.create_user(username='user', password='secret')
+        cls.other = User.objects.create_user(username='other')
+        cls.item = InventoryItem.objects.create(item_code='MAT-001', material_name='Cement', category='Cement',
+                                                unit='bag', unit_price=1)
+
+    def setUp(self):
+        self.client.force_login(self.user)
+        self.url = reverse('inventory:masterlist')
+
+    def test_unchanged_page_is_not_modified(self):
+        first = self.client.get(self.url)
+        self.assertEqual(first['Cache-Control'], 'private, no-cache, must-revalidate')
+        self.assertIn('Last-Modified', first)
+        response = self.client.get(self.url, headers={'If-None-Match': first['ETag']})
+        self.assertEqual(response.status_code, 304)
+
+        self.item.save()
+        response = self.client.get(self.url, headers={'If-None-Match': first['ETag']})
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], first['ETag'])
+
+    def test_etag_is_per_login_and_skipped_with_messages(self):
+        etag = self.client.get(self.url)['ETag']
+        self.client.force_login(self.other)
+        self.assertEqual(self.client.get(self.url, headers={'If-None-Match': etag}).status_code, 200)
+
+        etag = self.client.get(self.url)['ETag']
+        # Another page's POST leaves a flash message for the next page rendered
+        self.client.post(reverse('accounting:debit_memo'), {
+            'memo_date': '2026-01-05', 'vendor_name': 'Vendor', 'vendor_address': 'Address',
+            'reference_invoice': 'INV-1', 'reason': 'Returned', 'amount': '10.00',
+        })
+        response = self.client.get(self.url, headers={'If-None-Match': etag})
+        self.assertContains(response, 'created successfully')
+        self.assertEqual(self.client.get(self.url, headers={'If-None-Match': etag}).status_code, 304)
+
+    def test_request_form_revalidates_when_a_request_is_created(self):
+        url = reverse('inventory:request_form')
+        etag = self.client.get(url)['ETag']
+        self.assertEqual(self.client.get(url, headers={'If-None-Match': etag}).status_code, 304)
+
+        MaterialRequest.objects.create(requested_by=self.other, project_name='Project', project_location='Site',
+                                       site_supervisor='Supervisor', purpose='Testing',
+                                       delivery_date_needed=datetime.date.today())
+        self.assertEqual(self.client.get(url, headers={'If-None-Match': etag}).status_code, 200)
+
+    def test_logout_clears_browser_cache(self):
+        self.assertEqual(self.client.get(reverse('session_status')).status_code, 204)
+        response = self.client.post(reverse('logout'))
+        self.assertEqual(response['Clear-Site-Data'], '"cache"')
+        self.assertEqual(self.client.get(reverse('session_status')).status_code, 401)
+        self.assertRedirects(self.client.get(self.url), f"{reverse('login')}?next={self.url}",
+                             fetch_redirect_response=False)
@@ -1,3 +1,66 @@
+import hmac
+
+from django.conf import settings
+from django.contrib import admin
+from django.contrib.admin.views.decorators import staff_member_required
+from django.http import FileResponse, Http404, HttpResponse
 from django.shortcuts import render
+from django.views.decorators.cache import never_cache
+
+
+@never_cache
+def metrics_view(request):
+    """Prometheus scrape endpoint: staff sessions, or `Authorization: Bearer <METRICS_TOKEN>`"""
+    from . import metrics
+    
+    if not metrics.enabled():
+        raise Http404
+    token = getattr(settings, 'METRICS_TOKEN', '')
+    authorization = request.headers.get('Authorization', '')
+    authorized = request.user.is_authenticated and request.user.is_staff
+    if token and authorization.startswith('Bearer '):
+        authorized = authorized or hmac.compare_digest(authorization[len('Bearer '):], token)
+    if not authorized:
+        return HttpResponse('Forbidden', status=403, content_type='text/plain')
+    return HttpResponse(metrics.exposition(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+
+@staff_member_required
+def profiles_view(request):
+    """Stored request profiles (common.profiling), newest first"""
+    from . import profiling
+
+    context = {
+        **admin.site.each_context(request),
+        'title': 'Request profiles',
+        'profiles': profiling.recent(),
+        'directory': profiling.directory(),
+        'slow_ms': getattr(settings, 'PROFILE_SLOW_REQUEST_MS', None),
+        'enabled': getattr(settings, 'PROFILING_ENABLED', False),
+    }
+    return render(request, 'admin/common/profiles.html', context)
+
+
+@staff_member_required
+def profile_view(request, profile_id):
+    """pstats report for one profile; ?download=1 returns the raw .prof file"""
+    from . import profiling
 
-# Create your views here.
+    try:
+        details = profiling.details(profile_id)
+        if request.GET.get('download'):
+            return FileResponse(open(profiling.raw_path(profile_id), 'rb'), as_attachment=True,
+                                filename=f'{profile_id}.prof')
+        sort = request.GET.get('sort', 'cumulative')
+        report = profiling.report(profile_id, sort)
+    except FileNotFoundError:
+        raise Http404('Profile not found; it may have been rotated out')
+    context = {
+        **admin.site.each_context(request),
+        'title': f"Profile of {details['method']} {details['path']}",
+        'profile': details,
+        'report': report,
+        'sort': sort,
+        'sort_keys': profiling.SORT_KEYS,
+    }
+    return render(request, 'admin/common/profile_detail.html', context)
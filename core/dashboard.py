@@ -0,0 +1,129 @@
+"""
+Project financials for the dashboard.
+
+Spent, payables and receivables are computed in the database with correlated
+subqueries grouped by project, and the whole summary is cached once for every
+user, since none of it depends on who is looking. Writes to projects,
+disbursements, check vouchers or users bump a version number (see core.signals)
+so the next dashboard hit recomputes instead of serving stale data.
+"""
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db.models import (
+    Case, CharField, Count, DecimalField, F, OuterRef, Q, Subquery, Sum, Value, When,
+)
+from django.db.models.functions import Coalesce, Greatest
+
+from accounting.models import CheckVoucher, Disbursement
+from .models import Project
+
+
+CACHE_TIMEOUT = 60  # seconds
+VERSION_KEY = 'dashboard:version'
+DASHBOARD_PROJECT_LIMIT = 10
+NEAR_BUDGET_RATIO = Decimal('0.9')
+
+MONEY = DecimalField(max_digits=16, decimal_places=2)
+ZERO = Value(Decimal('0'), output_field=MONEY)
+
+
+def _project_total(queryset):
+    """Correlated subquery summing `amount` of `queryset` rows for the outer project"""
+    return Coalesce(
+        Subquery(
+            queryset.filter(project=OuterRef('pk'))
+            .order_by()
+            .values('project')
+            .annotate(total=Sum('amount'))
+            .values('total'),
+            output_field=MONEY,
+        ),
+        ZERO,
+    )
+
+
+def projects_with_financials():
+    """Projects annotated with spent, payables, receivables and budget_status"""
+    return Project.objects.annotate(
+        spent=_project_total(Disbursement.objects.filter(status='completed')),
+        payables=_project_total(CheckVoucher.objects.filter(status__in=['pending', 'approved'])),
+    ).annotate(
+        receivables=Case(
+            When(status='completed', then=ZERO),
+            default=Greatest(F('budget') - F('spent'), ZERO),
+            output_field=MONEY,
+        ),
+        budget_status=Case(
+            When(spent__gt=F('budget'), then=Value('over_budget')),
+            When(spent__gte=F('budget') * NEAR_BUDGET_RATIO, then=Value('near_budget')),
+            default=Value('on_budget'),
+            output_field=CharField(),
+        ),
+    )
+
+
+def _project_row(project):
+    return {
+        'id': project.id,
+        'name': project.name,
+        'location': project.location,
+        'status': project.get_status_display(),
+        'progress': project.progress,
+        'budget': project.budget,
+        'spent': project.spent,
+        'receivables': project.receivables,
+        'payables': project.payables,
+        'start_date': project.start_date,
+        'target_completion': project.target_completion,
+        'budget_status': project.budget_status,
+    }
+
+
+def build_summary():
+    """Compute the dashboard figures: one aggregate query plus one query for the listed projects"""
+    projects = projects_with_financials()
+    totals = projects.aggregate(
+        total_budget=Coalesce(Sum('budget'), ZERO),
+        total_spent=Coalesce(Sum('spent'), ZERO),
+        total_receivables=Coalesce(Sum('receivables'), ZERO),
+        total_payables=Coalesce(Sum('payables'), ZERO),
+        total_projects=Count('id'),
+        in_progress=Count('id', filter=Q(status='in_progress')),
+        planning=Count('id', filter=Q(status='planning')),
+        completed=Count('id', filter=Q(status='completed')),
+    )
+    listed = projects.order_by(
+        Case(When(status='completed', then=Value(1)), default=Value(0)),
+        F('target_completion').asc(nulls_last=True),
+        'name',
+    )[:DASHBOARD_PROJECT_LIMIT]
+    return {
+        **totals,
+        'projects': [_project_row(project) for project in listed],
+        'total_users': User.objects.count(),
+    }
+
+
+def version():
+    """Current summary version; bumped by invalidate()"""
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        cache.add(VERSION_KEY, 1, None)
+        version = cache.get(VERSION_KEY, 1)
+    return version
+
+
+def invalidate():
+    """Mark every cached dashboard summary as stale"""
+    try:
+        cache.incr(VERSION_KEY)
+    except ValueError:
+        cache.add(VERSION_KEY, 1, None)
+
+
+def dashboard_summary():
+    """Cached dashboard figures, shared by all users"""
+    key = f'dashboard:summary:{version()}'
+    return cache.get_or_set(key, build_summary, CACHE_TIMEOUT)
@@ -0,0 +1,224 @@
+import io
+import json
+import platform
+import subprocess
+import time
+
+import django
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.test.runner import DiscoverRunner
+from django.test.utils import CaptureQueriesContext, override_settings, setup_test_environment, teardown_test_environment
+from django.urls import reverse
+from django.utils import timezone
+
+from inventory.models import MaterialRequest
+
+
+# Templates use {% static %}; the manifest storage would need collectstatic first
+BENCHMARK_STORAGES = {'staticfiles': {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'}}
+
+PERCENTILES = (50, 90, 99)
+
+
+def endpoints():
+    """(name, url) for every page and API measured, resolved against the current dataset"""
+    latest = list(MaterialRequest.objects.order_by('-created_at', '-id').values_list('id', flat=True)[:10])
+    request_id = latest[0] if latest else 0
+    return [
+        ('dashboard', reverse('dashboard')),
+        ('accounting_overview', reverse('accounting:overview')),
+        ('request_list', reverse('inventory:request_list')),
+        ('purchase', reverse('inventory:purchase')),
+        ('masterlist', reverse('inventory:masterlist')),
+        ('request_details_api', reverse('inventory:request_details_api', args=[request_id])),
+        ('batch_request_details_api',
+         reverse('inventory:batch_request_details_api') + '?ids=' + ','.join(map(str, latest))),
+    ]
+
+
+def percentile(samples, pct):
+    """Nearest-rank percentile of an already sorted list"""
+    index = max(0, min(len(samples) - 1, round(pct / 100 * len(samples) + 0.5) - 1))
+    return samples[index]
+
+
+def dataset_options(size):
+    """generate_load_data sizes for a dataset of `size` material requests"""
+    return {
+        'requests': size,
+        'liquidations': size // 5,
+        'debit_memos': size // 10,
+        'check_vouchers': size // 2,
+        'disbursements': size,
+        'inventory_items': size // 5,
+    }
+
+
+def git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              timeout=5).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+class Command(BaseCommand):
+    help = 'Measures latency, query counts and response size of the main pages and APIs at several data sizes'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', default='1000,10000',
+                            help='Comma-separated dataset sizes, counted in material requests')
+        parser.add_argument('--repeat', type=int, default=30, help='Timed requests per endpoint after warm-up')
+        parser.add_argument('--warmup', type=int, default=3, help='Untimed requests per endpoint before measuring')
+        parser.add_argument('--seed', type=int, default=0, help='Seed passed to generate_load_data')
+        parser.add_argument('--only', help='Comma-separated endpoint names to measure')
+        parser.add_argument('--output', help='Write the JSON report here instead of standard output')
+        parser.add_argument('--compare', help='Earlier JSON report to compare the results against')
+        parser.add_argument('--max-regression', type=float,
+                            help='With --compare, fail if any p50 grows by more than this percentage '
+                                 'or any query count grows')
+
+    def handle(self, *args, **options):
+        try:
+            sizes = [int(size) for size in options['sizes'].split(',') if size.strip()]
+        except ValueError:
+            raise CommandError('--sizes must be comma-separated integers')
+        if not sizes or min(sizes) < 1 or options['repeat'] < 1:
+            raise CommandError('--sizes and --repeat must be positive')
+        only = set(options['only'].split(',')) if options['only'] else None
+
+        baseline = None
+        if options['compare']:
+            try:
+                with open(options['compare']) as f:
+                    baseline = json.load(f)
+            except (OSError, ValueError) as e:
+                raise CommandError(f"Cannot read {options['compare']}: {e}")
+
+        results = []
+        # Each size gets its own throwaway test database, so the real data is never touched
+        setup_test_environment()
+        try:
+            with override_settings(STORAGES=BENCHMARK_STORAGES, DEBUG=False):
+                for size in sizes:
+                    results += self.run_size(size, options, only)
+        finally:
+            teardown_test_environment()
+
+        report = {
+            'meta': {
+                'revision': git_revision(),
+                'created': timezone.now().isoformat(),
+                'python': platform.python_version(),
+                'django': django.get_version(),
+                'database': connection.vendor,
+                'repeat': options['repeat'],
+                'warmup': options['warmup'],
+                'seed': options['seed'],
+            },
+            'results': results,
+        }
+        output = json.dumps(report, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                f.write(output + '\n')
+            self.print_table(results)
+        else:
+            self.stdout.write(output)
+
+        if baseline is not None:
+            regressions = self.compare(baseline, results, options['max_regression'])
+            if regressions:
+                raise CommandError(f'{regressions} endpoint(s) regressed beyond --max-regression')
+
+    def run_size(self, size, options, only):
+        runner = DiscoverRunner(verbosity=0, interactive=False)
+        old_config = runner.setup_databases()
+        try:
+            self.stderr.write(f'Generating dataset of {size} requests...')
+            call_command('generate_load_data', seed=options['seed'], stdout=io.StringIO(), **dataset_options(size))
+            user = User.objects.create_user(username='benchmark', is_staff=True)
+            client = Client()
+            client.force_login(user)
+
+            results = []
+            for name, url in endpoints():
+                if only and name not in only:
+                    continue
+                results.append({'endpoint': name, 'size': size, 'url': url,
+                                **self.measure(client, url, options['warmup'], options['repeat'])})
+            return results
+        finally:
+            cache.clear()
+            runner.teardown_databases(old_config)
+
+    def measure(self, client, url, warmup, repeat):
+        """Cold first hit (empty cache), then `repeat` warm hits after `warmup` untimed ones"""
+        cache.clear()
+        cold_ms, cold_queries, _, _ = self.fetch(client, url)
+        for _ in range(warmup):
+            self.fetch(client, url)
+
+        timings = []
+        queries = []
+        for _ in range(repeat):
+            elapsed, count, size, status = self.fetch(client, url)
+            timings.append(elapsed)
+            queries.append(count)
+        timings.sort()
+        return {
+            'status': status,
+            'bytes': size,
+            'queries': max(queries),
+            'cold_queries': cold_queries,
+            'cold_ms': round(cold_ms, 3),
+            'mean_ms': round(sum(timings) / len(timings), 3),
+            'min_ms': round(timings[0], 3),
+            'max_ms': round(timings[-1], 3),
+            **{f'p{pct}_ms': round(percentile(timings, pct), 3) for pct in PERCENTILES},
+        }
+
+    def fetch(self, client, url):
+        with CaptureQueriesContext(connection) as captured:
+            began = time.perf_counter()
+            response = client.get(url)
+            if response.streaming:
+                size = sum(len(chunk) for chunk in response.streaming_content)
+            else:
+                size = len(response.content)
+            elapsed = (time.perf_counter() - began) * 1000
+        return elapsed, len(captured), size, response.status_code
+
+    def print_table(self, results):
+        self.stdout.write(f"{'endpoint':<28}{'size':>8}{'p50 ms':>10}{'p90 ms':>10}{'p99 ms':>10}"
+                          f"{'cold ms':>10}{'queries':>9}{'bytes':>10}")
+        for row in results:
+            self.stdout.write(
+                f"{row['endpoint']:<28}{row['size']:>8}{row['p50_ms']:>10.2f}{row['p90_ms']:>10.2f}"
+                f"{row['p99_ms']:>10.2f}{row['cold_ms']:>10.2f}{row['queries']:>9}{row['bytes']:>10}"
+            )
+
+    def compare(self, baseline, results, max_regression):
+        """Print p50 and query-count changes against `baseline`; return how many exceed the limits"""
+        before = {(row['endpoint'], row['size']): row for row in baseline.get('results', [])}
+        regressions = 0
+        self.stderr.write(f"\nCompared with {baseline.get('meta', {}).get('revision') or 'baseline'}:")
+        for row in results:
+            old = before.get((row['endpoint'], row['size']))
+            if old is None:
+                continue
+            change = (row['p50_ms'] - old['p50_ms']) / old['p50_ms'] * 100 if old['p50_ms'] else 0.0
+            query_change = row['queries'] - old['queries']
+            regressed = max_regression is not None and (change > max_regression or query_change > 0)
+            regressions += regressed
+            self.stderr.write(
+                f"  {row['endpoint']:<28}{row['size']:>8}  p50 {old['p50_ms']:.2f} -> {row['p50_ms']:.2f} ms "
+                f"({change:+.1f}%), queries {old['queries']} -> {row['queries']}"
+                + ('  REGRESSED' if regressed else '')
+            )
+        return regressions
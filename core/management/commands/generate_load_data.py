@@ -0,0 +1,409 @@
+import datetime
+import random
+import time
+from collections import Counter
+from decimal import Decimal
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+from accounting import summary
+from accounting.models import CheckVoucher, DebitMemo, Disbursement, Liquidation, LiquidationItem
+from common.models import DocumentSequence
+from common.numbering import format_number
+from core import dashboard
+from core.models import Project, project_name_key
+from inventory import stock
+from inventory.models import InventoryItem, MaterialRequest, MaterialRequestItem
+
+
+USERNAME_PREFIX = 'loadtest'
+
+# Not today: the same arguments must give the same data whenever the command runs
+DEFAULT_END_DATE = datetime.date(2026, 9, 30)
+
+# (number prefix, option giving how many documents to create)
+DOCUMENT_PREFIXES = [('REQ', 'requests'), ('LIQ', 'liquidations'), ('DM', 'debit_memos'),
+                     ('CV', 'check_vouchers'), ('DISB', 'disbursements')]
+
+PLACES = ['Makati', 'Taguig', 'Pasig', 'Quezon City', 'Cebu', 'Davao', 'Iloilo', 'Baguio', 'Batangas', 'Laguna']
+PROJECT_KINDS = ['Tower', 'Residences', 'Office Park', 'Mall Expansion', 'Warehouse', 'Bridge', 'School', 'Hospital Wing']
+SUPERVISORS = ['Engr. Santos', 'Engr. Reyes', 'Engr. Cruz', 'Engr. Bautista', 'Engr. Garcia', 'Engr. Mendoza']
+SUPPLIERS = ['Holcim Philippines', 'SteelAsia', 'Wilcon Depot', 'CW Home Depot', 'Republic Cement',
+             'Pag-asa Steel', 'Boysen Paints', 'Davies Paints', 'Mariwasa Tiles', 'Phelps Dodge']
+PURPOSES = ['Foundation works', 'Column and beam casting', 'Slab pouring', 'Masonry works', 'Roofing',
+            'Electrical rough-in', 'Plumbing rough-in', 'Interior finishing', 'Site mobilization']
+EXPENSE_CATEGORIES = ['Transportation', 'Meals', 'Materials', 'Tools', 'Permits', 'Miscellaneous']
+DISBURSEMENT_CATEGORIES = ['Project Cost', 'Operating Expense', 'Payroll', 'Equipment Rental', 'Utilities']
+RECIPIENT_TYPES = ['Supplier', 'Contractor', 'Employee', 'Government Agency']
+ITEM_CATEGORIES = ['Construction Materials', 'Steel & Metals', 'Aggregates', 'Masonry', 'Wood & Lumber',
+                   'Plumbing', 'Electrical', 'Finishing Materials', 'Paints & Coatings']
+
+# (material, unit, typical unit price)
+MATERIALS = [
+    ('Portland Cement', 'bags', 285), ('Steel Rebar 10mm', 'pcs', 165), ('Steel Rebar 16mm', 'pcs', 420),
+    ('Gravel 3/4"', 'cubic_meters', 1250), ('Washed Sand', 'cubic_meters', 950), ('Hollow Blocks 4"', 'pcs', 13),
+    ('Plywood 1/4"', 'pcs', 485), ('Coco Lumber 2x4x10', 'pcs', 325), ('GI Pipe 1"', 'pcs', 425),
+    ('THHN Wire #12', 'rolls', 3200), ('Ceramic Tiles 60x60', 'boxes', 875), ('Interior Paint White', 'liters', 360),
+]
+
+# Relative activity per weekday, Monday first
+WEEKDAY_WEIGHTS = [1.0, 1.0, 1.0, 1.0, 0.9, 0.4, 0.1]
+
+
+def bulk_create_dated(model, objs, batch_size=None):
+    """
+    bulk_create `objs` keeping the created_at/updated_at values set on them, so
+    rows spread over the date range. The insert stamps auto_now/auto_now_add
+    fields with now(); the intended values are written back with bulk_update.
+    """
+    fields = [
+        field.name for field in model._meta.concrete_fields
+        if getattr(field, 'auto_now', False) or getattr(field, 'auto_now_add', False)
+    ]
+    stamps = [[getattr(obj, name) for name in fields] for obj in objs]
+    with transaction.atomic():
+        created = model.objects.bulk_create(objs, batch_size=batch_size)
+        for obj, values in zip(created, stamps):
+            for name, value in zip(fields, values):
+                setattr(obj, name, value)
+        model.objects.bulk_update(created, fields, batch_size=batch_size)
+    return created
+
+
+class Command(BaseCommand):
+    help = 'Bulk-inserts a deterministic synthetic dataset (requests, liquidations, vouchers, disbursements) for load testing'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--seed', type=int, default=0, help='Random seed; the same seed and sizes give the same data')
+        parser.add_argument('--days', type=int, default=730, help='Spread documents over this many days up to --end-date')
+        parser.add_argument('--end-date', type=datetime.date.fromisoformat, default=DEFAULT_END_DATE,
+                            help=f'Last day documents are dated, as YYYY-MM-DD (default {DEFAULT_END_DATE})')
+        parser.add_argument('--users', type=int, default=50)
+        parser.add_argument('--projects', type=int, default=25)
+        parser.add_argument('--requests', type=int, default=10_000, help='Material requests to create')
+        parser.add_argument('--items-per-request', type=int, default=5, help='Average line items per request')
+        parser.add_argument('--liquidations', type=int, default=2_000)
+        parser.add_argument('--debit-memos', type=int, default=1_000)
+        parser.add_argument('--check-vouchers', type=int, default=5_000)
+        parser.add_argument('--disbursements', type=int, default=10_000)
+        parser.add_argument('--inventory-items', type=int, default=2_000, help='Masterlist items to create')
+        parser.add_argument('--batch-size', type=int, default=5_000, help='Documents written per bulk insert')
+
+    def handle(self, *args, **options):
+        if options['days'] < 1 or options['batch_size'] < 1 or options['items_per_request'] < 1:
+            raise CommandError('--days, --batch-size and --items-per-request must be at least 1')
+        if options['users'] < 1 or options['projects'] < 1:
+            raise CommandError('--users and --projects must be at least 1')
+
+        self.rng = random.Random(options['seed'])
+        self.batch_size = options['batch_size']
+        self.items_per_request = options['items_per_request']
+        self.end = options['end_date']
+        self.start = self.end - datetime.timedelta(days=options['days'] - 1)
+        self.check_numbers_free(prefix for prefix, option in DOCUMENT_PREFIXES if options[option] > 0)
+
+        began = time.perf_counter()
+        self.users = self.ensure_users(options['users'])
+
+        self.projects = self.ensure_projects(options['projects'])
+        self.generate_inventory_items(options['inventory_items'])
+        self.generate('Material requests', MaterialRequest, 'REQ', options['requests'],
+                      self.build_request, self.add_request_items)
+        self.generate('Liquidations', Liquidation, 'LIQ', options['liquidations'],
+                      self.build_liquidation, self.add_liquidation_items)
+        self.generate('Debit memos', DebitMemo, 'DM', options['debit_memos'], self.build_debit_memo)
+        self.generate('Check vouchers', CheckVoucher, 'CV', options['check_vouchers'], self.build_check_voucher)
+        self.generate('Disbursements', Disbursement, 'DISB', options['disbursements'], self.build_disbursement)
+
+        # bulk_create skips the signals that keep these current
+        summary.rebuild()
+        dashboard.invalidate()
+        self.stdout.write(self.style.SUCCESS(f'Load data generated in {time.perf_counter() - began:.1f}s'))
+
+    # Reference data
+
+    def ensure_users(self, count):
+        usernames = [f'{USERNAME_PREFIX}{i:04d}' for i in range(count)]
+        password = make_password(None)
+        User.objects.bulk_create(
+            [User(username=name, first_name='Load', last_name=f'User {i}', password=password)
+             for i, name in enumerate(usernames)],
+            ignore_conflicts=True,
+        )
+        return list(User.objects.filter(username__in=usernames).order_by('username'))
+
+    def ensure_projects(self, count):
+        projects = []
+        combinations = [(place, kind) for kind in PROJECT_KINDS for place in PLACES]
+        for i in range(count):
+            place, kind = combinations[i % len(combinations)]
+            name = f'{place} {kind}'
+            if i >= len(combinations):
+                name = f'{name} Phase {i // len(combinations) + 1}'
+            start = self.start + datetime.timedelta(days=self.rng.randrange(0, 180))
+            created = self.timestamp(start - datetime.timedelta(days=30))
+            projects.append(Project(
+                name=name,
+                name_key=project_name_key(name),
+                location=f'{place}, Philippines',
+                status=self.rng.choices(['planning', 'in_progress', 'completed'], [2, 6, 2])[0],
+                progress=self.rng.randrange(0, 101),
+                budget=Decimal(self.rng.randrange(5_000, 200_000)) * 1000,
+                start_date=start,
+                target_completion=start + datetime.timedelta(days=self.rng.randrange(365, 1100)),
+                created_at=created,
+                updated_at=created,
+            ))
+        # Built even when they exist, so the random draws (and everything generated after) don't depend on it
+        existing = set(Project.objects.filter(name_key__in=[p.name_key for p in projects]).values_list('name_key', flat=True))
+        bulk_create_dated(Project, [project for project in projects if project.name_key not in existing])
+        return list(Project.objects.filter(name_key__in=[p.name_key for p in projects]).order_by('name'))
+
+    def generate_inventory_items(self, count):
+        began = time.perf_counter()
+        items = []
+        for i in range(count):
+            material, unit, price = MATERIALS[i % len(MATERIALS)]
+            created = self.timestamp(self.start)
+            items.append(InventoryItem(
+                item_code=f'LT-{i:06d}',
+                material_name=f'{material} #{i // len(MATERIALS) + 1}',
+                category=self.rng.choice(ITEM_CATEGORIES),
+                unit=unit,
+                quantity_on_hand=Decimal(self.rng.randrange(0, 5_000)),
+                unit_price=(Decimal(price) * Decimal(self.rng.uniform(0.8, 1.3))).quantize(Decimal('0.01')),
+                created_at=created,
+                updated_at=created,
+            ))
+        existing = set(InventoryItem.objects.filter(item_code__startswith='LT-').values_list('item_code', flat=True))
+        bulk_create_dated(InventoryItem, [item for item in items if item.item_code not in existing], self.batch_size)
+        # bulk_create bypasses the stock ledger; book the generated quantities to it
+        stock.record_opening_balances(InventoryItem.objects.filter(item_code__startswith='LT-'))
+        if count:
+            self.stdout.write(f'Inventory items: {count} in {time.perf_counter() - began:.1f}s')
+
+    # Generation
+
+    def daily_counts(self, total):
+        """Split `total` documents over the date range, busier on weekdays and growing over time"""
+        days = (self.end - self.start).days + 1
+        weights = [
+            WEEKDAY_WEIGHTS[(self.start + datetime.timedelta(days=d)).weekday()] * (1 + d / days)
+            for d in range(days)
+        ]
+        counts = Counter(self.rng.choices(range(days), weights, k=total))
+        return [(self.start + datetime.timedelta(days=d), counts[d]) for d in sorted(counts)]
+
+    def check_numbers_free(self, prefixes):
+        """
+        Documents are numbered from 001 each day rather than from the live counters, so the numbers don't depend on
+        what the database already holds; that only works on days no document of the same kind was numbered yet.
+        """
+        used = sorted(set(DocumentSequence.objects.filter(
+            prefix__in=list(prefixes), day__range=(self.start, self.end), last_value__gt=0,
+        ).values_list('prefix', flat=True)))
+        if used:
+            raise CommandError(
+                f"{', '.join(used)} numbers are already in use between {self.start} and {self.end}; "
+                f"choose an --end-date/--days range without documents, or start from an empty database"
+            )
+
+    def generate(self, label, model, prefix, total, build, add_children=None):
+        """Create `total` documents numbered PREFIX-YYYYMMDD-NNN for their own day, in bulk batches"""
+        if total <= 0:
+            return
+        began = time.perf_counter()
+        days = self.daily_counts(total)
+        # Claim the numbers before writing, so documents created later through the app continue after them
+        DocumentSequence.objects.bulk_create(
+            [DocumentSequence(prefix=prefix, day=day, last_value=count) for day, count in days],
+            batch_size=self.batch_size,
+        )
+        children = 0
+        batch = []
+        for day, count in days:
+            for value in range(1, count + 1):
+                batch.append(build(format_number(prefix, day, value), self.timestamp(day)))
+                if len(batch) >= self.batch_size:
+                    children += self.flush(model, batch, add_children)
+                    batch = []
+        if batch:
+            children += self.flush(model, batch, add_children)
+
+        elapsed = time.perf_counter() - began
+        detail = f' (+{children} line items)' if add_children else ''
+        self.stdout.write(f'{label}: {total}{detail} in {elapsed:.1f}s ({total / elapsed:,.0f} documents/sec)')
+
+    def flush(self, model, batch, add_children):
+        with transaction.atomic():
+            created = bulk_create_dated(model, batch, self.batch_size)
+            return add_children(created) if add_children else 0
+
+    def timestamp(self, day):
+        moment = datetime.datetime.combine(day, datetime.time(7)) + datetime.timedelta(seconds=self.rng.randrange(12 * 3600))
+        return timezone.make_aware(moment)
+
+    def amount(self, low, high):
+        return Decimal(self.rng.randrange(low * 100, high * 100)) / 100
+
+    def user(self):
+        return self.rng.choice(self.users)
+
+    # Documents
+
+    def build_request(self, number, created):
+        project = self.rng.choice(self.projects)
+        status = self.rng.choices(['pending', 'approved', 'rejected', 'ordered'], [15, 65, 10, 10])[0]
+        request = MaterialRequest(
+            request_number=number,
+            requested_by=self.user(),
+            request_date=created,
+            project=project,
+            project_name=project.name,
+            project_location=project.location,
+            site_supervisor=self.rng.choice(SUPERVISORS),
+            purpose=self.rng.choice(PURPOSES),
+            delivery_date_needed=created.date() + datetime.timedelta(days=self.rng.randrange(3, 30)),
+            priority=self.rng.choices(['low', 'medium', 'high', 'urgent'], [2, 5, 2, 1])[0],
+            status=status,
+            created_at=created,
+            updated_at=created,
+        )
+        if status in ('approved', 'ordered'):
+            request.approved_by = self.user()
+            request.approved_date = created + datetime.timedelta(hours=self.rng.randrange(1, 72))
+            request.updated_at = request.approved_date
+        if status == 'approved':
+            request.purchase_status = self.rng.choices(['pending', 'approved_for_purchase', 'rejected'], [3, 6, 1])[0]
+            if request.purchase_status != 'pending':
+                request.purchase_approved_by = self.user()
+                request.purchase_approved_date = request.approved_date + datetime.timedelta(hours=self.rng.randrange(1, 72))
+                request.updated_at = request.purchase_approved_date
+                if request.purchase_status == 'rejected':
+                    request.remarks = 'Over budget for this phase'
+        return request
+
+    def add_request_items(self, requests):
+        items = []
+        for request in requests:
+            for _ in range(self.rng.randint(1, 2 * self.items_per_request - 1)):
+                material, unit, price = self.rng.choice(MATERIALS)
+                items.append(MaterialRequestItem(
+                    request=request,
+                    material_name=material,
+                    quantity=Decimal(self.rng.randrange(1, 500)),
+                    unit=unit,
+                    estimated_unit_price=(Decimal(price) * Decimal(self.rng.uniform(0.85, 1.2))).quantize(Decimal('0.01')),
+                    supplier_preference=self.rng.choice(SUPPLIERS),
+                    created_at=request.created_at,
+                ))
+        bulk_create_dated(MaterialRequestItem, items, self.batch_size)
+        return len(items)
+
+    def build_liquidation(self, number, created):
+        project = self.rng.choice(self.projects)
+        status = self.rng.choices(['draft', 'submitted', 'approved', 'rejected'], [1, 3, 5, 1])[0]
+        advance_date = created.date() - datetime.timedelta(days=self.rng.randrange(1, 14))
+        # Lines are built up front so total_expenses is right in the INSERT; add_liquidation_items saves them
+        lines = [
+            LiquidationItem(
+                date=advance_date + datetime.timedelta(days=self.rng.randrange(0, 7)),
+                description=f'{category} for {project.name}',
+                category=category,
+                amount=self.amount(50, 5_000),
+                receipt_number=f'OR-{self.rng.randrange(10**6):06d}',
+                created_at=created,
+            )
+            for category in self.rng.choices(EXPENSE_CATEGORIES, k=self.rng.randint(1, 6))
+        ]
+        liquidation = Liquidation(
+            liquidation_number=number,
+            employee=self.user(),
+            project=project,
+            project_name=project.name,
+            cash_advance_amount=self.amount(1_000, 50_000),
+            cash_advance_date=advance_date,
+            total_expenses=sum(line.amount for line in lines),
+            liquidation_date=created.date(),
+            status=status,
+            created_at=created,
+            updated_at=created,
+        )
+        liquidation.pending_items = lines
+        if status == 'approved':
+            liquidation.approved_by = self.user()
+            liquidation.approved_date = created + datetime.timedelta(days=self.rng.randrange(1, 5))
+        return liquidation
+
+    def add_liquidation_items(self, liquidations):
+        items = []
+        for liquidation in liquidations:
+            for line in liquidation.pending_items:
+                line.liquidation = liquidation
+                items.append(line)
+        bulk_create_dated(LiquidationItem, items, self.batch_size)
+        return len(items)
+
+    def build_debit_memo(self, number, created):
+        status = self.rng.choices(['draft', 'posted', 'cancelled'], [1, 8, 1])[0]
+        return DebitMemo(
+            memo_number=number,
+            memo_date=created.date(),
+            vendor_name=self.rng.choice(SUPPLIERS),
+            reference_invoice=f'SI-{self.rng.randrange(10**6):06d}',
+            reason=self.rng.choice(['Short delivery', 'Damaged items', 'Price adjustment', 'Returned materials']),
+            amount=self.amount(500, 100_000),
+            status=status,
+            prepared_by=self.user(),
+            created_at=created,
+            updated_at=created,
+        )
+
+    def build_check_voucher(self, number, created):
+        project = self.rng.choice(self.projects)
+        status = self.rng.choices(['pending', 'approved', 'paid', 'cancelled'], [2, 2, 5, 1])[0]
+        voucher = CheckVoucher(
+            voucher_number=number,
+            voucher_date=created.date(),
+            payee_name=self.rng.choice(SUPPLIERS),
+            check_number=f'{self.rng.randrange(10**7):07d}',
+            check_date=created.date() + datetime.timedelta(days=self.rng.randrange(0, 30)),
+            bank_name=self.rng.choice(['BDO', 'BPI', 'Metrobank', 'Landbank']),
+            amount=self.amount(5_000, 2_000_000),
+            particulars=f'Payment for {self.rng.choice(PURPOSES).lower()}',
+            invoice_number=f'SI-{self.rng.randrange(10**6):06d}',
+            project=project,
+            project_name=project.name,
+            status=status,
+            prepared_by=self.user(),
+            created_at=created,
+            updated_at=created,
+        )
+        if status in ('approved', 'paid'):
+            voucher.approved_by = self.user()
+            voucher.approved_date = created + datetime.timedelta(hours=self.rng.randrange(1, 96))
+        return voucher
+
+    def build_disbursement(self, number, created):
+        project = self.rng.choice(self.projects)
+        return Disbursement(
+            disbursement_number=number,
+            disbursement_date=created.date(),
+            recipient_name=self.rng.choice(SUPPLIERS),
+            recipient_type=self.rng.choice(RECIPIENT_TYPES),
+            amount=self.amount(1_000, 1_000_000),
+            payment_method=self.rng.choices(['cash', 'check', 'bank_transfer', 'online'], [1, 4, 4, 1])[0],
+            reference_number=f'TX-{self.rng.randrange(10**8):08d}',
+            purpose=self.rng.choice(PURPOSES),
+            category=self.rng.choice(DISBURSEMENT_CATEGORIES),
+            project=project,
+            project_name=project.name,
+            status=self.rng.choices(['pending', 'completed', 'cancelled'], [1, 8, 1])[0],
+            processed_by=self.user(),
+            created_at=created,
+            updated_at=created,
+        )
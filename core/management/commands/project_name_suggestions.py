@@ -0,0 +1,53 @@
+import difflib
+from collections import defaultdict
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core import projects
+from core.models import Project
+
+
+class Command(BaseCommand):
+    help = ('Lists projects whose names look like misspellings of each other; '
+            'with --merge, folds one named project into another')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--cutoff', type=float, default=0.92,
+                            help='Similarity (0-1) of normalised names reported as possible duplicates')
+        parser.add_argument('--merge', nargs=2, metavar=('KEEP', 'DUPLICATE'),
+                            help="Move DUPLICATE's documents to KEEP, fill KEEP's unset fields from it and delete it")
+
+    def handle(self, *args, **options):
+        if options['merge']:
+            self.merge(*options['merge'])
+            return
+
+        cutoff = options['cutoff']
+        if not 0 < cutoff <= 1:
+            raise CommandError('--cutoff must be between 0 and 1')
+
+        # Names like "Phase 1"/"Phase 2" score high too: these are for a person to check, never merged automatically
+        rows = list(Project.objects.order_by('name_key').values_list('name_key', 'name'))
+        names = dict(rows)
+        buckets = defaultdict(list)
+        for key, _ in rows:
+            buckets[key[:1]].append(key)
+
+        pairs = 0
+        for key, name in rows:
+            candidates = [other for other in buckets[key[:1]] if other > key]
+            for match in difflib.get_close_matches(key, candidates, n=5, cutoff=cutoff):
+                self.stdout.write(f'{name}  ~  {names[match]}')
+                pairs += 1
+        self.stdout.write(self.style.SUCCESS(f'{pairs} possible duplicate pairs among {len(rows)} projects'))
+
+    def merge(self, keep, duplicate):
+        keeper, other = Project.objects.for_name(keep), Project.objects.for_name(duplicate)
+        for name, project in ((keep, keeper), (duplicate, other)):
+            if project is None:
+                raise CommandError(f'No project named {name!r}')
+        try:
+            moved = projects.merge(keeper, other)
+        except ValueError as e:
+            raise CommandError(str(e))
+        self.stdout.write(self.style.SUCCESS(f'Merged {other.name} into {keeper.name}: {moved} documents moved'))
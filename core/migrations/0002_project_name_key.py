@@ -0,0 +1,18 @@
+# Generated by Django 5.2.7 on 2026-10-18 06:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='project',
+            name='name_key',
+            field=models.CharField(editable=False, max_length=200, null=True),
+        ),
+    ]
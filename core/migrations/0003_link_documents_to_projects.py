@@ -0,0 +1,138 @@
+# Generated by Django 5.2.7 on 2026-10-18 06:04
+
+import re
+from collections import Counter, defaultdict
+
+from django.db import migrations
+from django.db.models import Count
+
+
+DOCUMENT_MODELS = [
+    ('inventory', 'MaterialRequest'),
+    ('accounting', 'Liquidation'),
+    ('accounting', 'CheckVoucher'),
+    ('accounting', 'Disbursement'),
+]
+
+
+# Frozen copy of core.projects.MERGE_FIELDS
+MERGE_FIELDS = {
+    'location': '',
+    'status': 'planning',
+    'progress': 0,
+    'budget': 0,
+    'start_date': None,
+    'target_completion': None,
+}
+
+
+def project_name_key(name):
+    # Frozen copy of core.models.project_name_key
+    return ' '.join(re.sub(r'[\W_]+', ' ', (name or '').casefold()).split())
+
+
+def fold_duplicates(Project, models):
+    """
+    Give every project its key and fold projects whose names only differ in case
+    or spacing into the oldest one: fields it leaves unset take the duplicate's
+    values. Refuses, changing nothing, when duplicates set a field differently.
+    """
+    groups = {}
+    for project in Project.objects.order_by('id'):
+        groups.setdefault(project_name_key(project.name), []).append(project)
+
+    conflicts = []
+    for keeper, *duplicates in groups.values():
+        for duplicate in duplicates:
+            for name, unset in MERGE_FIELDS.items():
+                kept, other = getattr(keeper, name), getattr(duplicate, name)
+                if other == unset or other == kept:
+                    continue
+                if kept == unset:
+                    setattr(keeper, name, other)
+                else:
+                    conflicts.append(f'{keeper.name!r} (id {keeper.pk}) and {duplicate.name!r} (id {duplicate.pk}): {name}')
+    if conflicts:
+        raise RuntimeError(
+            'Projects whose names differ only in case or spacing disagree; make them agree or rename one, '
+            'then migrate again:\n  ' + '\n  '.join(conflicts)
+        )
+
+    projects_by_key = {}
+    for key, (keeper, *duplicates) in groups.items():
+        for duplicate in duplicates:
+            for model in models:
+                model.objects.filter(project=duplicate).update(project=keeper)
+            duplicate.delete()
+        keeper.name_key = key
+        keeper.save(update_fields=['name_key', *MERGE_FIELDS])
+        projects_by_key[key] = keeper
+    return projects_by_key
+
+
+def link_documents(apps, schema_editor):
+    """
+    Point documents at the project with the same normalised name, creating
+    projects for names no project has. Only exact key matches are linked and
+    project_name is left as typed; near-misses are listed by
+    `manage.py project_name_suggestions` for someone to review and merge
+    with its --merge option.
+    """
+    Project = apps.get_model('core', 'Project')
+    models = [apps.get_model(app_label, model_name) for app_label, model_name in DOCUMENT_MODELS]
+
+    projects_by_key = fold_duplicates(Project, models)
+
+    # Distinct free-text names and how many documents use each spelling
+    usage = Counter()
+    for model in models:
+        rows = model.objects.exclude(project_name='').order_by().values('project_name').annotate(n=Count('id'))
+        for row in rows:
+            usage[row['project_name']] += row['n']
+
+    spellings = defaultdict(Counter)
+    for name, n in usage.items():
+        key = project_name_key(name)
+        if key:
+            spellings[key][' '.join(name.split())] += n
+
+    # A new project per key no project has, named after its most used spelling
+    new_projects = [
+        Project(name=spellings[key].most_common(1)[0][0], name_key=key)
+        for key in set(spellings) - set(projects_by_key)
+    ]
+    for project in Project.objects.bulk_create(new_projects):
+        projects_by_key[project.name_key] = project
+    if new_projects and new_projects[0].pk is None:
+        # Backends that don't return ids from bulk_create
+        projects_by_key.update(
+            (project.name_key, project)
+            for project in Project.objects.filter(name_key__in=[p.name_key for p in new_projects])
+        )
+
+    # One UPDATE per distinct spelling per document table
+    for model in models:
+        names = model.objects.exclude(project_name='').order_by().values_list('project_name', flat=True).distinct()
+        for name in list(names):
+            key = project_name_key(name)
+            if key:
+                model.objects.filter(project_name=name).update(project=projects_by_key[key])
+
+
+def unlink_documents(apps, schema_editor):
+    # project_name was never changed, so dropping the links restores the documents
+    for app_label, model_name in DOCUMENT_MODELS:
+        apps.get_model(app_label, model_name).objects.update(project=None)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0002_project_name_key'),
+        ('inventory', '0007_materialrequest_project'),
+        ('accounting', '0005_project_links'),
+    ]
+
+    operations = [
+        migrations.RunPython(link_documents, unlink_documents),
+    ]
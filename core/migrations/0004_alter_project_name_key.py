@@ -0,0 +1,18 @@
+# Generated by Django 5.2.7 on 2026-10-18 06:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0003_link_documents_to_projects'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='project',
+            name='name_key',
+            field=models.CharField(editable=False, max_length=200, unique=True),
+        ),
+    ]
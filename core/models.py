@@ -1,3 +1,68 @@
+import re
+
 from django.db import models
 
-# Create your models here.
+
+def project_name_key(name):
+    """Normalised form of a project name: case, spacing and punctuation differences collapse"""
+    return ' '.join(re.sub(r'[\W_]+', ' ', (name or '').casefold()).split())
+
+
+class ProjectManager(models.Manager):
+
+    def for_name(self, name):
+        """The project matching `name` by normalised key; None for blank names and names no project has"""
+        key = project_name_key(name)
+        if not key:
+            return None
+        return self.filter(name_key=key).first()
+
+
+def link_project(document):
+    """
+    Point a document's project FK at the project named in its project_name field.
+    Projects are never created here and project_name is kept as typed: a name no
+    project matches leaves the document unlinked until someone adds the project.
+    """
+    if not project_name_key(document.project_name):
+        if document.project_id is not None:
+            document.project_name = document.project.name
+        return
+    document.project = Project.objects.for_name(document.project_name)
+
+
+class Project(models.Model):
+    """Construction project that material requests and accounting documents are charged to"""
+
+    STATUS_CHOICES = [
+        ('planning', 'Planning'),
+        ('in_progress', 'In Progress'),
+        ('completed', 'Completed'),
+    ]
+
+    name = models.CharField(max_length=200, unique=True)
+    name_key = models.CharField(max_length=200, unique=True, editable=False)
+    location = models.CharField(max_length=200, blank=True)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='planning')
+    progress = models.PositiveSmallIntegerField(default=0, help_text="Percent complete")
+    budget = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    start_date = models.DateField(null=True, blank=True)
+    target_completion = models.DateField(null=True, blank=True)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    objects = ProjectManager()
+
+    class Meta:
+        ordering = ['name']
+        indexes = [
+            models.Index(fields=['status', 'target_completion'], name='project_status_target_idx'),
+        ]
+
+    def __str__(self):
+        return self.name
+
+    def save(self, *args, **kwargs):
+        self.name_key = project_name_key(self.name)
+        super().save(*args, **kwargs)
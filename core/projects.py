@@ -0,0 +1,67 @@
+"""
+Merging duplicate projects, e.g. two spellings of the same site.
+
+merge() folds one project into another: the fields the kept project leaves
+at their defaults take the duplicate's values, the duplicate's documents are
+re-pointed and renamed to the kept project, and the duplicate is deleted.
+Fields both projects set to different values are a conflict for a person to
+resolve first; nothing is changed then. Used by `manage.py
+project_name_suggestions --merge`.
+"""
+from django.db import transaction
+
+from .models import Project
+
+
+# Fields a duplicate may fill in on the kept project, with the values that count as unset
+MERGE_FIELDS = {
+    'location': '',
+    'status': 'planning',
+    'progress': 0,
+    'budget': 0,
+    'start_date': None,
+    'target_completion': None,
+}
+
+# Reverse accessors of the documents charged to a project
+DOCUMENT_RELATIONS = ('material_requests', 'liquidations', 'check_vouchers', 'disbursements')
+
+
+class MergeConflict(ValueError):
+
+    def __init__(self, keeper, duplicate, fields):
+        super().__init__(f"{keeper.name} and {duplicate.name} have different {', '.join(fields)}")
+        self.fields = fields
+
+
+def merged_fields(keeper, duplicate):
+    """{field: value} the keeper takes from the duplicate; raises MergeConflict when both set a field differently"""
+    values, conflicts = {}, []
+    for name, unset in MERGE_FIELDS.items():
+        kept, other = getattr(keeper, name), getattr(duplicate, name)
+        if other == unset or other == kept:
+            continue
+        if kept == unset:
+            values[name] = other
+        else:
+            conflicts.append(name)
+    if conflicts:
+        raise MergeConflict(keeper, duplicate, conflicts)
+    return values
+
+
+def merge(keeper, duplicate):
+    """Fold `duplicate` into `keeper`; returns the number of documents moved"""
+    if keeper.pk == duplicate.pk:
+        raise ValueError('A project cannot be merged into itself')
+    values = merged_fields(keeper, duplicate)
+    moved = 0
+    with transaction.atomic():
+        for relation in DOCUMENT_RELATIONS:
+            moved += getattr(duplicate, relation).update(project=keeper, project_name=keeper.name)
+        duplicate.delete()
+        if values:
+            for name, value in values.items():
+                setattr(keeper, name, value)
+            keeper.save(update_fields=[*values, 'updated_at'])
+    return moved
@@ -0,0 +1,23 @@
+from django.contrib.auth.models import User
+from django.db.models.signals import post_delete, post_save
+
+from accounting.models import CheckVoucher, Disbursement
+from . import dashboard
+from .models import Project
+
+
+# Models whose rows feed the dashboard summary
+DASHBOARD_MODELS = (Project, Disbursement, CheckVoucher, User)
+
+
+def invalidate_dashboard(sender, update_fields=None, **kwargs):
+    # Logins only touch last_login, which the dashboard doesn't show
+    if update_fields is not None and set(update_fields) <= {'last_login'}:
+        return
+    dashboard.invalidate()
+
+
+def connect():
+    for model in DASHBOARD_MODELS:
+        post_save.connect(invalidate_dashboard, sender=model, dispatch_uid=f'dashboard_{model.__name__}_save')
+        post_delete.connect(invalidate_dashboard, sender=model, dispatch_uid=f'dashboard_{model.__name__}_delete')
@@ -1,3 +1,141 @@
+import datetime
+import importlib
+import io
+
+from django.apps import apps
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
 from django.test import TestCase
 
-# Create your tests here.
+from inventory.models import MaterialRequest
+
+from . import dashboard
+from .models import Project
+
+
+link_migration = importlib.import_module('core.migrations.0003_link_documents_to_projects')
+
+
+class ProjectLinkingTests(TestCase):
+    """Documents are linked to projects by exact normalised name only; near-misses are merged only on request"""
+
+    NAMES = ['Residential Complex Phase 1', 'Residential Complex Phase 2', 'residential  complex phase 2']
+
+    @classmethod
+    def setUpTestData(cls):
+        user = User.objects.create_user(username='requester')
+        for name in cls.NAMES:
+            MaterialRequest.objects.create(requested_by=user, project_name=name, project_location='Site',
+                                           site_supervisor='Supervisor', purpose='Testing',
+                                           delivery_date_needed=datetime.date.today())
+        MaterialRequest.objects.update(project=None)
+        Project.objects.all().delete()
+        # As typed before projects existed
+        for request, name in zip(MaterialRequest.objects.order_by('id'), cls.NAMES):
+            MaterialRequest.objects.filter(pk=request.pk).update(project_name=name)
+
+    def test_migration_links_exact_keys_and_keeps_names(self):
+        link_migration.link_documents(apps, None)
+        rows = list(MaterialRequest.objects.order_by('id').values_list('project_name', 'project__name_key'))
+        self.assertEqual(rows, [
+            ('Residential Complex Phase 1', 'residential complex phase 1'),
+            ('Residential Complex Phase 2', 'residential complex phase 2'),
+            ('residential  complex phase 2', 'residential complex phase 2'),
+        ])
+
+        link_migration.unlink_documents(apps, None)
+        self.assertFalse(MaterialRequest.objects.filter(project__isnull=False).exists())
+
+    def test_saving_links_without_creating_projects(self):
+        project = Project.objects.create(name='Residential Complex Phase 1')
+        fields = dict(requested_by=User.objects.get(username='requester'), project_location='Site',
+                      site_supervisor='Supervisor', purpose='Testing', delivery_date_needed=datetime.date.today())
+        typo = MaterialRequest.objects.create(project_name='Residental Complex Phase 1', **fields)
+        variant = MaterialRequest.objects.create(project_name='residential complex  PHASE 1', **fields)
+
+        self.assertEqual(Project.objects.count(), 1)
+        self.assertIsNone(typo.project)
+        self.assertEqual((variant.project, variant.project_name), (project, 'residential complex  PHASE 1'))
+
+    def test_suggestions_only_report(self):
+        link_migration.link_documents(apps, None)
+        out = io.StringIO()
+        call_command('project_name_suggestions', stdout=out)
+        self.assertIn('1 possible duplicate pairs among 2 projects', out.getvalue())
+        self.assertEqual(Project.objects.count(), 2)
+
+    def duplicate_projects(self, **duplicate_fields):
+        """Projects whose names differ only in case and spacing, as they could exist before name_key was unique"""
+        keeper, duplicate = Project.objects.bulk_create([
+            Project(name='Residential Complex Phase 1', name_key='old-1', budget=0),
+            Project(name='residential  complex PHASE 1', name_key='old-2', **duplicate_fields),
+        ])
+        MaterialRequest.objects.filter(project_name='Residential Complex Phase 1').update(project=duplicate)
+        return Project.objects.get(pk=keeper.pk), Project.objects.get(pk=duplicate.pk)
+
+    def test_migration_fills_kept_project_from_case_variant(self):
+        keeper, duplicate = self.duplicate_projects(budget=5_000_000, location='Pasig')
+        link_migration.link_documents(apps, None)
+        keeper.refresh_from_db()
+        self.assertFalse(Project.objects.filter(pk=duplicate.pk).exists())
+        self.assertEqual((keeper.budget, keeper.location), (5_000_000, 'Pasig'))
+        self.assertEqual(MaterialRequest.objects.get(project_name='Residential Complex Phase 1').project, keeper)
+
+    def test_migration_refuses_conflicting_case_variants(self):
+        keeper, duplicate = self.duplicate_projects(budget=5_000_000)
+        Project.objects.filter(pk=keeper.pk).update(budget=1_000_000)
+        with self.assertRaisesMessage(RuntimeError, f'(id {duplicate.pk}): budget'):
+            link_migration.link_documents(apps, None)
+        self.assertEqual(Project.objects.count(), 2)
+        self.assertEqual(MaterialRequest.objects.get(project_name='Residential Complex Phase 1').project, duplicate)
+
+    def test_merge_command_moves_documents_and_fields(self):
+        link_migration.link_documents(apps, None)
+        Project.objects.filter(name_key='residential complex phase 1').update(location='Pasig')
+        out = io.StringIO()
+        call_command('project_name_suggestions', '--merge', 'Residential Complex Phase 2',
+                     'residential complex phase 1', stdout=out)
+        self.assertIn('1 documents moved', out.getvalue())
+        [project] = Project.objects.all()
+        self.assertEqual((project.name, project.location), ('Residential Complex Phase 2', 'Pasig'))
+        self.assertEqual(
+            sorted(MaterialRequest.objects.values_list('project_name', flat=True)),
+            ['Residential Complex Phase 2', 'Residential Complex Phase 2', 'residential  complex phase 2'],
+        )
+        self.assertFalse(MaterialRequest.objects.filter(project__isnull=True).exists())
+
+    def test_merge_command_refuses_conflicts(self):
+        link_migration.link_documents(apps, None)
+        Project.objects.filter(name_key='residential complex phase 1').update(budget=10)
+        Project.objects.filter(name_key='residential complex phase 2').update(budget=20)
+        with self.assertRaisesMessage(CommandError, 'have different budget'):
+            call_command('project_name_suggestions', '--merge', 'Residential Complex Phase 2',
+                         'Residential Complex Phase 1', stdout=io.StringIO())
+        self.assertEqual(Project.objects.count(), 2)
+
+
+class DashboardSummaryTests(TestCase):
+    """One cached summary serves every user"""
+
+    def setUp(self):
+        cache.clear()
+
+    def test_summary_is_shared_between_users(self):
+        summary = dashboard.dashboard_summary()
+        with self.assertNumQueries(0):
+            self.assertEqual(dashboard.dashboard_summary(), summary)
+
+
+class GenerateLoadDataTests(TestCase):
+    """Generated documents keep their historical timestamps without touching the model fields"""
+
+    def test_documents_are_dated_within_the_range(self):
+        call_command('generate_load_data', '--days', '10', '--end-date', '2026-03-31', '--users', '2',
+                     '--projects', '2', '--requests', '20', '--liquidations', '2', '--debit-memos', '2',
+                     '--check-vouchers', '2', '--disbursements', '2', '--inventory-items', '2', stdout=io.StringIO())
+        dates = {created_at.date() for created_at in MaterialRequest.objects.values_list('created_at', flat=True)}
+        self.assertTrue(dates)
+        self.assertTrue(all(datetime.date(2026, 3, 22) <= day <= datetime.date(2026, 3, 31) for day in dates))
+        self.assertTrue(MaterialRequest._meta.get_field('created_at').auto_now_add)
+        self.assertTrue(MaterialRequest._meta.get_field('updated_at').auto_now)
@@ -1,10 +1,10 @@
 from django.urls import path
-from django.contrib.auth.views import LogoutView
 from . import views
 
 urlpatterns = [
     path('login/', views.CustomLoginView.as_view(), name='login'),
-    path('logout/', LogoutView.as_view(), name='logout'),
+    path('logout/', views.CustomLogoutView.as_view(), name='logout'),
+    path('session/', views.session_status_view, name='session_status'),
     path('dashboard/', views.dashboard_view, name='dashboard'),
     path('', views.dashboard_view, name='home'),  # Redirect root to dashboard
 ]
\ No newline at end of file
@@ -49,12 +49,15 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'common.middleware.MetricsMiddleware',  # no-op unless METRICS_ENABLED
+    'common.middleware.RequestTimingMiddleware',  # no-op unless REQUEST_TIMING_SAMPLE_RATE > 0
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'common.middleware.ProfilingMiddleware',  # no-op unless PROFILING_ENABLED
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -155,3 +158,40 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 LOGIN_URL = 'login'
 LOGIN_REDIRECT_URL = 'dashboard'
 LOGOUT_REDIRECT_URL = 'login'
+
+# Line-item forms (liquidations, deliveries) post several fields per row;
+# allow a few hundred rows per submission
+DATA_UPLOAD_MAX_NUMBER_FIELDS = 10000
+
+# Request instrumentation (common.middleware.RequestTimingMiddleware): fraction of
+# requests to time, 0 disables it. Statements repeated this many times in one
+# request are logged as likely N+1 queries.
+REQUEST_TIMING_SAMPLE_RATE = float(os.environ.get('REQUEST_TIMING_SAMPLE_RATE', '0'))
+REQUEST_TIMING_DUPLICATE_THRESHOLD = int(os.environ.get('REQUEST_TIMING_DUPLICATE_THRESHOLD', '3'))
+
+# Prometheus metrics at /metrics (common.metrics). Under gunicorn set METRICS_DIR to
+# a directory cleared on startup so every worker's numbers are merged; scrapers
+# authenticate with `Authorization: Bearer $METRICS_TOKEN`.
+METRICS_ENABLED = os.environ.get('METRICS_ENABLED', 'False') == 'True'
+METRICS_DIR = os.environ.get('METRICS_DIR') or None
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN', '')
+
+# cProfile captures (common.middleware.ProfilingMiddleware), listed at /admin/profiles/.
+# Staff can profile any request with ?_profile=1; with PROFILE_SLOW_REQUEST_MS set, the
+# next request to a view that just took that long is profiled too. Only the newest
+# PROFILE_MAX_FILES captures are kept in PROFILE_DIR (default: a temp directory).
+PROFILING_ENABLED = os.environ.get('PROFILING_ENABLED', 'False') == 'True'
+PROFILE_SLOW_REQUEST_MS = int(os.environ.get('PROFILE_SLOW_REQUEST_MS', '0')) or None
+PROFILE_DIR = os.environ.get('PROFILE_DIR') or None
+PROFILE_MAX_FILES = int(os.environ.get('PROFILE_MAX_FILES', '50'))
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'common.middleware': {'handlers': ['console'], 'level': 'INFO', 'propagate': False},
+    },
+}
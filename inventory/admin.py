@@ -1,5 +1,66 @@
 from django.contrib import admin
-from .models import MaterialRequest, MaterialRequestItem, InventoryItem
+from .models import (
+    DeliveryNote, DeliveryNoteLine, MaterialRequest, MaterialRequestItem, InventoryItem, StockMovement, Warehouse,
+)
 
-# Register your models here.
-admin.site.register(InventoryItem)
+
+@admin.register(InventoryItem)
+class InventoryItemAdmin(admin.ModelAdmin):
+    list_display = ('item_code', 'material_name', 'category', 'quantity_on_hand', 'unit_price', 'costing_method')
+    list_filter = ('costing_method',)
+    search_fields = ('item_code', 'material_name')
+    # Kept by the stock ledger (inventory.stock); change stock by posting movements
+    readonly_fields = ('quantity_on_hand',)
+
+
+@admin.register(Warehouse)
+class WarehouseAdmin(admin.ModelAdmin):
+    list_display = ('code', 'name', 'is_active')
+
+
+@admin.register(StockMovement)
+class StockMovementAdmin(admin.ModelAdmin):
+    """The ledger is append-only: browse it here, post through inventory.stock"""
+    list_display = ('id', 'created_at', 'item', 'warehouse', 'movement_type', 'quantity', 'batch', 'reference')
+    list_filter = ('movement_type', 'warehouse')
+    list_select_related = ('item', 'warehouse')
+    search_fields = ('reference', 'item__item_code')
+    show_full_result_count = False
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+
+class DeliveryNoteLineInline(admin.TabularInline):
+    model = DeliveryNoteLine
+    extra = 0
+    can_delete = False
+    readonly_fields = ('item', 'quantity', 'unit', 'batch')
+
+    def has_add_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(DeliveryNote)
+class DeliveryNoteAdmin(admin.ModelAdmin):
+    """Posted deliveries moved stock; browse them here, post from the Delivery page"""
+    list_display = ('delivery_number', 'delivery_date', 'source_warehouse', 'destination_warehouse', 'created_by')
+    list_filter = ('source_warehouse', 'destination_warehouse')
+    list_select_related = ('source_warehouse', 'destination_warehouse', 'created_by')
+    search_fields = ('delivery_number', 'driver_name', 'vehicle_number')
+    inlines = (DeliveryNoteLineInline,)
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
@@ -0,0 +1,157 @@
+"""
+Cost layers: what the stock on hand actually cost, per item, FIFO or moving average.
+
+Each movement into stock other than a transfer (a receipt, a count adjusted
+up, an opening balance) carries its unit_cost and adds a layer. Each movement
+out of stock other than a transfer consumes layers: oldest first for FIFO
+items, or from the single layer of an item costed at moving average (see
+InventoryItem.costing_method). Layers belong to the item, not to a warehouse,
+so transfers don't touch them. Stock issued beyond the layers (on-hand below
+zero) is made up by the next receipts before they add a layer.
+
+stock.post() calls apply() for the items it has locked. A posting reads the
+open layers of the items it takes stock from (or averages) in one query and
+writes them back with one bulk UPDATE, INSERT and DELETE. Consumed layers are
+deleted, so the table only holds stock still on hand.
+
+month_end() values the stock as of a past date by replaying the ledger. It
+streams movements in (item, id) order from a server-side cursor and rebuilds
+each item's layers in turn, so memory holds one item's layers, never the
+ledger.
+"""
+import itertools
+from collections import deque
+from decimal import Decimal
+
+from .models import CostLayer, InventoryItem, StockMovement
+
+
+ZERO = Decimal('0')
+CENT = Decimal('0.01')
+COST_PLACES = Decimal('0.0001')
+
+WRITE_BATCH_SIZE = 1000
+REPLAY_CHUNK_SIZE = 5000
+
+TRANSFER_TYPES = (StockMovement.TRANSFER_IN, StockMovement.TRANSFER_OUT)
+
+
+class Layers:
+    """An item's open cost layers, oldest first, and the quantity issued beyond them"""
+
+    def __init__(self, average, layers=(), deficit=ZERO):
+        self.average = average
+        # [pk (None until saved), remaining, unit_cost, received_at]
+        self.layers = deque(list(layer) for layer in layers)
+        self.deficit = deficit
+        self.removed = []
+
+    def receive(self, quantity, unit_cost, received_at):
+        covered = min(quantity, self.deficit)
+        self.deficit -= covered
+        quantity -= covered
+        if not quantity:
+            return
+        if self.average and self.layers:
+            # Fold everything into the oldest layer at the new average cost
+            remaining = sum(layer[1] for layer in self.layers) + quantity
+            cost = ((self.value() + quantity * unit_cost) / remaining).quantize(COST_PLACES)
+            first = self.layers.popleft()
+            self.removed += [layer[0] for layer in self.layers if layer[0]]
+            self.layers = deque([[first[0], remaining, cost, first[3]]])
+        else:
+            self.layers.append([None, quantity, unit_cost, received_at])
+
+    def consume(self, quantity):
+        while quantity and self.layers:
+            layer = self.layers[0]
+            taken = min(quantity, layer[1])
+            layer[1] -= taken
+            quantity -= taken
+            if not layer[1]:
+                self.layers.popleft()
+                if layer[0]:
+                    self.removed.append(layer[0])
+        self.deficit += quantity
+
+    def value(self):
+        return sum((remaining * unit_cost for _, remaining, unit_cost, _ in self.layers), ZERO)
+
+
+def _save(ledgers, stored):
+    original = {pk: (remaining, unit_cost) for layers in stored.values() for pk, remaining, unit_cost, _ in layers}
+    created, changed, removed = [], [], []
+    for item_id, layers in ledgers.items():
+        removed += layers.removed
+        for pk, remaining, unit_cost, received_at in layers.layers:
+            if pk is None:
+                created.append(CostLayer(item_id=item_id, remaining=remaining, unit_cost=unit_cost,
+                                         received_at=received_at))
+            elif original[pk] != (remaining, unit_cost):
+                changed.append(CostLayer(pk=pk, item_id=item_id, remaining=remaining, unit_cost=unit_cost,
+                                         received_at=received_at))
+    for start in range(0, len(removed), WRITE_BATCH_SIZE):
+        CostLayer.objects.filter(pk__in=removed[start:start + WRITE_BATCH_SIZE]).delete()
+    CostLayer.objects.bulk_update(changed, ['remaining', 'unit_cost'], batch_size=WRITE_BATCH_SIZE)
+    CostLayer.objects.bulk_create(created, batch_size=WRITE_BATCH_SIZE)
+
+
+def apply(movements, items):
+    """
+    Cost unsaved movements and update their items' layers to match.
+
+    `items` maps item id -> (costing_method, unit_price, quantity on hand
+    before the movements); incoming movements without a unit_cost are costed
+    at the unit_price. Call inside the transaction that locked the items.
+    """
+    movements = [movement for movement in movements if movement.movement_type not in TRANSFER_TYPES]
+    for movement in movements:
+        if movement.quantity > 0 and movement.unit_cost is None:
+            movement.unit_cost = items[movement.item_id][1]
+    # Receipts of FIFO items only append, so only the other items' layers are read
+    item_ids = {
+        movement.item_id for movement in movements
+        if movement.quantity < 0 or items[movement.item_id][0] == InventoryItem.AVERAGE
+    }
+    stored = {}
+    if item_ids:
+        rows = CostLayer.objects.filter(item_id__in=item_ids).order_by('item', 'id').values_list(
+            'item', 'pk', 'remaining', 'unit_cost', 'received_at',
+        )
+        for item_id, *layer in rows:
+            stored.setdefault(item_id, []).append(layer)
+
+    ledgers = {}
+    for movement in movements:
+        layers = ledgers.get(movement.item_id)
+        if layers is None:
+            method, _, on_hand = items[movement.item_id]
+            layers = ledgers[movement.item_id] = Layers(
+                method == InventoryItem.AVERAGE, stored.get(movement.item_id, ()), max(-on_hand, ZERO),
+            )
+        if movement.quantity > 0:
+            layers.receive(movement.quantity, movement.unit_cost, movement.created_at)
+        else:
+            layers.consume(-movement.quantity)
+    _save(ledgers, stored)
+
+
+def month_end(as_of, chunk_size=REPLAY_CHUNK_SIZE):
+    """
+    Yield (item id, quantity, value) for each item with movements before
+    `as_of` (a datetime), costed with the item's current costing method.
+    """
+    average = set(InventoryItem.objects.filter(costing_method=InventoryItem.AVERAGE).values_list('pk', flat=True))
+    rows = StockMovement.objects.filter(created_at__lt=as_of).exclude(movement_type__in=TRANSFER_TYPES).order_by(
+        'item', 'id',
+    ).values_list('item', 'quantity', 'unit_cost', 'created_at').iterator(chunk_size=chunk_size)
+    for item_id, movements in itertools.groupby(rows, key=lambda row: row[0]):
+        layers = Layers(item_id in average)
+        quantity = ZERO
+        for _, change, unit_cost, created_at in movements:
+            quantity += change
+            if change > 0:
+                layers.receive(change, unit_cost, created_at)
+            else:
+                layers.consume(-change)
+        yield item_id, quantity, layers.value().quantize(CENT)
@@ -0,0 +1,151 @@
+"""
+Posting delivery notes: materials moved from one warehouse to another.
+
+The delivery form sends its lines as parallel lists (material_name[],
+material_unit[], material_quantity[], material_batch[]). Materials are
+matched to InventoryItems by item code or exact material name in two
+queries however many lines there are, and the note, its lines and the
+ledger movements (a transfer out of the source and into the destination per
+line, see inventory.stock) are written in one transaction with bulk
+inserts. A delivery that would leave the source short of any item, or of
+the batch a line names, is rolled back whole.
+"""
+from decimal import Decimal, InvalidOperation
+
+from django.db import transaction
+
+from . import stock
+from .models import DeliveryNoteLine, InventoryItem, StockMovement
+
+MAX_LINES = 1000
+
+# Units offered on the form; a blank unit means the item's own
+UNIT_CHOICES = [
+    ('pcs', 'Pieces (pcs)'),
+    ('kg', 'Kilograms (kg)'),
+    ('m', 'Meters (m)'),
+    ('m2', 'Square Meters (m²)'),
+    ('m3', 'Cubic Meters (m³)'),
+    ('bags', 'Bags'),
+    ('boxes', 'Boxes'),
+    ('bundles', 'Bundles'),
+    ('rolls', 'Rolls'),
+    ('liters', 'Liters'),
+]
+
+
+class DeliveryError(ValueError):
+    """The delivery can't be posted; `errors` lists every problem found, one message each"""
+
+    def __init__(self, errors):
+        super().__init__('; '.join(errors))
+        self.errors = list(errors)
+
+
+def read_lines(data):
+    """
+    (line number, material, unit, quantity text, batch) per filled-in row of
+    the form, skipping rows left entirely blank.
+    """
+    columns = [data.getlist(name) for name in
+               ('material_name[]', 'material_unit[]', 'material_quantity[]', 'material_batch[]')]
+    length = max(len(column) for column in columns)
+    rows = []
+    for i in range(length):
+        material, unit, quantity, batch = [
+            column[i].strip() if i < len(column) else '' for column in columns
+        ]
+        if material or quantity or batch:
+            rows.append((i + 1, material, unit, quantity, batch))
+    return rows
+
+
+def _resolve_items(materials):
+    """{material as entered: InventoryItem or None}, matching item codes first, then unique material names"""
+    found = {}
+    codes = {material.upper() for material in materials} | set(materials)
+    by_code = {item.item_code.upper(): item for item in InventoryItem.objects.filter(item_code__in=codes)}
+    for material in materials:
+        found[material] = by_code.get(material.upper())
+    names = [material for material in materials if found[material] is None]
+    if names:
+        by_name = {}
+        for item in InventoryItem.objects.filter(material_name__in=names):
+            # Two items with the same name can't be told apart; the code has to be used instead
+            by_name[item.material_name] = None if item.material_name in by_name else item
+        found.update({material: by_name.get(material) for material in names})
+    return found
+
+
+def build_lines(rows):
+    """Unsaved DeliveryNoteLines for the rows from read_lines(); raises DeliveryError"""
+    if not rows:
+        raise DeliveryError(['Add at least one material to deliver.'])
+    if len(rows) > MAX_LINES:
+        raise DeliveryError([f'A delivery can have at most {MAX_LINES} materials.'])
+    items = _resolve_items({material for _, material, _, _, _ in rows if material})
+    errors = []
+    lines = []
+    for number, material, unit, quantity, batch in rows:
+        item = items.get(material)
+        if not material:
+            errors.append(f'Material {number}: enter an item code or material name.')
+            continue
+        if item is None:
+            errors.append(f'Material {number}: no single inventory item has the code or name "{material}".')
+            continue
+        try:
+            quantity = Decimal(quantity)
+        except InvalidOperation:
+            errors.append(f'Material {number}: "{quantity}" is not a quantity.')
+            continue
+        if not quantity.is_finite() or quantity <= 0 or quantity != quantity.quantize(Decimal('0.01')):
+            errors.append(f'Material {number}: quantity must be above zero with at most two decimal places.')
+            continue
+        if unit and unit != item.unit:
+            errors.append(f'Material {number}: {item.item_code} is stocked in {item.unit}, not {unit}.')
+            continue
+        if len(batch) > DeliveryNoteLine._meta.get_field('batch').max_length:
+            errors.append(f'Material {number}: the batch/serial number is too long.')
+            continue
+        lines.append(DeliveryNoteLine(item=item, quantity=quantity, unit=item.unit, batch=batch))
+    if errors:
+        raise DeliveryError(errors)
+    return lines
+
+
+def post_delivery(note, lines, user=None):
+    """
+    Save an unsaved DeliveryNote with its lines and move the stock, all or
+    nothing. Raises DeliveryError when the source would run short.
+    """
+    with transaction.atomic():
+        note.created_by = user
+        note.save()
+        for line in lines:
+            line.delivery_note = note
+        DeliveryNoteLine.objects.bulk_create(lines, batch_size=stock.INSERT_BATCH_SIZE)
+        details = {'reference': note.delivery_number, 'created_by': user}
+        movements = []
+        for line in lines:
+            movements.append(StockMovement(item=line.item, warehouse=note.source_warehouse, batch=line.batch,
+                                           movement_type=StockMovement.TRANSFER_OUT, quantity=-line.quantity, **details))
+            movements.append(StockMovement(item=line.item, warehouse=note.destination_warehouse, batch=line.batch,
+                                           movement_type=StockMovement.TRANSFER_IN, quantity=line.quantity, **details))
+        stock.post(movements)
+        # A line naming a batch must be covered by that batch; unbatched lines by the item's stock in any batch
+        codes = {line.item_id: line.item.item_code for line in lines}
+        short = stock.shortages(note.source_warehouse, {line.item_id for line in lines if not line.batch})
+        errors = [
+            f'{note.source_warehouse} does not have enough {codes[item_id]} ({quantity} after this delivery).'
+            for item_id, quantity in sorted(short.items(), key=lambda pair: codes[pair[0]])
+        ]
+        short_batches = stock.batch_shortages(note.source_warehouse, {(line.item_id, line.batch) for line in lines if line.batch})
+        errors += [
+            f'{note.source_warehouse} does not have enough {codes[item_id]} in batch {batch} ({quantity} after this delivery).'
+            for (item_id, batch), quantity in sorted(short_batches.items(), key=lambda pair: (codes[pair[0][0]], pair[0][1]))
+        ]
+        if errors:
+            # Raising inside atomic() rolls back the note, its lines and the movements
+            raise DeliveryError(errors)
+    return note
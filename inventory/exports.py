@@ -0,0 +1,44 @@
+"""
+Column definitions for the inventory CSV / XLSX exports (see common.export).
+
+Each list page and its export share one queryset and the same filters and
+sort (see inventory.filters), so an export contains exactly the rows the page
+would list, in the same order.
+"""
+from common.export import user_display
+
+from .models import MaterialRequest
+
+
+STATUS_DISPLAY = dict(MaterialRequest.STATUS_CHOICES)
+PURCHASE_STATUS_DISPLAY = dict(MaterialRequest.PURCHASE_STATUS_CHOICES)
+
+REQUEST_COLUMNS = (
+    ('Request Number', 'request_number'),
+    ('Date Requested', 'created_at'),
+    ('Requested By', user_display('requested_by')),
+    ('Project', 'project_name'),
+    ('Location', 'project_location'),
+    ('Site Supervisor', 'site_supervisor'),
+    ('Purpose', 'purpose'),
+    ('Date Needed', 'delivery_date_needed'),
+    ('Items', 'annotated_items_count'),
+    ('Estimated Cost', 'annotated_total_cost'),
+    ('Status', 'status', lambda value: STATUS_DISPLAY.get(value, value)),
+    ('Approved By', user_display('approved_by')),
+    ('Approved Date', 'approved_date'),
+    ('Purchase Status', 'purchase_status', lambda value: PURCHASE_STATUS_DISPLAY.get(value, value)),
+    ('Purchase Approved By', user_display('purchase_approved_by')),
+    ('Purchase Approved Date', 'purchase_approved_date'),
+    ('Remarks', 'remarks'),
+)
+
+INVENTORY_ITEM_COLUMNS = (
+    ('Item Code', 'item_code'),
+    ('Material Name', 'material_name'),
+    ('Category', 'category'),
+    ('Unit', 'unit'),
+    ('Quantity on Hand', 'quantity_on_hand'),
+    ('Unit Price', 'unit_price'),
+    ('Updated', 'updated_at'),
+)
@@ -0,0 +1,49 @@
+"""Filters, sort keys and facets of the inventory list pages (see common.filters)"""
+from common.filters import Facet, ListFilter
+
+from .models import MaterialRequest
+
+
+def _user_label(pk, first_name='', last_name='', username=''):
+    return f'{first_name} {last_name}'.strip() or username or f'User #{pk}'
+
+
+REQUEST_SORTS = (
+    ('newest', 'Newest first', ('-created_at', '-id')),
+    ('oldest', 'Oldest first', ('created_at', 'id')),
+    ('needed', 'Needed soonest', ('delivery_date_needed', 'id')),
+    ('needed_last', 'Needed latest', ('-delivery_date_needed', '-id')),
+)
+
+PRIORITY = Facet('priority', 'priority', 'Priority', choices=MaterialRequest.PRIORITY_CHOICES)
+REQUESTED_BY = Facet(
+    'requested_by', 'requested_by', 'Requested by',
+    label_fields=('requested_by__first_name', 'requested_by__last_name', 'requested_by__username'),
+    label=_user_label,
+)
+
+REQUEST_LIST_FILTER = ListFilter(
+    facets=(Facet('status', 'status', 'Status', choices=MaterialRequest.STATUS_CHOICES), PRIORITY, REQUESTED_BY),
+    sorts=REQUEST_SORTS,
+    date_field='created_at',
+)
+
+PURCHASE_LIST_FILTER = ListFilter(
+    facets=(
+        Facet('purchase_status', 'purchase_status', 'Purchase status',
+              choices=MaterialRequest.PURCHASE_STATUS_CHOICES),
+        PRIORITY,
+        REQUESTED_BY,
+    ),
+    sorts=REQUEST_SORTS,
+    date_field='created_at',
+)
+
+INVENTORY_ITEM_FILTER = ListFilter(
+    facets=(Facet('category', 'category', 'Category'),),
+    sorts=(
+        ('code', 'Item code', ('item_code',)),
+        ('name', 'Material name', ('material_name', 'id')),
+        ('low_stock', 'Lowest stock', ('quantity_on_hand', 'item_code')),
+    ),
+)
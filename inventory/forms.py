@@ -1,6 +1,6 @@
 from django import forms
 from django.forms import formset_factory, inlineformset_factory
-from .models import MaterialRequest, MaterialRequestItem
+from .models import DeliveryNote, MaterialRequest, MaterialRequestItem, Warehouse
 
 
 class MaterialRequestForm(forms.ModelForm):
@@ -137,4 +137,35 @@ MaterialItemFormSet = inlineformset_factory(
     can_delete=True,
     min_num=1,  # Require at least one item
     validate_min=True
-)
\ No newline at end of file
+)
+
+class DeliveryNoteForm(forms.ModelForm):
+    """Header of a delivery note; the materials are read by inventory.delivery"""
+    
+    class Meta:
+        model = DeliveryNote
+        fields = [
+            'delivery_date', 'source_warehouse', 'destination_warehouse',
+            'driver_name', 'vehicle_number', 'remarks'
+        ]
+        labels = {
+            'delivery_date': 'Delivery Date',
+            'source_warehouse': 'Source Warehouse',
+            'destination_warehouse': 'Destination Warehouse',
+            'driver_name': 'Driver Name',
+            'vehicle_number': 'Vehicle/Plate Number',
+            'remarks': 'Remarks',
+        }
+    
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        active = Warehouse.objects.filter(is_active=True)
+        self.fields['source_warehouse'].queryset = active
+        self.fields['destination_warehouse'].queryset = active
+    
+    def clean(self):
+        cleaned_data = super().clean()
+        source = cleaned_data.get('source_warehouse')
+        if source and source == cleaned_data.get('destination_warehouse'):
+            self.add_error('destination_warehouse', 'The destination must differ from the source warehouse.')
+        return cleaned_data
@@ -0,0 +1,189 @@
+"""
+Bulk loading of InventoryItem master data from CSV or JSON.
+
+Rows are read lazily, cleaned a batch at a time with the model fields' own
+validation, and written with one INSERT ... ON CONFLICT (item_code) DO UPDATE
+per batch. Quantities are stock counts: the difference from each item's
+on-hand is posted to the stock ledger (inventory.stock) as one adjustment per
+item in the default warehouse, and new prices re-value the stock on hand
+(inventory.valuation). Used by the import_inventory management command.
+"""
+import csv
+import json
+import re
+
+from django.core.exceptions import ValidationError
+
+from . import stock, valuation
+from .models import InventoryItem, StockMovement, Warehouse
+
+
+DEFAULT_BATCH_SIZE = 2000
+READ_SIZE = 1 << 16
+
+IMPORT_FIELDS = ('item_code', 'material_name', 'category', 'unit', 'quantity_on_hand', 'unit_price')
+REQUIRED_FIELDS = ('item_code', 'material_name', 'category', 'unit', 'unit_price')
+
+# Columns refreshed when an item_code already exists; created_at keeps the original value, and
+# quantity_on_hand changes through the stock ledger
+UPDATE_FIELDS = ('material_name', 'category', 'unit', 'unit_price', 'updated_at')
+
+IMPORT_REFERENCE = 'IMPORT'
+
+
+class ImportRowError(ValueError):
+
+    def __init__(self, line, message):
+        super().__init__(f'Row {line}: {message}')
+        self.line = line
+
+
+def normalize_header(name):
+    """'Quantity on Hand' -> 'quantity_on_hand', so the masterlist export reads back in"""
+    return re.sub(r'\W+', '_', (name or '').strip().lower()).strip('_')
+
+
+def read_csv(stream):
+    """Yield (line number, row dict) from a CSV file object"""
+    reader = csv.DictReader(stream)
+    if reader.fieldnames:
+        reader.fieldnames = [normalize_header(name) for name in reader.fieldnames]
+    for row in reader:
+        yield reader.line_num, row
+
+
+def read_json(stream):
+    """
+    Yield (position, row dict) from a JSON array of objects or from JSON Lines,
+    decoding one object at a time so the file is never loaded whole.
+    """
+    decoder = json.JSONDecoder()
+    buffer = ''
+    position = 0
+    eof = False
+    while True:
+        buffer = buffer.lstrip(' \t\r\n,[')
+        if not buffer or buffer.startswith(']'):
+            if eof:
+                return
+            chunk = stream.read(READ_SIZE)
+            eof = not chunk
+            buffer += chunk
+            continue
+        try:
+            row, end = decoder.raw_decode(buffer)
+        except json.JSONDecodeError as e:
+            if eof:
+                raise ImportRowError(position + 1, f'invalid JSON ({e.msg})')
+            chunk = stream.read(READ_SIZE)
+            eof = not chunk
+            buffer += chunk
+            continue
+        position += 1
+        buffer = buffer[end:]
+        if not isinstance(row, dict):
+            raise ImportRowError(position, 'expected a JSON object')
+        yield position, {normalize_header(key): value for key, value in row.items()}
+
+
+# (name, to_python, validators, required) per imported field; the same checks Field.clean() runs,
+# minus choices/blank handling that doesn't apply here, looked up once instead of per row
+_CLEANERS = [
+    (name, field.to_python, field.validators, name in REQUIRED_FIELDS)
+    for name, field in ((name, InventoryItem._meta.get_field(name)) for name in IMPORT_FIELDS)
+]
+
+
+def clean_row(line, row):
+    """
+    Validate one input row with the model field definitions and return an
+    unsaved InventoryItem; quantity_on_hand is None when the row has no count.
+    """
+    values = {}
+    errors = []
+    for name, to_python, validators, required in _CLEANERS:
+        value = row.get(name)
+        if isinstance(value, str):
+            value = value.strip()
+        if value is None or value == '':
+            if required:
+                errors.append(f'{name} is required')
+            continue
+        try:
+            value = to_python(value)
+            for validator in validators:
+                validator(value)
+        except ValidationError as e:
+            errors.append(f"{name}: {' '.join(e.messages)}")
+            continue
+        values[name] = value
+    if errors:
+        raise ImportRowError(line, '; '.join(errors))
+    # Not the model default of 0: a file without counts must not zero the stock
+    values.setdefault('quantity_on_hand', None)
+    return InventoryItem(**values)
+
+
+def clean_batch(rows):
+    """
+    Clean a batch of (line, row) pairs. Returns (items, errors, duplicates);
+    when an item_code repeats within the batch the last row wins, since one
+    upsert statement can't touch the same row twice.
+    """
+    items = {}
+    errors = []
+    duplicates = 0
+    for line, row in rows:
+        try:
+            item = clean_row(line, row)
+        except ImportRowError as e:
+            errors.append(e)
+            continue
+        if item.item_code in items:
+            duplicates += 1
+        items[item.item_code] = item
+    return list(items.values()), errors, duplicates
+
+
+def upsert_items(items, batch_size=DEFAULT_BATCH_SIZE):
+    """
+    Insert new item codes and overwrite existing ones, one statement per batch (SQLite splits it to fit its
+    parameter limit), then post the counted quantities to the ledger. Call inside a transaction.
+    Rows without a quantity keep the stock they have. Returns how many of the items already existed.
+    """
+    codes = [item.item_code for item in items]
+    counted = {item.item_code: item.quantity_on_hand for item in items if item.quantity_on_hand is not None}
+    # Locked so a posting between this read and the adjustment can't be counted twice
+    existing = {
+        code: (pk, quantity, (category, unit_price))
+        for code, pk, quantity, category, unit_price in InventoryItem.objects.select_for_update().filter(
+            item_code__in=codes,
+        ).values_list('item_code', 'pk', 'quantity_on_hand', 'category', 'unit_price')
+    }
+    current = {code: quantity for code, (_, quantity, _) in existing.items()}
+    for item in items:
+        item.quantity_on_hand = current.get(item.item_code, 0)
+    InventoryItem.objects.bulk_create(
+        items,
+        batch_size=batch_size,
+        update_conflicts=True,
+        unique_fields=['item_code'],
+        update_fields=UPDATE_FIELDS,
+    )
+
+    # The stock already on hand is re-valued at the new prices before the adjustments are valued at them
+    repriced = {}
+    for item in items:
+        if item.item_code in existing:
+            pk, _, old = existing[item.item_code]
+            repriced[pk] = (old, (item.category, item.unit_price))
+    valuation.reprice(repriced)
+
+    item_ids = dict(InventoryItem.objects.filter(item_code__in=counted).values_list('item_code', 'pk'))
+    warehouse = Warehouse.default()
+    stock.post(
+        StockMovement(item_id=item_ids[code], warehouse=warehouse, movement_type=StockMovement.ADJUSTMENT,
+                      quantity=quantity - current.get(code, 0), reference=IMPORT_REFERENCE)
+        for code, quantity in counted.items()
+    )
+    return len(existing)
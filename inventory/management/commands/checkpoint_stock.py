@@ -0,0 +1,28 @@
+import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+
+from inventory import stock, valuation
+
+
+class Command(BaseCommand):
+    help = 'Writes stock ledger checkpoints for every item and warehouse that moved since the last run'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--lag-minutes', type=int, default=int(stock.CHECKPOINT_LAG.total_seconds() // 60),
+                            help='Leave movements newer than this for the next run')
+        parser.add_argument('--rebuild-totals', action='store_true',
+                            help="Also recompute every item's quantity_on_hand, the warehouse balances and their value from the ledger")
+
+    def handle(self, *args, **options):
+        if options['lag_minutes'] < 0:
+            raise CommandError('--lag-minutes cannot be negative')
+        written = stock.checkpoint(lag=datetime.timedelta(minutes=options['lag_minutes']))
+        self.stdout.write(self.style.SUCCESS(f'Stock checkpoints written: {written}'))
+        if options['rebuild_totals']:
+            corrected = stock.rebuild_totals()
+            self.stdout.write(self.style.SUCCESS(f'Item totals rebuilt from the ledger: {corrected} corrected'))
+            balances = stock.rebuild_balances()
+            self.stdout.write(self.style.SUCCESS(f'Warehouse balances rebuilt from the ledger: {balances}'))
+            valuations = valuation.rebuild()
+            self.stdout.write(self.style.SUCCESS(f'Stock valuation rebuilt: {valuations} warehouse categories'))
@@ -0,0 +1,100 @@
+import itertools
+import sys
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from inventory.importing import (
+    DEFAULT_BATCH_SIZE, ImportRowError, clean_batch, read_csv, read_json, upsert_items,
+)
+from inventory.models import InventoryItem
+
+
+class Command(BaseCommand):
+    help = 'Creates or updates inventory items from a CSV or JSON file, matched on item_code'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="CSV, JSON array or JSON Lines file; '-' reads standard input")
+        parser.add_argument('--format', choices=['csv', 'json'],
+                            help='Input format; guessed from the file extension by default')
+        parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE,
+                            help='Rows validated and written per statement')
+        parser.add_argument('--max-errors', type=int, default=100,
+                            help='Stop once this many rows have failed validation (0 for no limit)')
+        parser.add_argument('--dry-run', action='store_true', help='Validate the file without writing anything')
+
+    def handle(self, *args, **options):
+        path = options['path']
+        input_format = options['format'] or ('json' if path.lower().endswith(('.json', '.jsonl', '.ndjson')) else 'csv')
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size must be at least 1')
+
+        if path == '-':
+            self.run(sys.stdin, input_format, options)
+            return
+        try:
+            stream = open(path, newline='', encoding='utf-8-sig')
+        except OSError as e:
+            raise CommandError(f'Cannot open {path}: {e.strerror}')
+        with stream:
+            self.run(stream, input_format, options)
+
+    def run(self, stream, input_format, options):
+        rows = read_json(stream) if input_format == 'json' else read_csv(stream)
+        batch_size = options['batch_size']
+        max_errors = options['max_errors']
+        dry_run = options['dry_run']
+
+        read = created = updated = duplicates = 0
+        errors = []
+        began = time.perf_counter()
+        try:
+            # One transaction for the whole file: stopping at --max-errors must not leave earlier batches
+            # written, or a re-run would post their stock adjustments again
+            with transaction.atomic():
+                while True:
+                    batch = list(itertools.islice(rows, batch_size))
+                    if not batch:
+                        break
+                    read += len(batch)
+                    items, batch_errors, batch_duplicates = clean_batch(batch)
+                    errors += batch_errors
+                    duplicates += batch_duplicates
+                    if max_errors and len(errors) >= max_errors:
+                        raise CommandError(self.error_summary(errors, f'Stopped after {len(errors)} invalid rows'))
+
+                    if items:
+                        if dry_run:
+                            existing = InventoryItem.objects.filter(
+                                item_code__in=[item.item_code for item in items],
+                            ).count()
+                        else:
+                            existing = upsert_items(items, batch_size)
+                        created += len(items) - existing
+                        updated += existing
+
+                    if options['verbosity'] >= 2:
+                        self.stdout.write(f'{read} rows read, {read / (time.perf_counter() - began):,.0f} rows/sec')
+        except ImportRowError as e:
+            # Unreadable input (e.g. malformed JSON) rather than a bad value
+            raise CommandError(str(e))
+
+        elapsed = time.perf_counter() - began
+        rate = read / elapsed if elapsed else 0
+        verb = 'Would create' if dry_run else 'Created'
+        self.stdout.write(
+            f'{read} rows in {elapsed:.2f}s ({rate:,.0f} rows/sec). '
+            f'{verb} {created}, {"would update" if dry_run else "updated"} {updated}, '
+            f'skipped {len(errors)} invalid and {duplicates} repeated item codes.'
+        )
+        if errors:
+            self.stderr.write(self.error_summary(errors, f'{len(errors)} rows failed validation'))
+        elif not dry_run:
+            self.stdout.write(self.style.SUCCESS('Import complete'))
+
+    def error_summary(self, errors, heading, limit=20):
+        lines = [heading + ':'] + [f'  {e}' for e in errors[:limit]]
+        if len(errors) > limit:
+            lines.append(f'  ... and {len(errors) - limit} more')
+        return '\n'.join(lines)
@@ -0,0 +1,62 @@
+import csv
+import datetime
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from inventory import costing
+from inventory.models import InventoryItem
+
+
+# Items whose codes are looked up per query while writing rows
+CODE_BATCH_SIZE = 1000
+
+
+class Command(BaseCommand):
+    help = 'Writes the quantity and cost of every item on hand at the end of a month, as CSV'
+
+    def add_arguments(self, parser):
+        parser.add_argument('month', help='Month to close, as YYYY-MM; values stock as of midnight after its last day')
+        parser.add_argument('--output', help='CSV file to write; standard output by default')
+
+    def handle(self, *args, **options):
+        try:
+            first = datetime.datetime.strptime(options['month'], '%Y-%m').date()
+        except ValueError:
+            raise CommandError('month must be given as YYYY-MM')
+        next_month = (first + datetime.timedelta(days=32)).replace(day=1)
+        as_of = timezone.make_aware(datetime.datetime.combine(next_month, datetime.time.min))
+
+        if not options['output']:
+            self.run(self.stdout, as_of)
+            return
+        try:
+            stream = open(options['output'], 'w', newline='', encoding='utf-8')
+        except OSError as e:
+            raise CommandError(f"Cannot open {options['output']}: {e.strerror}")
+        with stream:
+            items, total = self.run(stream, as_of)
+        self.stdout.write(self.style.SUCCESS(
+            f"Valued {items} items as of {as_of:%Y-%m-%d %H:%M}: ₱{total:,.2f} written to {options['output']}"
+        ))
+
+    def run(self, stream, as_of):
+        writer = csv.writer(stream)
+        writer.writerow(['Item Code', 'Quantity', 'Value'])
+        items = 0
+        total = Decimal('0')
+        pending = []
+        for row in costing.month_end(as_of):
+            pending.append(row)
+            if len(pending) == CODE_BATCH_SIZE:
+                self.write_rows(writer, pending)
+                pending = []
+            items += 1
+            total += row[2]
+        self.write_rows(writer, pending)
+        return items, total
+
+    def write_rows(self, writer, rows):
+        codes = dict(InventoryItem.objects.filter(pk__in=[row[0] for row in rows]).values_list('pk', 'item_code'))
+        writer.writerows([codes[item_id], quantity, value] for item_id, quantity, value in rows)
@@ -1,4 +1,6 @@
 from django.core.management.base import BaseCommand
+from core.models import Project
+from inventory import stock
 from inventory.models import InventoryItem
 
 class Command(BaseCommand):
@@ -39,6 +41,28 @@ class Command(BaseCommand):
                 self.stdout.write(self.style.SUCCESS(f'Created: {item_data["item_code"]} - {item_data["material_name"]}'))
             else:
                 self.stdout.write(self.style.WARNING(f'Already exists: {item_data["item_code"]}'))
+        
+        # Book the starting quantities of new items to the stock ledger
+        stock.record_opening_balances(InventoryItem.objects.filter(item_code__in=[item['item_code'] for item in items_data]))
 
         self.stdout.write(self.style.SUCCESS('\nSample inventory data population complete!'))
 
+        # Create sample construction projects shown on the dashboard
+        projects_data = [
+            {'name': 'Metro Tower Construction', 'location': 'Makati City', 'status': 'in_progress', 'progress': 65, 'budget': 45000000, 'start_date': '2024-03-15', 'target_completion': '2025-09-30'},
+            {'name': 'Highway Expansion Project', 'location': 'Quezon City', 'status': 'in_progress', 'progress': 42, 'budget': 78000000, 'start_date': '2024-06-01', 'target_completion': '2026-02-28'},
+            {'name': 'Residential Complex Phase 2', 'location': 'Taguig City', 'status': 'in_progress', 'progress': 78, 'budget': 62000000, 'start_date': '2023-11-10', 'target_completion': '2025-05-15'},
+            {'name': 'Bridge Rehabilitation', 'location': 'Pasig City', 'status': 'planning', 'progress': 15, 'budget': 35000000, 'start_date': '2024-11-01', 'target_completion': '2025-12-31'},
+            {'name': 'Commercial Plaza Development', 'location': 'Mandaluyong City', 'status': 'completed', 'progress': 100, 'budget': 52000000, 'start_date': '2023-02-20', 'target_completion': '2024-10-31'},
+        ]
+
+        for project_data in projects_data:
+            project, created = Project.objects.get_or_create(
+                name=project_data['name'],
+                defaults={key: value for key, value in project_data.items() if key != 'name'}
+            )
+            if created:
+                self.stdout.write(self.style.SUCCESS(f'Created project: {project.name}'))
+            else:
+                self.stdout.write(self.style.WARNING(f'Project already exists: {project.name}'))
+
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.7 on 2026-10-18 05:08
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0005_materialrequest_purchase_approved_by_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='materialrequest',
+            index=models.Index(fields=['-created_at', '-id'], name='req_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='materialrequest',
+            index=models.Index(fields=['status', '-created_at', '-id'], name='req_status_created_idx'),
+        ),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 5.2.7 on 2026-10-18 05:12
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0001_initial'),
+        ('inventory', '0006_materialrequest_listing_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='materialrequest',
+            name='project',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='material_requests', to='core.project'),
+        ),
+    ]
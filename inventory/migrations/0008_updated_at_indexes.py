@@ -0,0 +1,24 @@
+# Generated by Django 5.2.7 on 2026-10-18 05:35
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0004_alter_project_name_key'),
+        ('inventory', '0007_materialrequest_project'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='inventoryitem',
+            index=models.Index(fields=['updated_at'], name='inv_item_updated_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='materialrequest',
+            index=models.Index(fields=['updated_at'], name='req_updated_idx'),
+        ),
+    ]
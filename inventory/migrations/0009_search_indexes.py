@@ -0,0 +1,44 @@
+# Generated by Django 5.2.7 on 2026-10-18 05:41
+
+from django.db import migrations
+
+
+# (index name, table, column); on SQLite the FTS5 tables in common.search are
+# created by inventory.signals after migrate instead
+TRIGRAM_INDEXES = [
+    ('inv_item_code_trgm', 'inventory_inventoryitem', 'item_code'),
+    ('inv_item_name_trgm', 'inventory_inventoryitem', 'material_name'),
+    ('inv_item_category_trgm', 'inventory_inventoryitem', 'category'),
+    ('req_number_trgm', 'inventory_materialrequest', 'request_number'),
+    ('req_project_name_trgm', 'inventory_materialrequest', 'project_name'),
+    ('req_supervisor_trgm', 'inventory_materialrequest', 'site_supervisor'),
+]
+
+
+def create_trigram_indexes(apps, schema_editor):
+    """GIN trigram indexes matching the UPPER(column::text) LIKE that icontains generates"""
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    for name, table, column in TRIGRAM_INDEXES:
+        schema_editor.execute(
+            f'CREATE INDEX IF NOT EXISTS {name} ON {table} USING gin ((UPPER({column}::text)) gin_trgm_ops)'
+        )
+
+
+def drop_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for name, table, column in TRIGRAM_INDEXES:
+        schema_editor.execute(f'DROP INDEX IF EXISTS {name}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0008_updated_at_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_trigram_indexes, drop_trigram_indexes),
+    ]
@@ -0,0 +1,44 @@
+# Generated by Django 5.2.7 on 2026-10-18 05:49
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0004_alter_project_name_key'),
+        ('inventory', '0009_search_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='inventoryitem',
+            index=models.Index(fields=['category', 'item_code'], name='inv_item_category_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='inventoryitem',
+            index=models.Index(fields=['material_name', 'id'], name='inv_item_name_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='inventoryitem',
+            index=models.Index(fields=['quantity_on_hand', 'item_code'], name='inv_item_stock_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='materialrequest',
+            index=models.Index(fields=['status', 'purchase_status', '-created_at', '-id'], name='req_purchase_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='materialrequest',
+            index=models.Index(fields=['priority', '-created_at', '-id'], name='req_priority_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='materialrequest',
+            index=models.Index(fields=['requested_by', '-created_at', '-id'], name='req_requester_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='materialrequest',
+            index=models.Index(fields=['delivery_date_needed', 'id'], name='req_needed_idx'),
+        ),
+    ]
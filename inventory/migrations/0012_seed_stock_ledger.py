@@ -0,0 +1,47 @@
+# Generated by Django 5.2.7 on 2026-10-18 06:05
+
+from django.db import migrations
+from django.utils import timezone
+
+
+BATCH_SIZE = 1000
+
+
+def seed_ledger(apps, schema_editor):
+    """Create the default warehouse and book existing quantities to it as opening balances (same as stock.record_opening_balances)"""
+    Warehouse = apps.get_model('inventory', 'Warehouse')
+    InventoryItem = apps.get_model('inventory', 'InventoryItem')
+    StockMovement = apps.get_model('inventory', 'StockMovement')
+
+    warehouse, _ = Warehouse.objects.get_or_create(code='MAIN', defaults={'name': 'Main Warehouse - Quezon City'})
+    now = timezone.now()
+    last_pk = 0
+    while True:
+        rows = list(
+            InventoryItem.objects.filter(pk__gt=last_pk).exclude(quantity_on_hand=0).order_by('pk')
+            .values_list('pk', 'quantity_on_hand')[:BATCH_SIZE]
+        )
+        if not rows:
+            break
+        StockMovement.objects.bulk_create(
+            StockMovement(item_id=item_id, warehouse=warehouse, movement_type='adjustment', quantity=quantity,
+                          reference='OPENING', created_at=now)
+            for item_id, quantity in rows
+        )
+        last_pk = rows[-1][0]
+
+
+def clear_ledger(apps, schema_editor):
+    apps.get_model('inventory', 'StockMovement').objects.all().delete()
+    apps.get_model('inventory', 'Warehouse').objects.all().delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0011_stock_ledger'),
+    ]
+
+    operations = [
+        migrations.RunPython(seed_ledger, clear_ledger),
+    ]
@@ -0,0 +1,56 @@
+# Generated by Django 5.2.7 on 2026-10-18 06:40
+
+from django.db import migrations
+from django.db.models import Sum
+
+
+# The places the delivery form used to list as fixed options
+WAREHOUSES = [
+    ('MAIN', 'Main Warehouse - Quezon City'),
+    ('DEPOT-MKT', 'Central Depot - Makati'),
+    ('HUB-TGG', 'Storage Hub - Taguig'),
+    ('RC-PSG', 'Regional Center - Pasig'),
+    ('SITE-METRO', 'Project Site - Metro Tower'),
+    ('SITE-HWY', 'Project Site - Highway Expansion'),
+    ('SITE-RES', 'Project Site - Residential Complex'),
+    ('SITE-BRIDGE', 'Project Site - Bridge Rehabilitation'),
+    ('SAT-MDL', 'Satellite Storage - Mandaluyong'),
+]
+
+BATCH_SIZE = 1000
+
+
+def seed(apps, schema_editor):
+    """Create the delivery form's warehouses and the balances of stock already in the ledger (same as stock.rebuild_balances)"""
+    Warehouse = apps.get_model('inventory', 'Warehouse')
+    StockMovement = apps.get_model('inventory', 'StockMovement')
+    StockBalance = apps.get_model('inventory', 'StockBalance')
+
+    for code, name in WAREHOUSES:
+        Warehouse.objects.get_or_create(code=code, defaults={'name': name})
+
+    rows = StockMovement.objects.order_by().values('item', 'warehouse', 'batch').annotate(total=Sum('quantity'))
+    batch = []
+    for row in rows.iterator(chunk_size=BATCH_SIZE):
+        batch.append(StockBalance(item_id=row['item'], warehouse_id=row['warehouse'], batch=row['batch'],
+                                  quantity=row['total']))
+        if len(batch) == BATCH_SIZE:
+            StockBalance.objects.bulk_create(batch)
+            batch = []
+    StockBalance.objects.bulk_create(batch)
+
+
+def clear_balances(apps, schema_editor):
+    # Warehouses stay: stock or deliveries may refer to them
+    apps.get_model('inventory', 'StockBalance').objects.all().delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0013_delivery_notes'),
+    ]
+
+    operations = [
+        migrations.RunPython(seed, clear_balances),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.7 on 2026-10-18 06:58
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0014_seed_warehouses_and_balances'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StockValuation',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('category', models.CharField(max_length=100)),
+                ('value', models.DecimalField(decimal_places=4, default=0, max_digits=20)),
+                ('updated_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('warehouse', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='valuations', to='inventory.warehouse')),
+            ],
+            options={
+                'ordering': ['warehouse', 'category'],
+                'constraints': [models.UniqueConstraint(fields=('warehouse', 'category'), name='unique_stock_valuation')],
+            },
+        ),
+    ]
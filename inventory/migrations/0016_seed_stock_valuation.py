@@ -0,0 +1,34 @@
+# Generated by Django 5.2.7 on 2026-10-18 07:02
+
+from django.db import migrations
+from django.db.models import DecimalField, ExpressionWrapper, F, Sum
+from django.utils import timezone
+
+
+def seed_valuation(apps, schema_editor):
+    """Value the balances already in place (same as inventory.valuation.rebuild)"""
+    StockBalance = apps.get_model('inventory', 'StockBalance')
+    StockValuation = apps.get_model('inventory', 'StockValuation')
+
+    now = timezone.now()
+    value = ExpressionWrapper(F('quantity') * F('item__unit_price'), output_field=DecimalField(max_digits=20, decimal_places=4))
+    rows = StockBalance.objects.order_by().values('warehouse', 'item__category').annotate(value=Sum(value))
+    StockValuation.objects.bulk_create(
+        StockValuation(warehouse_id=row['warehouse'], category=row['item__category'], value=row['value'], updated_at=now)
+        for row in rows
+    )
+
+
+def clear_valuation(apps, schema_editor):
+    apps.get_model('inventory', 'StockValuation').objects.all().delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0015_stock_valuation'),
+    ]
+
+    operations = [
+        migrations.RunPython(seed_valuation, clear_valuation),
+    ]
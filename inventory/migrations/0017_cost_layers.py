@@ -0,0 +1,55 @@
+# Generated by Django 5.2.7 on 2026-10-18 07:15
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0016_seed_stock_valuation'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CostLayer',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('remaining', models.DecimalField(decimal_places=2, max_digits=12)),
+                ('unit_cost', models.DecimalField(decimal_places=4, max_digits=14)),
+                ('received_at', models.DateTimeField()),
+            ],
+            options={
+                'ordering': ['item', 'id'],
+            },
+        ),
+        migrations.AddField(
+            model_name='inventoryitem',
+            name='costing_method',
+            field=models.CharField(choices=[('fifo', 'FIFO'), ('average', 'Moving average')], default='fifo', help_text="How issues are costed from the receipts' cost layers", max_length=10),
+        ),
+        migrations.AddField(
+            model_name='stockmovement',
+            name='unit_cost',
+            field=models.DecimalField(blank=True, decimal_places=4, help_text='Cost per unit of stock coming in; empty for issues and transfers', max_digits=14, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='stockmovement',
+            index=models.Index(fields=['item', 'id'], name='stock_move_item_idx'),
+        ),
+        migrations.AddField(
+            model_name='costlayer',
+            name='item',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='cost_layers', to='inventory.inventoryitem'),
+        ),
+        migrations.AddIndex(
+            model_name='costlayer',
+            index=models.Index(fields=['item', 'id'], name='cost_layer_item_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='costlayer',
+            constraint=models.CheckConstraint(condition=models.Q(('remaining__gt', 0)), name='cost_layer_remaining_positive'),
+        ),
+    ]
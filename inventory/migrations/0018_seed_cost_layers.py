@@ -0,0 +1,48 @@
+# Generated by Django 5.2.7 on 2026-10-18 07:18
+
+from django.db import migrations
+from django.db.models import OuterRef, Subquery
+from django.utils import timezone
+
+
+BATCH_SIZE = 1000
+
+
+def seed_cost_layers(apps, schema_editor):
+    """
+    Cost the stock already in the ledger at the items' unit prices: incoming
+    movements get the unit_price as their unit_cost, and each item with stock
+    gets one layer for its on-hand (what replaying those movements gives).
+    """
+    InventoryItem = apps.get_model('inventory', 'InventoryItem')
+    StockMovement = apps.get_model('inventory', 'StockMovement')
+    CostLayer = apps.get_model('inventory', 'CostLayer')
+
+    StockMovement.objects.filter(quantity__gt=0, unit_cost__isnull=True).exclude(
+        movement_type__in=['transfer_in', 'transfer_out'],
+    ).update(unit_cost=Subquery(InventoryItem.objects.filter(pk=OuterRef('item')).values('unit_price')[:1]))
+
+    now = timezone.now()
+    rows = InventoryItem.objects.filter(quantity_on_hand__gt=0).values_list('pk', 'quantity_on_hand', 'unit_price')
+    batch = []
+    for item_id, quantity, unit_price in rows.iterator(chunk_size=BATCH_SIZE):
+        batch.append(CostLayer(item_id=item_id, remaining=quantity, unit_cost=unit_price, received_at=now))
+        if len(batch) == BATCH_SIZE:
+            CostLayer.objects.bulk_create(batch)
+            batch = []
+    CostLayer.objects.bulk_create(batch)
+
+
+def clear_cost_layers(apps, schema_editor):
+    apps.get_model('inventory', 'CostLayer').objects.all().delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0017_cost_layers'),
+    ]
+
+    operations = [
+        migrations.RunPython(seed_cost_layers, clear_cost_layers),
+    ]
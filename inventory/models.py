@@ -1,7 +1,44 @@
+from decimal import Decimal
+
 from django.db import models
+from django.db.models import Count, F, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
 from django.contrib.auth.models import User
 from django.utils import timezone
 
+from common.numbering import next_number
+from core.models import link_project
+
+
+class MaterialRequestQuerySet(models.QuerySet):
+    """Query helpers shared by the request list, purchase and detail views"""
+    
+    def with_totals(self):
+        """
+        Annotate item count and estimated cost so the properties below need no extra queries.
+        Correlated subqueries rather than a join + GROUP BY, so a sliced page only sums its own rows.
+        """
+        items = MaterialRequestItem.objects.filter(request=OuterRef('pk')).order_by().values('request')
+        return self.annotate(
+            annotated_total_cost=Coalesce(
+                Subquery(items.annotate(total=Sum(F('quantity') * F('estimated_unit_price'))).values('total')),
+                Value(Decimal('0')),
+                output_field=models.DecimalField(max_digits=20, decimal_places=4),
+            ),
+            annotated_items_count=Coalesce(
+                Subquery(items.annotate(count=Count('pk')).values('count')),
+                Value(0),
+            ),
+        )
+    
+    def for_purchasing(self):
+        """Requests on the purchase page: approved by the engineer, whatever their purchase status"""
+        return self.filter(status='approved')
+    
+    def for_listing(self):
+        """Join every user the list templates display and annotate totals, all in the page query"""
+        return self.select_related('requested_by', 'approved_by', 'purchase_approved_by').with_totals()
+
 
 class MaterialRequest(models.Model):
     """Material Purchase Request for construction projects"""
@@ -33,6 +70,7 @@ class MaterialRequest(models.Model):
     
     # Project Information
     project_name = models.CharField(max_length=200)
+    project = models.ForeignKey('core.Project', on_delete=models.SET_NULL, null=True, blank=True, related_name='material_requests')
     project_location = models.TextField()
     site_supervisor = models.CharField(max_length=100)
     
@@ -54,27 +92,41 @@ class MaterialRequest(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    objects = MaterialRequestQuerySet.as_manager()
+    
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['-created_at', '-id'], name='req_created_idx'),
+            models.Index(fields=['status', '-created_at', '-id'], name='req_status_created_idx'),
+            # Facets and sort keys of the Request List and Purchase pages (inventory.filters)
+            models.Index(fields=['status', 'purchase_status', '-created_at', '-id'], name='req_purchase_created_idx'),
+            models.Index(fields=['priority', '-created_at', '-id'], name='req_priority_created_idx'),
+            models.Index(fields=['requested_by', '-created_at', '-id'], name='req_requester_created_idx'),
+            models.Index(fields=['delivery_date_needed', 'id'], name='req_needed_idx'),
+            # MAX(updated_at) validates cached Request List and Purchase pages
+            models.Index(fields=['updated_at'], name='req_updated_idx'),
+        ]
         
     def __str__(self):
         return f"Request {self.request_number} - {self.project_name}"
     
     def save(self, *args, **kwargs):
         if not self.request_number:
-            # Generate request number: REQ-YYYYMMDD-XXX
-            today = timezone.now().date()
-            date_str = today.strftime('%Y%m%d')
-            count = MaterialRequest.objects.filter(created_at__date=today).count() + 1
-            self.request_number = f"REQ-{date_str}-{count:03d}"
+            self.request_number = next_number('REQ')
+        link_project(self)
         super().save(*args, **kwargs)
     
     @property
     def total_estimated_cost(self):
+        if hasattr(self, 'annotated_total_cost'):
+            return self.annotated_total_cost
         return sum(item.total_cost for item in self.items.all())
     
     @property
     def total_items_count(self):
+        if hasattr(self, 'annotated_items_count'):
+            return self.annotated_items_count
         return self.items.count()
 
 
@@ -126,22 +178,255 @@ class MaterialRequestItem(models.Model):
 class InventoryItem(models.Model):
     """Inventory Master List - tracks all materials in stock"""
     
+    FIFO = 'fifo'
+    AVERAGE = 'average'
+    
+    COSTING_METHOD_CHOICES = [
+        (FIFO, 'FIFO'),
+        (AVERAGE, 'Moving average'),
+    ]
+    
     item_code = models.CharField(max_length=50, unique=True)
     material_name = models.CharField(max_length=200)
     category = models.CharField(max_length=100)
     unit = models.CharField(max_length=50)
+    # Running total of the stock ledger across warehouses; written only by inventory.stock
     quantity_on_hand = models.DecimalField(max_digits=10, decimal_places=2, default=0)
     unit_price = models.DecimalField(max_digits=10, decimal_places=2)
+    costing_method = models.CharField(max_length=10, choices=COSTING_METHOD_CHOICES, default=FIFO,
+                                      help_text="How issues are costed from the receipts' cost layers")
     
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
     class Meta:
         ordering = ['item_code']
+        indexes = [
+            models.Index(fields=['updated_at'], name='inv_item_updated_idx'),
+            # Category facet and sort keys of the Masterlist (inventory.filters)
+            models.Index(fields=['category', 'item_code'], name='inv_item_category_idx'),
+            models.Index(fields=['material_name', 'id'], name='inv_item_name_idx'),
+            models.Index(fields=['quantity_on_hand', 'item_code'], name='inv_item_stock_idx'),
+        ]
     
     def __str__(self):
         return f"{self.item_code} - {self.material_name}"
     
+    def save(self, *args, **kwargs):
+        # Saving an item loaded before a posting must not write its stale quantity back over the ledger's UPDATE
+        if not self._state.adding and kwargs.get('update_fields') is None:
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name != 'quantity_on_hand'
+            ]
+        super().save(*args, **kwargs)
+    
     @property
     def total_value(self):
         return self.quantity_on_hand * self.unit_price
+
+
+class Warehouse(models.Model):
+    """A place stock is kept: a warehouse, depot or project site"""
+    
+    DEFAULT_CODE = 'MAIN'
+    DEFAULT_NAME = 'Main Warehouse - Quezon City'
+    
+    code = models.CharField(max_length=20, unique=True)
+    name = models.CharField(max_length=200, unique=True)
+    is_active = models.BooleanField(default=True)
+    
+    class Meta:
+        ordering = ['name']
+    
+    def __str__(self):
+        return self.name
+    
+    @classmethod
+    def default(cls):
+        """The warehouse stock is booked to when a source doesn't say, e.g. imports and opening balances"""
+        return cls.objects.get_or_create(code=cls.DEFAULT_CODE, defaults={'name': cls.DEFAULT_NAME})[0]
+
+
+class StockMovement(models.Model):
+    """One line of the append-only stock ledger; quantity is signed, positive into the warehouse"""
+    
+    RECEIPT = 'receipt'
+    ISSUE = 'issue'
+    TRANSFER_IN = 'transfer_in'
+    TRANSFER_OUT = 'transfer_out'
+    ADJUSTMENT = 'adjustment'
+    
+    MOVEMENT_TYPE_CHOICES = [
+        (RECEIPT, 'Receipt'),
+        (ISSUE, 'Issue'),
+        (TRANSFER_IN, 'Transfer In'),
+        (TRANSFER_OUT, 'Transfer Out'),
+        (ADJUSTMENT, 'Adjustment'),
+    ]
+    
+    item = models.ForeignKey(InventoryItem, on_delete=models.PROTECT, related_name='movements')
+    warehouse = models.ForeignKey(Warehouse, on_delete=models.PROTECT, related_name='movements')
+    movement_type = models.CharField(max_length=15, choices=MOVEMENT_TYPE_CHOICES)
+    quantity = models.DecimalField(max_digits=12, decimal_places=2)
+    batch = models.CharField(max_length=100, blank=True, help_text="Batch or serial number; blank for unbatched stock")
+    unit_cost = models.DecimalField(max_digits=14, decimal_places=4, null=True, blank=True,
+                                    help_text="Cost per unit of stock coming in; empty for issues and transfers")
+    reference = models.CharField(max_length=50, blank=True, help_text="Document number, e.g. a delivery note")
+    remarks = models.CharField(max_length=200, blank=True)
+    created_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='stock_movements')
+    created_at = models.DateTimeField(default=timezone.now)
+    
+    class Meta:
+        ordering = ['id']
+        indexes = [
+            # On-hand per item and warehouse: the movements after a checkpoint are one range scan
+            models.Index(fields=['item', 'warehouse', 'id'], name='stock_move_item_wh_idx'),
+            # Month-end valuation replays each item's movements in order (inventory.costing)
+            models.Index(fields=['item', 'id'], name='stock_move_item_idx'),
+            models.Index(fields=['reference'], name='stock_move_reference_idx'),
+        ]
+        constraints = [
+            models.CheckConstraint(condition=~models.Q(quantity=0), name='stock_movement_nonzero'),
+        ]
+    
+    def __str__(self):
+        return f"{self.get_movement_type_display()} {self.quantity} {self.item_id} @ {self.warehouse_id}"
+    
+    def save(self, *args, **kwargs):
+        if not self._state.adding:
+            raise ValueError('Stock movements are append-only; post a correcting movement instead')
+        super().save(*args, **kwargs)
+    
+    def delete(self, *args, **kwargs):
+        raise ValueError('Stock movements are append-only; post a correcting movement instead')
+
+
+class StockCheckpoint(models.Model):
+    """On-hand of an item in a warehouse counting every movement up to and including `movement_id`"""
+    
+    item = models.ForeignKey(InventoryItem, on_delete=models.CASCADE, related_name='stock_checkpoints')
+    warehouse = models.ForeignKey(Warehouse, on_delete=models.CASCADE, related_name='stock_checkpoints')
+    movement_id = models.BigIntegerField()
+    quantity = models.DecimalField(max_digits=14, decimal_places=2)
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['item', 'warehouse', 'movement_id'], name='unique_stock_checkpoint'),
+        ]
+        indexes = [
+            # Where the last checkpoint run stopped
+            models.Index(fields=['movement_id'], name='stock_ckpt_position_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.item_id} @ {self.warehouse_id} as of #{self.movement_id}: {self.quantity}"
+
+
+class StockBalance(models.Model):
+    """Current quantity of one batch of an item in a warehouse, kept by inventory.stock.post()"""
+    
+    item = models.ForeignKey(InventoryItem, on_delete=models.CASCADE, related_name='stock_balances')
+    warehouse = models.ForeignKey(Warehouse, on_delete=models.CASCADE, related_name='stock_balances')
+    batch = models.CharField(max_length=100, blank=True)
+    quantity = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['item', 'warehouse', 'batch'], name='unique_stock_balance'),
+        ]
+        indexes = [
+            models.Index(fields=['warehouse', 'item'], name='stock_balance_wh_item_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.item_id} @ {self.warehouse_id} [{self.batch or '-'}]: {self.quantity}"
+
+
+class CostLayer(models.Model):
+    """
+    Stock of an item still on hand at what it cost, kept by inventory.costing:
+    one layer per receipt consumed oldest first (FIFO), or a single layer at
+    the moving average cost. Consumed layers are deleted.
+    """
+    
+    item = models.ForeignKey(InventoryItem, on_delete=models.CASCADE, related_name='cost_layers')
+    remaining = models.DecimalField(max_digits=12, decimal_places=2)
+    unit_cost = models.DecimalField(max_digits=14, decimal_places=4)
+    received_at = models.DateTimeField()
+    
+    class Meta:
+        ordering = ['item', 'id']
+        indexes = [
+            models.Index(fields=['item', 'id'], name='cost_layer_item_idx'),
+        ]
+        constraints = [
+            models.CheckConstraint(condition=models.Q(remaining__gt=0), name='cost_layer_remaining_positive'),
+        ]
+    
+    def __str__(self):
+        return f"{self.item_id}: {self.remaining} @ ₱{self.unit_cost}"
+
+
+class StockValuation(models.Model):
+    """Value of one category's stock in a warehouse at the items' unit prices, kept by inventory.valuation"""
+    
+    warehouse = models.ForeignKey(Warehouse, on_delete=models.CASCADE, related_name='valuations')
+    category = models.CharField(max_length=100)
+    # Sums of quantity x unit_price, kept to 4 places so deltas add up to exactly what a rebuild gives
+    value = models.DecimalField(max_digits=20, decimal_places=4, default=0)
+    updated_at = models.DateTimeField(default=timezone.now)
+    
+    class Meta:
+        ordering = ['warehouse', 'category']
+        constraints = [
+            models.UniqueConstraint(fields=['warehouse', 'category'], name='unique_stock_valuation'),
+        ]
+    
+    def __str__(self):
+        return f"{self.category} @ {self.warehouse_id}: ₱{self.value}"
+
+
+class DeliveryNote(models.Model):
+    """Materials delivered from one warehouse to another, posted to the stock ledger as a transfer"""
+    
+    delivery_number = models.CharField(max_length=50, unique=True, blank=True)
+    delivery_date = models.DateField()
+    source_warehouse = models.ForeignKey(Warehouse, on_delete=models.PROTECT, related_name='outgoing_deliveries')
+    destination_warehouse = models.ForeignKey(Warehouse, on_delete=models.PROTECT, related_name='incoming_deliveries')
+    driver_name = models.CharField(max_length=100)
+    vehicle_number = models.CharField(max_length=30)
+    remarks = models.TextField(blank=True)
+    created_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='delivery_notes')
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['-created_at', '-id'], name='delivery_created_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.delivery_number}: {self.source_warehouse} -> {self.destination_warehouse}"
+    
+    def save(self, *args, **kwargs):
+        if not self.delivery_number:
+            self.delivery_number = next_number('DN')
+        super().save(*args, **kwargs)
+
+
+class DeliveryNoteLine(models.Model):
+    """One material on a delivery note"""
+    
+    delivery_note = models.ForeignKey(DeliveryNote, on_delete=models.CASCADE, related_name='lines')
+    item = models.ForeignKey(InventoryItem, on_delete=models.PROTECT, related_name='delivery_lines')
+    quantity = models.DecimalField(max_digits=12, decimal_places=2)
+    unit = models.CharField(max_length=20)
+    batch = models.CharField(max_length=100, blank=True)
+    
+    class Meta:
+        ordering = ['id']
+    
+    def __str__(self):
+        return f"{self.item_id} x {self.quantity} {self.unit}"
@@ -0,0 +1,11 @@
+"""Search definitions for the Masterlist and Request List (see common.search)"""
+from common.search import Search
+
+from .models import InventoryItem, MaterialRequest
+
+
+# Columns in ranking order: matches at the start of an earlier column rank higher
+INVENTORY_ITEM_SEARCH = Search(InventoryItem, ('item_code', 'material_name', 'category'))
+MATERIAL_REQUEST_SEARCH = Search(MaterialRequest, ('request_number', 'project_name', 'site_supervisor'))
+
+SEARCHES = (INVENTORY_ITEM_SEARCH, MATERIAL_REQUEST_SEARCH)
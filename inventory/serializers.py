@@ -0,0 +1,89 @@
+"""
+JSON payloads for MaterialRequest, built from .values() rows.
+
+A batch of requests costs two queries no matter its size: one for the request
+rows with the three users joined in, and one for all of their items.
+"""
+from collections import defaultdict
+
+from .models import MaterialRequest, MaterialRequestItem
+
+
+DATE_FORMAT = '%b %d, %Y'
+
+USER_FIELDS = ('requested_by', 'approved_by', 'purchase_approved_by')
+
+REQUEST_FIELDS = (
+    'id', 'request_number', 'project_name', 'project_location', 'site_supervisor', 'purpose',
+    'created_at', 'delivery_date_needed', 'status', 'purchase_status', 'remarks',
+    'approved_date', 'purchase_approved_date', 'updated_at',
+) + tuple(
+    f'{user}__{field}' for user in USER_FIELDS for field in ('username', 'first_name', 'last_name')
+)
+
+ITEM_FIELDS = ('request_id', 'material_name', 'quantity', 'estimated_unit_price')
+
+STATUS_DISPLAY = dict(MaterialRequest.STATUS_CHOICES)
+PURCHASE_STATUS_DISPLAY = dict(MaterialRequest.PURCHASE_STATUS_CHOICES)
+
+
+def _display_date(value):
+    return value.strftime(DATE_FORMAT) if value else None
+
+
+def _display_user(row, prefix):
+    """Same as User.get_full_name() or username, from joined columns"""
+    username = row[f'{prefix}__username']
+    if username is None:
+        return None
+    full_name = f"{row[f'{prefix}__first_name']} {row[f'{prefix}__last_name']}".strip()
+    return full_name or username
+
+
+def serialize_request(row, items):
+    """Build the details payload for one request row and its item rows"""
+    return {
+        'request_number': row['request_number'],
+        'requested_by': _display_user(row, 'requested_by'),
+        'project_name': row['project_name'],
+        'site_supervisor': row['site_supervisor'],
+        'purpose': row['purpose'],
+        'created_at': _display_date(row['created_at']),
+        'project_location': row['project_location'],
+        'delivery_date_needed': _display_date(row['delivery_date_needed']),
+        'status': STATUS_DISPLAY.get(row['status'], row['status']),
+        'purchase_status': row['purchase_status'],
+        'purchase_status_display': PURCHASE_STATUS_DISPLAY.get(row['purchase_status'], row['purchase_status']),
+        'rejection_reason': row['remarks'] if row['purchase_status'] == 'rejected' else None,
+        'approved_by': _display_user(row, 'approved_by'),
+        'approved_date': _display_date(row['approved_date']),
+        'purchase_approved_by': _display_user(row, 'purchase_approved_by'),
+        'purchase_approved_date': _display_date(row['purchase_approved_date']),
+        'items': [
+            {
+                'material_name': item['material_name'],
+                'quantity': float(item['quantity']),
+                'estimated_unit_price': float(item['estimated_unit_price']),
+            }
+            for item in items
+        ],
+    }
+
+
+def request_payloads(request_ids):
+    """Mapping of request id -> details payload for every existing id in `request_ids`"""
+    rows = list(MaterialRequest.objects.filter(id__in=request_ids).order_by().values(*REQUEST_FIELDS))
+    if not rows:
+        return {}
+
+    items_by_request = defaultdict(list)
+    items = MaterialRequestItem.objects.filter(request_id__in=[row['id'] for row in rows])
+    for item in items.order_by('request_id', 'created_at', 'id').values(*ITEM_FIELDS):
+        items_by_request[item['request_id']].append(item)
+
+    return {row['id']: serialize_request(row, items_by_request[row['id']]) for row in rows}
+
+
+def request_payload(request_id):
+    """Details payload for one request, or None if it doesn't exist"""
+    return request_payloads([request_id]).get(request_id)
@@ -0,0 +1,51 @@
+from decimal import Decimal
+
+from django.db import connections
+from django.db.models.signals import post_init, post_migrate, post_save, pre_save
+
+from . import valuation
+from .models import InventoryItem
+
+
+VALUATION_FIELDS = {'category', 'unit_price'}
+
+
+def install_search_tables(sender, using, **kwargs):
+    """Create the SQLite FTS5 search tables and triggers; a no-op on other databases"""
+    from .search import SEARCHES
+    
+    for search in SEARCHES:
+        search.install(connections[using])
+
+
+def remember_price(sender, instance, **kwargs):
+    """Snapshot items loaded from the database so a save can re-value their stock"""
+    # Don't trigger extra queries for rows loaded with .only()/.defer()
+    if VALUATION_FIELDS & instance.get_deferred_fields():
+        return
+    instance._valuation_state = (instance.category, instance.unit_price)
+
+
+def load_missing_price(sender, instance, **kwargs):
+    """Fetch the stored category and price when the item was loaded without them"""
+    if instance._state.adding or hasattr(instance, '_valuation_state'):
+        return
+    instance._valuation_state = sender.objects.filter(pk=instance.pk).values_list('category', 'unit_price').first()
+
+
+def revalue_on_save(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    old_state = None if created else getattr(instance, '_valuation_state', None)
+    new_state = (instance.category, Decimal(str(instance.unit_price)))
+    # A new item has no stock yet; its first movements are valued by stock.post()
+    if old_state is not None:
+        valuation.reprice({instance.pk: (old_state, new_state)})
+    instance._valuation_state = new_state
+
+
+def connect(app_config):
+    post_migrate.connect(install_search_tables, sender=app_config, dispatch_uid='inventory_search_tables')
+    post_init.connect(remember_price, sender=InventoryItem, dispatch_uid='inventory_item_remember_price')
+    pre_save.connect(load_missing_price, sender=InventoryItem, dispatch_uid='inventory_item_load_missing_price')
+    post_save.connect(revalue_on_save, sender=InventoryItem, dispatch_uid='inventory_item_revalue')
@@ -0,0 +1,297 @@
+"""
+The stock ledger: every change to stock is an appended StockMovement.
+
+post() writes a set of movements with one bulk INSERT, in one transaction
+with two derived updates:
+
+- the net change per item goes to InventoryItem.quantity_on_hand, one UPDATE
+  per chunk of items (quantity_on_hand + CASE id WHEN ... END);
+- the net change per item, warehouse and batch goes to StockBalance, one
+  INSERT ... ON CONFLICT DO UPDATE SET quantity = quantity + excluded.quantity
+  per chunk of balances (the same upsert common.numbering uses);
+- the change in value per warehouse and category goes to StockValuation
+  (see inventory.valuation);
+- receipts add cost layers and issues consume them (see inventory.costing).
+
+The database does the arithmetic, so concurrent postings can't overwrite each
+other's changes, and a posting costs a handful of statements however many
+lines it has. quantity_on_hand and StockBalance are kept by the ledger and
+nothing else writes them.
+
+Per-warehouse on-hand is read as the latest StockCheckpoint plus the
+movements after it, an index range scan on (item, warehouse, id), rather
+than a sum over the whole history. `manage.py checkpoint_stock` (run
+periodically) writes checkpoints for every item and warehouse that moved
+since the last run. It can also rebuild quantity_on_hand and the balances
+from the ledger after raw SQL or other writes that bypassed post().
+"""
+import datetime
+from decimal import Decimal
+
+from django.db import IntegrityError, connection, transaction
+from django.db.models import Case, DecimalField, F, Max, OuterRef, Subquery, Sum, Value, When
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from . import costing, valuation
+from .models import InventoryItem, StockBalance, StockCheckpoint, StockMovement, Warehouse
+
+
+UPDATE_CHUNK_SIZE = 500
+INSERT_BATCH_SIZE = 1000
+
+# Movements this recent are left for the next checkpoint run, so a posting that
+# took its id before a faster one but commits after it is never skipped
+CHECKPOINT_LAG = datetime.timedelta(minutes=5)
+
+OPENING_REFERENCE = 'OPENING'
+
+ZERO = Decimal('0')
+
+
+def _apply_deltas(deltas, now):
+    """quantity_on_hand += delta per item id, as F() updates over chunks of items"""
+    item_ids = sorted(deltas)
+    for start in range(0, len(item_ids), UPDATE_CHUNK_SIZE):
+        chunk = item_ids[start:start + UPDATE_CHUNK_SIZE]
+        delta = Case(
+            *[When(pk=item_id, then=Value(deltas[item_id])) for item_id in chunk],
+            output_field=DecimalField(max_digits=12, decimal_places=2),
+        )
+        InventoryItem.objects.filter(pk__in=chunk).update(quantity_on_hand=F('quantity_on_hand') + delta, updated_at=now)
+
+
+def _upsert_balances(changes):
+    """StockBalance.quantity += delta per (item id, warehouse id, batch), one statement per chunk"""
+    table = connection.ops.quote_name(StockBalance._meta.db_table)
+    keys = sorted(changes)
+    for start in range(0, len(keys), UPDATE_CHUNK_SIZE):
+        chunk = keys[start:start + UPDATE_CHUNK_SIZE]
+        values = ', '.join(['(%s, %s, %s, %s)'] * len(chunk))
+        params = [value for key in chunk for value in (*key, changes[key])]
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"INSERT INTO {table} (item_id, warehouse_id, batch, quantity) VALUES {values} "
+                f"ON CONFLICT (item_id, warehouse_id, batch) DO UPDATE SET quantity = {table}.quantity + excluded.quantity",
+                params,
+            )
+
+
+def _bump_balances(changes):
+    """Fallback for backends without upsert: update each balance, creating it when missing"""
+    for (item_id, warehouse_id, batch), delta in sorted(changes.items()):
+        balance = StockBalance.objects.filter(item_id=item_id, warehouse_id=warehouse_id, batch=batch)
+        if balance.update(quantity=F('quantity') + delta):
+            continue
+        try:
+            with transaction.atomic():
+                StockBalance.objects.create(item_id=item_id, warehouse_id=warehouse_id, batch=batch, quantity=delta)
+        except IntegrityError:
+            # Another posting created the row first; apply the delta to it instead
+            balance.update(quantity=F('quantity') + delta)
+
+
+def _apply_balances(changes):
+    changes = {key: delta for key, delta in changes.items() if delta}
+    if connection.features.supports_update_conflicts_with_target:
+        _upsert_balances(changes)
+    else:
+        _bump_balances(changes)
+
+
+def post(movements):
+    """
+    Append unsaved StockMovements to the ledger and update the items' totals
+    and the warehouse balances.
+
+    Rows are updated in key order, so postings that share items lock them in
+    the same order and can't deadlock.
+    """
+    movements = [movement for movement in movements if movement.quantity]
+    if not movements:
+        return []
+    totals = {}
+    balances = {}
+    for movement in movements:
+        totals[movement.item_id] = totals.get(movement.item_id, ZERO) + movement.quantity
+        key = (movement.item_id, movement.warehouse_id, movement.batch)
+        balances[key] = balances.get(key, ZERO) + movement.quantity
+    with transaction.atomic():
+        # Locked so a price change can't land between reading the price and valuing the movements with it,
+        # and so postings of the same item consume its cost layers one after the other
+        rows = InventoryItem.objects.select_for_update().filter(pk__in=totals).order_by('pk').values_list(
+            'pk', 'category', 'unit_price', 'costing_method', 'quantity_on_hand',
+        )
+        prices, costs = {}, {}
+        for item_id, category, unit_price, costing_method, on_hand in rows:
+            prices[item_id] = (category, unit_price)
+            costs[item_id] = (costing_method, unit_price, on_hand)
+        # Before the INSERT, which stores the unit costs it fills in
+        costing.apply(movements, costs)
+        created = StockMovement.objects.bulk_create(movements, batch_size=INSERT_BATCH_SIZE)
+        # A transfer leaves the item's total unchanged: no UPDATE for it
+        _apply_deltas({item_id: delta for item_id, delta in totals.items() if delta}, timezone.now())
+        _apply_balances(balances)
+        valuation.apply_movements(movements, prices)
+    return created
+
+
+def shortages(warehouse, item_ids):
+    """{item id: quantity} for the given items whose total across batches in `warehouse` is below zero"""
+    rows = StockBalance.objects.filter(warehouse=warehouse, item_id__in=item_ids).order_by().values('item').annotate(
+        total=Sum('quantity'),
+    ).filter(total__lt=0)
+    return {row['item']: row['total'] for row in rows}
+
+
+def batch_shortages(warehouse, keys):
+    """{(item id, batch): quantity} for the given (item id, batch) balances in `warehouse` that are below zero"""
+    keys = set(keys)
+    if not keys:
+        return {}
+    rows = StockBalance.objects.filter(
+        warehouse=warehouse, item_id__in={item_id for item_id, _ in keys}, batch__in={batch for _, batch in keys},
+        quantity__lt=0,
+    ).values_list('item', 'batch', 'quantity')
+    return {(item_id, batch): quantity for item_id, batch, quantity in rows if (item_id, batch) in keys}
+
+
+def receive(item, warehouse, quantity, **details):
+    """Stock arriving from outside, e.g. a supplier delivery; pass unit_cost= for what it cost, else the unit_price"""
+    return post([StockMovement(item=item, warehouse=warehouse, movement_type=StockMovement.RECEIPT,
+                               quantity=quantity, **details)])
+
+
+def issue(item, warehouse, quantity, **details):
+    """Stock leaving for use, e.g. materials released to a project"""
+    return post([StockMovement(item=item, warehouse=warehouse, movement_type=StockMovement.ISSUE,
+                               quantity=-quantity, **details)])
+
+
+def transfer(item, source, destination, quantity, **details):
+    """Move stock between warehouses; the item's total is unchanged"""
+    return post([
+        StockMovement(item=item, warehouse=source, movement_type=StockMovement.TRANSFER_OUT,
+                      quantity=-quantity, **details),
+        StockMovement(item=item, warehouse=destination, movement_type=StockMovement.TRANSFER_IN,
+                      quantity=quantity, **details),
+    ])
+
+
+def adjust(item, warehouse, counted, **details):
+    """Book the difference between a physical count and the ledger's on-hand"""
+    with transaction.atomic():
+        # Serialize counts of the same item so two adjustments can't both book the same difference
+        InventoryItem.objects.select_for_update().filter(pk=item.pk).first()
+        difference = counted - on_hand(item, warehouse)
+        return post([StockMovement(item=item, warehouse=warehouse, movement_type=StockMovement.ADJUSTMENT,
+                                   quantity=difference, **details)])
+
+
+def on_hand(item, warehouse):
+    """Quantity of `item` in `warehouse`: the latest checkpoint plus the movements after it"""
+    position, quantity = StockCheckpoint.objects.filter(item=item, warehouse=warehouse).order_by(
+        '-movement_id',
+    ).values_list('movement_id', 'quantity').first() or (0, ZERO)
+    delta = StockMovement.objects.filter(item=item, warehouse=warehouse, id__gt=position).aggregate(
+        total=Sum('quantity'),
+    )['total']
+    return quantity + (delta or ZERO)
+
+
+def record_opening_balances(items, warehouse=None, user=None):
+    """
+    Write the quantity_on_hand of items that have no movements yet to the ledger
+    (and the warehouse's balances and value, and cost layers at the unit price)
+    as opening adjustments, without changing it. For items created with stock
+    directly, e.g. by seeding commands and bulk_create.
+    """
+    warehouse = warehouse or Warehouse.default()
+    pending = items.filter(movements__isnull=True).exclude(quantity_on_hand=0).order_by('pk')
+    recorded = 0
+    now = timezone.now()
+    with transaction.atomic():
+        while True:
+            # Items recorded by the previous batch drop out of `pending`, so each batch starts from the front
+            rows = list(pending.values_list(
+                'pk', 'quantity_on_hand', 'category', 'unit_price', 'costing_method',
+            )[:INSERT_BATCH_SIZE])
+            prices = {item_id: (category, unit_price) for item_id, _, category, unit_price, _ in rows}
+            batch = [
+                StockMovement(item_id=item_id, warehouse=warehouse, movement_type=StockMovement.ADJUSTMENT,
+                              quantity=quantity, reference=OPENING_REFERENCE, created_by=user, created_at=now)
+                for item_id, quantity, _, _, _ in rows
+            ]
+            if not batch:
+                return recorded
+            # Items without movements have no cost layers yet: opening stock is costed from zero
+            costing.apply(batch, {
+                item_id: (costing_method, unit_price, ZERO) for item_id, _, _, unit_price, costing_method in rows
+            })
+            StockMovement.objects.bulk_create(batch)
+            _apply_balances({(movement.item_id, warehouse.pk, ''): movement.quantity for movement in batch})
+            valuation.apply_movements(batch, prices)
+            recorded += len(batch)
+
+
+def checkpoint(lag=CHECKPOINT_LAG):
+    """
+    Write a checkpoint for every (item, warehouse) with movements since the
+    previous run. Returns the number of checkpoints written.
+
+    Each run covers the movements after the previous run's position, up to the
+    newest movement older than `lag`. Every pair that moved in that window gets
+    a checkpoint, so each pair's latest checkpoint plus the window's movements
+    is its new on-hand.
+    """
+    with transaction.atomic():
+        previous = StockCheckpoint.objects.aggregate(position=Max('movement_id'))['position'] or 0
+        current = StockMovement.objects.filter(
+            id__gt=previous, created_at__lte=timezone.now() - lag,
+        ).aggregate(position=Max('id'))['position']
+        if current is None:
+            return 0
+        latest = StockCheckpoint.objects.filter(
+            item=OuterRef('item'), warehouse=OuterRef('warehouse'),
+        ).order_by('-movement_id').values('quantity')[:1]
+        window = StockMovement.objects.filter(id__gt=previous, id__lte=current).order_by().values(
+            'item', 'warehouse',
+        ).annotate(
+            delta=Sum('quantity'),
+            checkpoint=Coalesce(Subquery(latest), Value(ZERO), output_field=DecimalField(max_digits=14, decimal_places=2)),
+        )
+        checkpoints = [
+            StockCheckpoint(item_id=row['item'], warehouse_id=row['warehouse'], movement_id=current,
+                            quantity=row['checkpoint'] + row['delta'])
+            for row in window.iterator(chunk_size=INSERT_BATCH_SIZE)
+        ]
+        StockCheckpoint.objects.bulk_create(checkpoints, batch_size=INSERT_BATCH_SIZE)
+    return len(checkpoints)
+
+
+def rebuild_balances():
+    """Recreate StockBalance from the ledger; returns the number of balances"""
+    rows = StockMovement.objects.order_by().values('item', 'warehouse', 'batch').annotate(total=Sum('quantity'))
+    written = 0
+    with transaction.atomic():
+        StockBalance.objects.all().delete()
+        batch = []
+        for row in rows.iterator(chunk_size=INSERT_BATCH_SIZE):
+            batch.append(StockBalance(item_id=row['item'], warehouse_id=row['warehouse'], batch=row['batch'],
+                                      quantity=row['total']))
+            if len(batch) == INSERT_BATCH_SIZE:
+                written += len(StockBalance.objects.bulk_create(batch))
+                batch = []
+        written += len(StockBalance.objects.bulk_create(batch))
+    return written
+
+
+def rebuild_totals():
+    """Recompute every item's quantity_on_hand from the ledger; returns the number of items that were off"""
+    ledger_total = StockMovement.objects.filter(item=OuterRef('pk')).order_by().values('item').annotate(
+        total=Sum('quantity'),
+    ).values('total')
+    total = Coalesce(Subquery(ledger_total), Value(ZERO), output_field=DecimalField(max_digits=12, decimal_places=2))
+    return InventoryItem.objects.alias(ledger_total=total).exclude(quantity_on_hand=F('ledger_total')).update(
+        quantity_on_hand=total, updated_at=timezone.now(),
+    )
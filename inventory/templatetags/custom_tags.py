@@ -1,16 +1,26 @@
 from django import template
-from django.utils import timezone
-from inventory.models import MaterialRequest
+
+from common.numbering import peek_number
 
 register = template.Library()
 
-@register.simple_tag
-def get_next_request_number():
-    """Generate the next request number for new requests"""
-    today = timezone.now().date()
-    date_str = today.strftime('%Y%m%d')
-    
-    # Count existing requests for today
-    count = MaterialRequest.objects.filter(created_at__date=today).count() + 1
-    
-    return f"REQ-{date_str}-{count:03d}"
\ No newline at end of file
+
+@register.simple_tag(takes_context=True)
+def next_document_number(context, prefix):
+    """Preview the next document number for a prefix, looked up once per request"""
+    request = context.get('request')
+    if request is None:
+        return peek_number(prefix)
+
+    cache = getattr(request, '_next_document_numbers', None)
+    if cache is None:
+        cache = request._next_document_numbers = {}
+    if prefix not in cache:
+        cache[prefix] = peek_number(prefix)
+    return cache[prefix]
+
+
+@register.simple_tag(takes_context=True)
+def get_next_request_number(context):
+    """Preview the next request number for new requests"""
+    return next_document_number(context, 'REQ')
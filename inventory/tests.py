@@ -1,3 +1,746 @@
-from django.test import TestCase
+import csv
+import datetime
+import io
+import tempfile
+import zipfile
+from decimal import Decimal
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from . import costing, stock, valuation
+from .models import DeliveryNote, InventoryItem, MaterialRequest, StockBalance, StockMovement, Warehouse
+
+
+# The manifest storage used in production needs collectstatic; tests render templates without it
+TEST_STORAGES = {'staticfiles': {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'}}
+
+
+@override_settings(STORAGES=TEST_STORAGES)
+class ListingQueryCountTests(TestCase):
+    """List pages must cost a fixed number of queries regardless of how many rows they show"""
+
+    # session, user, latest updated_at and total count (page validator), facet counts, page rows
+    QUERIES_PER_PAGE = 6
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='requester', password='secret')
+        for i in range(15):
+            approver = User.objects.create_user(username=f'approver{i}', first_name='Approver', last_name=str(i))
+            purchaser = User.objects.create_user(username=f'purchaser{i}')
+            MaterialRequest.objects.create(
+                requested_by=User.objects.create_user(username=f'requester{i}'),
+                project_name=f'Project {i}',
+                project_location='Site',
+                site_supervisor='Supervisor',
+                purpose='Testing',
+                delivery_date_needed=datetime.date.today(),
+                status='approved',
+                approved_by=approver,
+                purchase_status='approved_for_purchase',
+                purchase_approved_by=purchaser,
+            )
+
+    def setUp(self):
+        self.client.force_login(self.user)
+        cache.clear()
+
+    def assertPageQueries(self, url_name):
+        url = reverse(url_name)
+        with self.assertNumQueries(self.QUERIES_PER_PAGE):
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.context['requests']), 10)
+
+        cache.clear()
+        next_page = response.context['requests'].next_cursor
+        with self.assertNumQueries(self.QUERIES_PER_PAGE):
+            response = self.client.get(url, {'after': next_page})
+        self.assertEqual(len(response.context['requests']), 5)
+
+    def test_request_list_query_count(self):
+        self.assertPageQueries('inventory:request_list')
+
+    def test_purchase_list_query_count(self):
+        self.assertPageQueries('inventory:purchase')
+
+    def test_crafted_cursor_serves_first_page(self):
+        from common.pagination import _encode_cursor
+        url = reverse('inventory:request_list')
+        for values in (['not-a-date', 1], ['2026-01-01T00:00:00+00:00', 'x'], [None, 1], [{}, []]):
+            response = self.client.get(url, {'after': _encode_cursor(values), 'before': _encode_cursor(values)})
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(len(response.context['requests']), 10)
+            self.assertFalse(response.context['requests'].has_previous())
+
+
+class MaterialRequestTotalsTests(TestCase):
+    """with_totals() must agree with the per-instance properties without issuing extra queries"""
+
+    @classmethod
+    def setUpTestData(cls):
+        user = User.objects.create_user(username='requester')
+        fields = dict(requested_by=user, project_location='Site', site_supervisor='Supervisor',
+                      purpose='Testing', delivery_date_needed=datetime.date.today())
+        cls.with_items = MaterialRequest.objects.create(project_name='With items', **fields)
+        cls.with_items.items.create(material_name='Cement', quantity=Decimal('2.50'), unit='bags',
+                                    estimated_unit_price=Decimal('285.25'))
+        cls.with_items.items.create(material_name='Rebar', quantity=Decimal('10'), unit='pcs',
+                                    estimated_unit_price=Decimal('165.00'))
+        cls.empty = MaterialRequest.objects.create(project_name='Empty', **fields)
+
+    def test_annotated_totals_match_properties(self):
+        expected = {
+            request.pk: (request.total_estimated_cost, request.total_items_count)
+            for request in MaterialRequest.objects.all()
+        }
+        with self.assertNumQueries(1):
+            annotated = {
+                request.pk: (request.total_estimated_cost, request.total_items_count)
+                for request in MaterialRequest.objects.with_totals()
+            }
+        self.assertEqual(annotated, expected)
+        self.assertEqual(annotated[self.with_items.pk], (Decimal('2363.125'), 2))
+        self.assertEqual(annotated[self.empty.pk], (0, 0))
+
+    def test_page_query_is_not_grouped(self):
+        # A GROUP BY over the items join would aggregate every request before the LIMIT applies
+        self.assertIsNone(MaterialRequest.objects.for_listing()[:10].query.group_by)
+
+
+class ExportTests(TestCase):
+    """Exports stream the same rows as the list page they belong to"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='requester', first_name='Ana', last_name='Cruz')
+        for i, status in enumerate(['pending', 'approved', 'approved']):
+            request = MaterialRequest.objects.create(
+                requested_by=cls.user, project_name=f'Project {i}', project_location='Site',
+                site_supervisor='Supervisor', purpose='Testing', delivery_date_needed=datetime.date.today(),
+                status=status,
+            )
+            request.items.create(material_name='Cement', quantity=Decimal('2'), unit='bags',
+                                 estimated_unit_price=Decimal('10.50'))
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def test_purchase_csv_matches_purchase_list(self):
+        response = self.client.get(reverse('inventory:purchase_export'))
+        self.assertTrue(response.streaming)
+        rows = list(csv.reader(io.StringIO(b''.join(response.streaming_content).decode('utf-8-sig'))))
+        self.assertEqual(rows[0][:3], ['Request Number', 'Date Requested', 'Requested By'])
+        expected = MaterialRequest.objects.for_purchasing().order_by('-created_at', '-id')
+        self.assertEqual([row[0] for row in rows[1:]], [request.request_number for request in expected])
+        self.assertEqual(rows[1][2], 'Ana Cruz')
+
+    def test_xlsx_is_a_workbook(self):
+        response = self.client.get(reverse('inventory:request_list_export'), {'format': 'xlsx'})
+        workbook = zipfile.ZipFile(io.BytesIO(b''.join(response.streaming_content)))
+        self.assertIsNone(workbook.testzip())
+        self.assertEqual(workbook.read('xl/worksheets/sheet1.xml').count(b'<row '), 4)
+
+
+class ImportInventoryTests(TestCase):
+    """import_inventory upserts on item_code and skips invalid rows"""
+
+    def import_csv(self, content):
+        with tempfile.NamedTemporaryFile('w', suffix='.csv') as source:
+            source.write(content)
+            source.flush()
+            out = io.StringIO()
+            call_command('import_inventory', source.name, stdout=out, stderr=io.StringIO())
+        return out.getvalue()
+
+    def test_creates_updates_and_skips(self):
+        InventoryItem.objects.create(item_code='MAT-001', material_name='Old', category='Old', unit='Bag',
+                                     unit_price=Decimal('1.00'))
+        output = self.import_csv(
+            'Item Code,Material Name,Category,Unit,Quantity on Hand,Unit Price\n'
+            'MAT-001,Portland Cement,Construction Materials,Bag,450,285.00\n'
+            'MAT-002,Steel Rebar,Steel,Piece,,165.00\n'
+            'MAT-003,Sand,Aggregates,Cubic Meter,10,not-a-price\n'
+        )
+        self.assertIn('Created 1, updated 1, skipped 1 invalid', output)
+        cement = InventoryItem.objects.get(item_code='MAT-001')
+        self.assertEqual((cement.material_name, cement.quantity_on_hand), ('Portland Cement', Decimal('450')))
+        self.assertEqual(InventoryItem.objects.get(item_code='MAT-002').quantity_on_hand, 0)
+        self.assertFalse(InventoryItem.objects.filter(item_code='MAT-003').exists())
+        # The counted quantity went through the stock ledger
+        self.assertEqual(list(cement.movements.values_list('movement_type', 'quantity')), [('adjustment', Decimal('450'))])
+
+    def test_stopping_at_max_errors_writes_nothing(self):
+        with tempfile.NamedTemporaryFile('w', suffix='.csv') as source:
+            source.write(
+                'Item Code,Material Name,Category,Unit,Quantity on Hand,Unit Price\n'
+                'MAT-001,Portland Cement,Construction Materials,Bag,450,285.00\n'
+                'MAT-002,Sand,Aggregates,Cubic Meter,10,not-a-price\n'
+            )
+            source.flush()
+            with self.assertRaisesMessage(CommandError, 'Stopped after 1 invalid rows'):
+                call_command('import_inventory', source.name, '--batch-size', '1', '--max-errors', '1',
+                             stdout=io.StringIO(), stderr=io.StringIO())
+        self.assertFalse(InventoryItem.objects.exists())
+        self.assertFalse(StockMovement.objects.exists())
+
+    def test_rows_without_quantity_keep_stock(self):
+        self.import_csv('Item Code,Material Name,Category,Unit,Quantity on Hand,Unit Price\n'
+                        'MAT-001,Portland Cement,Construction Materials,Bag,450,285.00\n')
+        output = self.import_csv('Item Code,Material Name,Category,Unit,Unit Price\n'
+                                 'MAT-001,Portland Cement,Construction Materials,Bag,300.00\n')
+        self.assertIn('updated 1', output)
+        cement = InventoryItem.objects.get(item_code='MAT-001')
+        self.assertEqual((cement.quantity_on_hand, cement.unit_price), (Decimal('450'), Decimal('300.00')))
+        self.assertEqual(cement.movements.count(), 1)
+
+
+@override_settings(STORAGES=TEST_STORAGES)
+class SearchTests(TestCase):
+    """Masterlist and Request List search ranks matches and stays in sync with edits"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='requester')
+        for code, name, category in [
+            ('CEM-100', 'Portland Cement', 'Construction Materials'),
+            ('MAT-200', 'Cement Board', 'Boards'),
+            ('STL-300', 'Steel Rebar 10mm', 'Steel'),
+            ('PNT-400', 'Latex Paint', 'Finishing'),
+        ]:
+            InventoryItem.objects.create(item_code=code, material_name=name, category=category, unit='pcs',
+                                         unit_price=Decimal('1.00'))
+        for i, supervisor in enumerate(['Engr. Santos', 'Engr. Reyes', 'Engr. Santos']):
+            MaterialRequest.objects.create(
+                requested_by=cls.user, project_name=f'Tower {i}', project_location='Site',
+                site_supervisor=supervisor, purpose='Testing', delivery_date_needed=datetime.date.today(),
+            )
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def masterlist_codes(self, query):
+        response = self.client.get(reverse('inventory:masterlist'), {'q': query})
+        return [item.item_code for item in response.context['items']]
+
+    def test_masterlist_ranking(self):
+        self.assertEqual(self.masterlist_codes('CEM-100'), ['CEM-100'])
+        # Prefix matches rank by column: item code, then name; other matches newest first
+        self.assertEqual(self.masterlist_codes('cem'), ['CEM-100', 'MAT-200'])
+        self.assertEqual(self.masterlist_codes('cement'), ['MAT-200', 'CEM-100'])
+        self.assertEqual(self.masterlist_codes('cement board'), ['MAT-200'])
+        # Shorter than a trigram: served by the icontains fallback
+        self.assertEqual(self.masterlist_codes('10'), ['STL-300', 'CEM-100'])
+        self.assertEqual(self.masterlist_codes('steel 10'), ['STL-300'])
+
+    def test_index_follows_updates_and_deletes(self):
+        InventoryItem.objects.filter(item_code='PNT-400').update(material_name='Enamel Paint')
+        InventoryItem.objects.get(item_code='STL-300').delete()
+        self.assertEqual(self.masterlist_codes('enamel'), ['PNT-400'])
+        self.assertEqual(self.masterlist_codes('latex'), [])
+        self.assertEqual(self.masterlist_codes('rebar'), [])
+
+    def test_request_list_search_pages_and_exports(self):
+        url = reverse('inventory:request_list')
+        response = self.client.get(url, {'q': 'santos'})
+        self.assertEqual(response.context['total_requests'], 2)
+        self.assertContains(response, 'Requests matching "santos" (2)')
+
+        number = MaterialRequest.objects.get(project_name='Tower 1').request_number
+        response = self.client.get(url, {'q': number})
+        self.assertEqual([request.request_number for request in response.context['requests']], [number])
+
+        response = self.client.get(reverse('inventory:request_list_export'), {'q': 'santos'})
+        rows = list(csv.reader(io.StringIO(b''.join(response.streaming_content).decode('utf-8-sig'))))
+        self.assertEqual(len(rows), 3)
+
+    def test_ranked_pages(self):
+        from common.pagination import RankedPaginator
+
+        ids = list(InventoryItem.objects.order_by('-item_code').values_list('pk', flat=True))
+        paginator = RankedPaginator(InventoryItem.objects.all(), ids, per_page=3)
+        first = paginator.get_page()
+        second = paginator.get_page(after=first.next_cursor)
+        self.assertEqual([item.pk for item in first], ids[:3])
+        self.assertEqual([item.pk for item in second], ids[3:])
+        self.assertFalse(second.has_next())
+        self.assertEqual([item.pk for item in paginator.get_page(before=second.previous_cursor)], ids[:3])
+
+
+@override_settings(STORAGES=TEST_STORAGES)
+class ListFilterTests(TestCase):
+    """Filters, sort keys and facet counts on the list pages and their exports"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.ana = User.objects.create_user(username='ana', first_name='Ana', last_name='Cruz')
+        cls.ben = User.objects.create_user(username='ben')
+        today = datetime.date.today()
+        for i, (user, status, priority, needed) in enumerate([
+            (cls.ana, 'pending', 'high', 5),
+            (cls.ana, 'approved', 'low', 1),
+            (cls.ben, 'approved', 'high', 3),
+            (cls.ben, 'rejected', 'medium', 2),
+        ]):
+            MaterialRequest.objects.create(
+                requested_by=user, project_name=f'Tower {i}', project_location='Site', site_supervisor='Engr. Santos',
+                purpose='Testing', delivery_date_needed=today + datetime.timedelta(days=needed),
+                status=status, priority=priority,
+            )
+        for code, category, quantity in [('CEM-100', 'Cement', 50), ('CEM-200', 'Cement', 5), ('STL-300', 'Steel', 20)]:
+            InventoryItem.objects.create(item_code=code, material_name=code, category=category, unit='pcs',
+                                         quantity_on_hand=Decimal(quantity), unit_price=Decimal('1.00'))
+
+    def setUp(self):
+        self.client.force_login(self.ana)
+        cache.clear()
+
+    def request_list(self, **params):
+        return self.client.get(reverse('inventory:request_list'), params)
+
+    def facet_counts(self, response, name):
+        for group in response.context['filters'].facets:
+            if group['facet'].name == name:
+                return {option['value']: option['count'] for option in group['options'] if option['count']}
+
+    def test_facets_filter_and_count(self):
+        response = self.request_list(priority='high')
+        self.assertEqual([r.project_name for r in response.context['requests']], ['Tower 2', 'Tower 0'])
+        self.assertEqual(response.context['total_requests'], 2)
+        # A facet's counts ignore its own selection but apply the others'
+        self.assertEqual(self.facet_counts(response, 'priority'), {'high': 2, 'low': 1, 'medium': 1})
+        self.assertEqual(self.facet_counts(response, 'status'), {'pending': 1, 'approved': 1})
+        self.assertEqual(self.facet_counts(response, 'requested_by'), {self.ana.pk: 1, self.ben.pk: 1})
+        self.assertContains(response, 'Ana Cruz (1)')
+
+        response = self.request_list(priority='high', requested_by=self.ben.pk)
+        self.assertEqual([r.project_name for r in response.context['requests']], ['Tower 2'])
+        response = self.request_list(status=['pending', 'rejected'])
+        self.assertEqual(response.context['total_requests'], 2)
+
+    def test_invalid_values_are_ignored(self):
+        response = self.request_list(status='bogus', requested_by='x', sort='nope', **{'from': '2024-13-01'})
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(response.context['filters'].active)
+        self.assertEqual(response.context['total_requests'], 4)
+
+    def test_date_range_and_sort(self):
+        MaterialRequest.objects.filter(project_name='Tower 0').update(
+            created_at=datetime.datetime(2024, 1, 15, 23, 30, tzinfo=datetime.timezone.utc))
+        response = self.request_list(**{'from': '2024-01-01', 'to': '2024-01-31'})
+        self.assertEqual([r.project_name for r in response.context['requests']], ['Tower 0'])
+
+        response = self.request_list(sort='needed')
+        self.assertEqual([r.project_name for r in response.context['requests']],
+                         ['Tower 1', 'Tower 3', 'Tower 2', 'Tower 0'])
+
+    def test_purchase_and_masterlist_filters(self):
+        response = self.client.get(reverse('inventory:purchase'), {'priority': 'high'})
+        self.assertEqual([r.project_name for r in response.context['requests']], ['Tower 2'])
+        self.assertEqual(self.facet_counts(response, 'purchase_status'), {'pending': 1})
+
+        response = self.client.get(reverse('inventory:masterlist'), {'category': 'Cement', 'sort': 'low_stock'})
+        self.assertEqual([item.item_code for item in response.context['items']], ['CEM-200', 'CEM-100'])
+        self.assertEqual(self.facet_counts(response, 'category'), {'Cement': 2, 'Steel': 1})
+        # Search and filters combine
+        response = self.client.get(reverse('inventory:masterlist'), {'q': 'cem', 'category': 'Steel'})
+        self.assertEqual(list(response.context['items']), [])
+
+    def test_exports_follow_filters_and_sort(self):
+        response = self.client.get(reverse('inventory:request_list_export'), {'status': 'approved', 'sort': 'oldest'})
+        rows = list(csv.reader(io.StringIO(b''.join(response.streaming_content).decode('utf-8-sig'))))
+        expected = MaterialRequest.objects.filter(status='approved').order_by('created_at', 'id')
+        self.assertEqual([row[0] for row in rows[1:]], [request.request_number for request in expected])
+
+
+class StockLedgerTests(TestCase):
+    """Stock changes are ledger postings; on-hand is checkpoint plus later movements"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.main = Warehouse.default()
+        cls.site = Warehouse.objects.get(code='SITE-METRO')
+        cls.item = InventoryItem.objects.create(item_code='MAT-001', material_name='Cement', category='Cement',
+                                                unit='bags', unit_price=Decimal('250.00'))
+
+    def quantity(self):
+        return InventoryItem.objects.get(pk=self.item.pk).quantity_on_hand
+
+    def test_postings_update_totals_in_the_database(self):
+        stock.receive(self.item, self.main, Decimal('100'), reference='DN-1')
+        # A stale in-memory quantity_on_hand doesn't matter: the delta is applied by the UPDATE
+        stock.issue(self.item, self.main, Decimal('30'))
+        stock.transfer(self.item, self.main, self.site, Decimal('20'))
+        self.assertEqual(self.quantity(), Decimal('70'))
+        self.assertEqual(stock.on_hand(self.item, self.main), Decimal('50'))
+        self.assertEqual(stock.on_hand(self.item, self.site), Decimal('20'))
+
+        stock.adjust(self.item, self.site, Decimal('18'), remarks='Cycle count')
+        self.assertEqual(stock.on_hand(self.item, self.site), Decimal('18'))
+        self.assertEqual(self.quantity(), Decimal('68'))
+        self.assertEqual(
+            sorted(self.item.stock_balances.values_list('warehouse__code', 'quantity')),
+            [('MAIN', Decimal('50')), ('SITE-METRO', Decimal('18'))],
+        )
+
+    def test_on_hand_reads_checkpoint_plus_delta(self):
+        stock.receive(self.item, self.main, Decimal('100'))
+        stock.issue(self.item, self.main, Decimal('40'))
+        self.assertEqual(stock.checkpoint(lag=datetime.timedelta(0)), 1)
+        self.assertEqual(stock.checkpoint(lag=datetime.timedelta(0)), 0)
+        stock.receive(self.item, self.main, Decimal('5'))
+        with self.assertNumQueries(2):
+            self.assertEqual(stock.on_hand(self.item, self.main), Decimal('65'))
+        self.assertEqual(stock.checkpoint(lag=datetime.timedelta(0)), 1)
+        self.assertEqual(self.item.stock_checkpoints.order_by('-movement_id').first().quantity, Decimal('65'))
+
+    def test_admin_edit_keeps_posted_quantity(self):
+        from django.contrib import admin
+        from django.test import RequestFactory
+
+        model_admin = admin.site._registry[InventoryItem]
+        request = RequestFactory().post('/')
+        item = model_admin.get_object(request, str(self.item.pk))
+        stock.receive(self.item, self.main, Decimal('100'))
+        item.material_name = 'Portland Cement'
+        model_admin.save_model(request, item, form=None, change=True)
+        self.assertEqual(self.quantity(), Decimal('100'))
+        self.assertEqual(InventoryItem.objects.get(pk=self.item.pk).material_name, 'Portland Cement')
+
+    def test_movements_are_append_only(self):
+        movement, = stock.receive(self.item, self.main, Decimal('1'))
+        movement.quantity = Decimal('2')
+        with self.assertRaises(ValueError):
+            movement.save()
+        with self.assertRaises(ValueError):
+            movement.delete()
+
+    def test_opening_balances_and_rebuild(self):
+        InventoryItem.objects.filter(pk=self.item.pk).update(quantity_on_hand=Decimal('12'))
+        self.assertEqual(stock.record_opening_balances(InventoryItem.objects.all()), 1)
+        self.assertEqual(stock.record_opening_balances(InventoryItem.objects.all()), 0)
+        self.assertEqual(self.quantity(), Decimal('12'))
+
+        # A write that bypassed the ledger is undone by rebuilding from it
+        InventoryItem.objects.filter(pk=self.item.pk).update(quantity_on_hand=Decimal('99'))
+        self.assertEqual(stock.rebuild_totals(), 1)
+        self.assertEqual(self.quantity(), Decimal('12'))
+        self.assertEqual(StockMovement.objects.filter(reference=stock.OPENING_REFERENCE).count(), 1)
+        self.assertEqual(list(self.item.stock_balances.values_list('quantity', flat=True)), [Decimal('12')])
+        self.assertEqual(stock.rebuild_balances(), 1)
+
+
+@override_settings(STORAGES=TEST_STORAGES)
+class DeliveryTests(TestCase):
+    """A delivery note posts all its lines as per-warehouse, per-batch transfers in a fixed number of statements"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='storekeeper', password='secret')
+        cls.main = Warehouse.default()
+        cls.site = Warehouse.objects.get(code='SITE-METRO')
+        InventoryItem.objects.bulk_create([
+            InventoryItem(item_code=f'MAT-{i:03}', material_name=f'Material {i}', category='Construction Materials',
+                          unit='bags', unit_price=Decimal('10.00'))
+            for i in range(60)
+        ])
+        cls.items = list(InventoryItem.objects.order_by('item_code'))
+        stock.post([
+            StockMovement(item=item, warehouse=cls.main, movement_type=StockMovement.RECEIPT, quantity=Decimal('100'),
+                          batch='LOT-1')
+            for item in cls.items
+        ])
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def post_delivery(self, materials, **fields):
+        data = {
+            'delivery_date': '2026-10-18',
+            'source_warehouse': self.main.pk,
+            'destination_warehouse': self.site.pk,
+            'driver_name': 'Juan Dela Cruz',
+            'vehicle_number': 'ABC-1234',
+            'material_name[]': [material for material, _, _ in materials],
+            'material_unit[]': ['' for _ in materials],
+            'material_quantity[]': [quantity for _, quantity, _ in materials],
+            'material_batch[]': [batch for _, _, batch in materials],
+            **fields,
+        }
+        return self.client.post(reverse('inventory:delivery'), data, follow=True)
+
+    def test_delivery_form_lists_warehouses(self):
+        response = self.client.get(reverse('inventory:delivery'))
+        self.assertContains(response, f'<option value="{self.site.pk}">Project Site - Metro Tower</option>', html=True)
+
+    def test_posting_cost_does_not_grow_with_lines(self):
+        def statements(count):
+            materials = [(item.item_code, '5', 'LOT-1') for item in self.items[:count]]
+            with CaptureQueriesContext(connection) as context:
+                response = self.post_delivery(materials)
+            self.assertContains(response, 'has been posted')
+            return len(context.captured_queries)
+
+        # 40 lines are 80 movements, still one INSERT under SQLite's 999-parameter limit
+        self.assertEqual(statements(5), statements(40))
+
+    def test_lines_move_stock_between_warehouses_and_batches(self):
+        first, second = self.items[:2]
+        response = self.post_delivery([(first.item_code.lower(), '30', 'LOT-1'), ('Material 1', '2.5', 'LOT-1')])
+        note = DeliveryNote.objects.get()
+        self.assertContains(response, f'Delivery {note.delivery_number} has been posted with 2 material(s).')
+        self.assertEqual(note.lines.count(), 2)
+        self.assertEqual(StockMovement.objects.filter(reference=note.delivery_number).count(), 4)
+        balances = dict(
+            StockBalance.objects.filter(item=first).values_list('warehouse__code', 'quantity')
+        )
+        self.assertEqual(balances, {'MAIN': Decimal('70'), 'SITE-METRO': Decimal('30')})
+        self.assertEqual(stock.on_hand(second, self.site), Decimal('2.5'))
+        # A transfer leaves the item's total alone
+        self.assertEqual(InventoryItem.objects.get(pk=first.pk).quantity_on_hand, Decimal('100'))
+
+    def test_shortage_or_bad_line_rolls_back_the_whole_delivery(self):
+        first, second = self.items[:2]
+        response = self.post_delivery([(first.item_code, '10', 'LOT-1'), (second.item_code, '101', 'LOT-1')])
+        self.assertContains(response, f'does not have enough {second.item_code}')
+        response = self.post_delivery([(first.item_code, '10', ''), ('NO-SUCH-ITEM', '1', '')])
+        self.assertContains(response, 'no single inventory item has the code or name')
+        # Re-rendered with what was entered
+        self.assertContains(response, 'value="NO-SUCH-ITEM"')
+        self.assertFalse(DeliveryNote.objects.exists())
+        self.assertFalse(StockMovement.objects.filter(movement_type=StockMovement.TRANSFER_OUT).exists())
+        self.assertEqual(stock.on_hand(first, self.main), Decimal('100'))
+
+    def test_batch_the_source_does_not_hold_is_rejected(self):
+        first = self.items[0]
+        response = self.post_delivery([(first.item_code, '30', 'LOT-Z')])
+        self.assertContains(response, f'does not have enough {first.item_code} in batch LOT-Z')
+        self.assertFalse(DeliveryNote.objects.exists())
+        self.assertFalse(StockBalance.objects.filter(quantity__lt=0).exists())
+
+        self.post_delivery([(first.item_code, '30', 'LOT-1')])
+        self.assertEqual(DeliveryNote.objects.count(), 1)
+
+    def test_source_and_destination_must_differ(self):
+        response = self.post_delivery([(self.items[0].item_code, '1', '')], destination_warehouse=self.main.pk)
+        self.assertContains(response, 'The destination must differ from the source warehouse.')
+        self.assertFalse(DeliveryNote.objects.exists())
+
+
+@override_settings(STORAGES=TEST_STORAGES)
+class ValuationTests(TestCase):
+    """Stock value per warehouse and category is kept by delta as stock and prices change"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='auditor', password='secret')
+        cls.main = Warehouse.default()
+        cls.site = Warehouse.objects.get(code='SITE-METRO')
+        cls.cement = InventoryItem.objects.create(item_code='MAT-001', material_name='Cement', category='Cement',
+                                                  unit='bags', unit_price=Decimal('250.00'))
+        cls.rebar = InventoryItem.objects.create(item_code='MAT-002', material_name='Rebar', category='Steel',
+                                                 unit='pcs', unit_price=Decimal('150.00'))
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def values(self):
+        totals = valuation.totals()
+        return (
+            totals['total'],
+            {row['code']: row['value'] for row in totals['warehouses'] if row['value']},
+            {row['category']: row['value'] for row in totals['categories'] if row['value']},
+        )
+
+    def test_postings_and_price_changes_update_the_rollups(self):
+        stock.receive(self.cement, self.main, Decimal('10'))
+        stock.receive(self.rebar, self.main, Decimal('4'))
+        stock.transfer(self.cement, self.main, self.site, Decimal('2'))
+        self.assertEqual(self.values(), (
+            Decimal('3100.00'),
+            {'MAIN': Decimal('2600.00'), 'SITE-METRO': Decimal('500.00')},
+            {'Cement': Decimal('2500.00'), 'Steel': Decimal('600.00')},
+        ))
+
+        cement = InventoryItem.objects.get(pk=self.cement.pk)
+        cement.unit_price = Decimal('300.00')
+        cement.category = 'Aggregates'
+        cement.save()
+        self.assertEqual(self.values(), (
+            Decimal('3600.00'),
+            {'MAIN': Decimal('3000.00'), 'SITE-METRO': Decimal('600.00')},
+            {'Aggregates': Decimal('3000.00'), 'Steel': Decimal('600.00')},
+        ))
+
+        # Rebuilding from the balances gives the same figures
+        incremental = self.values()
+        self.assertEqual(valuation.rebuild(), 3)
+        self.assertEqual(self.values(), incremental)
+
+    def test_import_revalues_stock_on_hand(self):
+        stock.receive(self.cement, self.site, Decimal('10'))
+        with tempfile.NamedTemporaryFile('w', suffix='.csv') as source:
+            source.write('Item Code,Material Name,Category,Unit,Quantity on Hand,Unit Price\n'
+                         'MAT-001,Cement,Cement,bags,15,200.00\n')
+            source.flush()
+            call_command('import_inventory', source.name, stdout=io.StringIO(), stderr=io.StringIO())
+        # 10 at the site re-valued at 200, plus the counted 5 booked to the main warehouse at 200
+        self.assertEqual(self.values()[1], {'MAIN': Decimal('1000.00'), 'SITE-METRO': Decimal('2000.00')})
+
+    def test_totals_read_only_the_rollups(self):
+        stock.receive(self.cement, self.main, Decimal('4'))
+        with self.assertNumQueries(1):
+            valuation.totals()
+        response = self.client.get(reverse('inventory:valuation_api'))
+        self.assertEqual(response.json(), {
+            'total_value': 1000.0,
+            'warehouses': [{'code': 'MAIN', 'name': 'Main Warehouse - Quezon City', 'value': 1000.0}],
+            'categories': [{'category': 'Cement', 'value': 1000.0}],
+        })
+        response = self.client.get(reverse('inventory:masterlist'), {'category': 'Cement'})
+        self.assertEqual((response.context['total_value'], response.context['selected_value']),
+                         (Decimal('1000.00'), Decimal('1000.00')))
+
+
+class CostLayerTests(TestCase):
+    """Receipts add cost layers that issues consume, FIFO or at moving average; month-end replays the ledger"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.main = Warehouse.default()
+        cls.site = Warehouse.objects.get(code='SITE-METRO')
+        cls.fifo = InventoryItem.objects.create(item_code='MAT-001', material_name='Cement', category='Cement',
+                                                unit='bags', unit_price=Decimal('250.00'))
+        cls.average = InventoryItem.objects.create(item_code='MAT-002', material_name='Rebar', category='Steel',
+                                                   unit='pcs', unit_price=Decimal('150.00'),
+                                                   costing_method=InventoryItem.AVERAGE)
+
+    def layers(self, item):
+        return list(item.cost_layers.values_list('remaining', 'unit_cost'))
+
+    def test_fifo_consumes_oldest_layers_first(self):
+        stock.receive(self.fifo, self.main, Decimal('10'), unit_cost=Decimal('200'))
+        stock.receive(self.fifo, self.main, Decimal('10'), unit_cost=Decimal('230'))
+        # Transfers don't touch the layers
+        stock.transfer(self.fifo, self.main, self.site, Decimal('5'))
+        stock.issue(self.fifo, self.site, Decimal('12'))
+        self.assertEqual(self.layers(self.fifo), [(Decimal('8'), Decimal('230'))])
+
+        # Issuing past the layers leaves a shortfall the next receipt makes up first
+        stock.issue(self.fifo, self.main, Decimal('10'))
+        self.assertEqual(self.layers(self.fifo), [])
+        stock.receive(self.fifo, self.main, Decimal('5'))
+        self.assertEqual(self.layers(self.fifo), [(Decimal('3'), Decimal('250'))])
+
+    def test_moving_average_keeps_one_layer(self):
+        stock.receive(self.average, self.main, Decimal('10'), unit_cost=Decimal('100'))
+        stock.issue(self.average, self.main, Decimal('4'))
+        stock.receive(self.average, self.main, Decimal('6'), unit_cost=Decimal('130'))
+        self.assertEqual(self.layers(self.average), [(Decimal('12'), Decimal('115'))])
+        movement = self.average.movements.order_by('-id').first()
+        self.assertEqual(movement.unit_cost, Decimal('130'))
+
+    def test_posting_reads_and_writes_layers_in_batches(self):
+        items = InventoryItem.objects.bulk_create([
+            InventoryItem(item_code=f'BLK-{i:03}', material_name=f'Block {i}', category='Masonry', unit='pcs',
+                          unit_price=Decimal('12.50'))
+            for i in range(40)
+        ])
+        receipts = [
+            StockMovement(item=item, warehouse=self.main, movement_type=StockMovement.RECEIPT, quantity=Decimal('10'))
+            for item in items
+        ]
+        stock.post(receipts + [
+            StockMovement(item=item, warehouse=self.main, movement_type=StockMovement.RECEIPT, quantity=Decimal('10'),
+                          unit_cost=Decimal('15'))
+            for item in items
+        ])
+        issues = [
+            StockMovement(item=item, warehouse=self.main, movement_type=StockMovement.ISSUE, quantity=Decimal('-15'))
+            for item in items
+        ]
+        with CaptureQueriesContext(connection) as context:
+            stock.post(issues)
+        layer_queries = [query for query in context.captured_queries if 'inventory_costlayer' in query['sql']]
+        # Read the open layers, update the part-consumed ones, delete the consumed ones
+        self.assertEqual(len(layer_queries), 3)
+        self.assertEqual(set(self.layers(items[0])), {(Decimal('5'), Decimal('15'))})
+
+    def test_month_end_replays_the_ledger(self):
+        stock.receive(self.fifo, self.main, Decimal('10'), unit_cost=Decimal('200'))
+        stock.receive(self.average, self.main, Decimal('10'), unit_cost=Decimal('100'))
+        StockMovement.objects.update(created_at=timezone.make_aware(datetime.datetime(2026, 9, 15)))
+        stock.receive(self.fifo, self.main, Decimal('10'), unit_cost=Decimal('230'))
+        stock.issue(self.fifo, self.main, Decimal('15'))
+
+        out = io.StringIO()
+        call_command('month_end_valuation', '2026-09', stdout=out)
+        self.assertEqual(list(csv.reader(io.StringIO(out.getvalue())))[1:], [
+            ['MAT-001', '10.00', '2000.00'],
+            ['MAT-002', '10.00', '1000.00'],
+        ])
+        # Replaying up to now gives what the live layers hold
+        self.assertEqual(self.layers(self.fifo), [(Decimal('5'), Decimal('230'))])
+        replayed = {item_id: value for item_id, _, value in costing.month_end(timezone.now() + datetime.timedelta(days=1))}
+        self.assertEqual(replayed, {self.fifo.pk: Decimal('1150.00'), self.average.pk: Decimal('1000.00')})
+
+
+class BulkPurchaseDecisionTests(TestCase):
+    """Bulk purchase decisions accept only explicit integer ids"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='purchaser', password='secret')
+        cls.requests = [
+            MaterialRequest.objects.create(requested_by=cls.user, project_name=f'Project {i}', project_location='Site',
+                                           site_supervisor='Supervisor', purpose='Testing',
+                                           delivery_date_needed=datetime.date.today(), status='approved')
+            for i in range(2)
+        ]
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def approve(self, ids):
+        return self.client.post(reverse('inventory:bulk_approve_purchase'), {'ids': ids}, content_type='application/json')
+
+    def test_rejects_ids_that_are_not_integers(self):
+        for ids in [True, [True], [1.9], [self.requests[0].pk, None], {'id': 1}, 'abc', ['1.5']]:
+            with self.subTest(ids=ids):
+                self.assertEqual(self.approve(ids).status_code, 400)
+        self.assertFalse(MaterialRequest.objects.filter(purchase_status='approved_for_purchase').exists())
+
+    def test_comma_separated_string_is_split_into_ids(self):
+        first, second = self.requests
+        response = self.approve(f'{first.pk},{second.pk}')
+        self.assertEqual(response.json()['updated'], 2)
+        self.assertEqual(self.approve([str(first.pk), second.pk]).json()['updated'], 0)
+
+    def test_signed_out_users_cannot_decide(self):
+        # Same rule as the single-request approve/reject views: any signed-in user, nobody else
+        self.client.logout()
+        first, second = self.requests
+        for url, body in (('inventory:bulk_approve_purchase', {'ids': [first.pk]}),
+                          ('inventory:bulk_reject_purchase', {'ids': [second.pk], 'reason': 'No'})):
+            response = self.client.post(reverse(url), body, content_type='application/json')
+            self.assertEqual(response.status_code, 302)
+        self.assertFalse(MaterialRequest.objects.exclude(purchase_status='pending').exists())
+
+    @override_settings(METRICS_ENABLED=True, METRICS_DIR=None)
+    def test_latency_is_observed_for_updated_rows_only(self):
+        from common import metrics
+
+        metrics._values.clear()
+        self.addCleanup(metrics._values.clear)
+        first, second = self.requests
+        MaterialRequest.objects.filter(pk=second.pk).update(purchase_status='rejected')
+        self.assertEqual(self.approve([first.pk, second.pk]).json()['updated'], 1)
+        self.assertIn('erp_approval_latency_seconds_count{type="material_request",stage="purchase"} 1',
+                      metrics.exposition())
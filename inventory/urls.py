@@ -5,12 +5,19 @@ app_name = 'inventory'
 
 urlpatterns = [
     path('', views.request_list_view, name='request_list'),  # Main inventory page
+    path('export/', views.request_list_export_view, name='request_list_export'),
     path('request-form/', views.request_form_view, name='request_form'),
     path('approve-request/<int:request_id>/', views.approve_request_view, name='approve_request'),
     path('request/<int:request_id>/details/', views.request_details_api, name='request_details_api'),
+    path('request/details/', views.batch_request_details_api, name='batch_request_details_api'),
     path('purchase/', views.purchase_view, name='purchase'),
+    path('purchase/export/', views.purchase_export_view, name='purchase_export'),
     path('purchase/approve/<int:request_id>/', views.approve_purchase_view, name='approve_purchase'),
     path('purchase/reject/<int:request_id>/', views.reject_purchase_view, name='reject_purchase'),
+    path('purchase/approve/bulk/', views.bulk_approve_purchase_view, name='bulk_approve_purchase'),
+    path('purchase/reject/bulk/', views.bulk_reject_purchase_view, name='bulk_reject_purchase'),
     path('delivery/', views.delivery_view, name='delivery'),
     path('masterlist/', views.masterlist_view, name='masterlist'),
+    path('masterlist/export/', views.masterlist_export_view, name='masterlist_export'),
+    path('valuation/', views.valuation_api, name='valuation_api'),
 ]
\ No newline at end of file
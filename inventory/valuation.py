@@ -0,0 +1,139 @@
+"""
+Inventory value per warehouse and category, kept current as stock and prices change.
+
+StockValuation holds one row per (warehouse, category): the value of that
+stock at the items' current unit prices. Rows change by delta, in the same
+transaction as the change that causes it:
+
+- stock.post() passes each posting's movements to apply_movements(), adding
+  quantity x unit_price per (warehouse, category);
+- a new unit price or category re-values the item's balances in every
+  warehouse (reprice()), from InventoryItem saves via inventory.signals and
+  from imports directly.
+
+Totals per warehouse, per category and overall are sums over that small
+table, so no request has to scan the items. QuerySet.update() and raw SQL on
+unit_price or category bypass this; run `manage.py checkpoint_stock
+--rebuild-totals` after such writes.
+"""
+from decimal import Decimal
+
+from django.db import IntegrityError, connection, transaction
+from django.db.models import DecimalField, ExpressionWrapper, F, Sum
+from django.utils import timezone
+
+from .models import StockBalance, StockValuation
+
+
+ZERO = Decimal('0')
+
+REPRICE_CHUNK_SIZE = 500
+
+VALUE = ExpressionWrapper(F('quantity') * F('item__unit_price'), output_field=DecimalField(max_digits=20, decimal_places=4))
+
+
+def _upsert(changes, now):
+    table = connection.ops.quote_name(StockValuation._meta.db_table)
+    keys = sorted(changes)
+    values = ', '.join(['(%s, %s, %s, %s)'] * len(keys))
+    params = [value for key in keys for value in (*key, changes[key], now)]
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"INSERT INTO {table} (warehouse_id, category, value, updated_at) VALUES {values} "
+            f"ON CONFLICT (warehouse_id, category) DO UPDATE SET value = {table}.value + excluded.value, "
+            f"updated_at = excluded.updated_at",
+            params,
+        )
+
+
+def _bump(changes, now):
+    """Fallback for backends without upsert: update each row, creating it when missing"""
+    for (warehouse_id, category), delta in sorted(changes.items()):
+        row = StockValuation.objects.filter(warehouse_id=warehouse_id, category=category)
+        if row.update(value=F('value') + delta, updated_at=now):
+            continue
+        try:
+            with transaction.atomic():
+                StockValuation.objects.create(warehouse_id=warehouse_id, category=category, value=delta, updated_at=now)
+        except IntegrityError:
+            # Another posting created the row first; apply the delta to it instead
+            row.update(value=F('value') + delta, updated_at=now)
+
+
+def apply(changes):
+    """value += delta per (warehouse id, category)"""
+    changes = {key: delta for key, delta in changes.items() if delta}
+    if not changes:
+        return
+    if connection.features.supports_update_conflicts_with_target:
+        _upsert(changes, timezone.now())
+    else:
+        _bump(changes, timezone.now())
+
+
+def apply_movements(movements, prices):
+    """Add the value of posted movements; `prices` maps item id -> (category, unit_price)"""
+    changes = {}
+    for movement in movements:
+        category, unit_price = prices[movement.item_id]
+        key = (movement.warehouse_id, category)
+        changes[key] = changes.get(key, ZERO) + movement.quantity * unit_price
+    apply(changes)
+
+
+def reprice(changes):
+    """
+    Re-value the stock of items whose category or unit price changed;
+    `changes` maps item id -> ((old category, old price), (new category, new price)).
+    """
+    changes = {item_id: (old, new) for item_id, (old, new) in changes.items() if old != new}
+    item_ids = sorted(changes)
+    for start in range(0, len(item_ids), REPRICE_CHUNK_SIZE):
+        chunk = item_ids[start:start + REPRICE_CHUNK_SIZE]
+        balances = StockBalance.objects.filter(item_id__in=chunk).order_by().values('item', 'warehouse').annotate(
+            quantity=Sum('quantity'),
+        )
+        deltas = {}
+        for row in balances:
+            (old_category, old_price), (new_category, new_price) = changes[row['item']]
+            old_key, new_key = (row['warehouse'], old_category), (row['warehouse'], new_category)
+            deltas[old_key] = deltas.get(old_key, ZERO) - row['quantity'] * old_price
+            deltas[new_key] = deltas.get(new_key, ZERO) + row['quantity'] * new_price
+        apply(deltas)
+
+
+def rebuild():
+    """Recompute every StockValuation row from the balances; returns the number of rows"""
+    now = timezone.now()
+    rows = StockBalance.objects.order_by().values('warehouse', 'item__category').annotate(value=Sum(VALUE))
+    with transaction.atomic():
+        StockValuation.objects.all().delete()
+        created = StockValuation.objects.bulk_create(
+            StockValuation(warehouse_id=row['warehouse'], category=row['item__category'], value=row['value'], updated_at=now)
+            for row in rows
+        )
+    return len(created)
+
+
+def totals():
+    """
+    {'total', 'warehouses': [{'code', 'name', 'value'}], 'categories': [{'category', 'value'}]}
+    from the rollup rows, rounded to centavos; one query.
+    """
+    warehouses, categories = {}, {}
+    rows = StockValuation.objects.values_list('warehouse__code', 'warehouse__name', 'category', 'value')
+    for code, name, category, value in rows:
+        warehouses[(name, code)] = warehouses.get((name, code), ZERO) + value
+        categories[category] = categories.get(category, ZERO) + value
+    cent = Decimal('0.01')
+    return {
+        'total': sum(categories.values(), ZERO).quantize(cent),
+        'warehouses': [
+            {'code': code, 'name': name, 'value': value.quantize(cent)}
+            for (name, code), value in sorted(warehouses.items())
+        ],
+        'categories': [
+            {'category': category, 'value': value.quantize(cent)}
+            for category, value in sorted(categories.items(), key=lambda pair: pair[0].lower())
+        ],
+    }
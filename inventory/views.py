@@ -1,91 +1,250 @@
 from django.shortcuts import render
 from django.contrib.auth.decorators import login_required
-from django.views.decorators.cache import never_cache
+from django.views.decorators.cache import cache_control, never_cache
+from django.views.decorators.http import condition
 
+from common.caching import private_page
 
-@never_cache
+
+def _latest_change(queryset, count_queryset):
+    """Page validators: newest updated_at (indexed MAX) and the shared cached row count, so deletes show too"""
+    from django.db.models import Max
+    from common.pagination import cached_count
+    
+    return queryset.aggregate(latest=Max('updated_at'))['latest'], cached_count(count_queryset)
+
+
+def _requests_changed(request):
+    from .models import MaterialRequest
+    
+    return _latest_change(MaterialRequest.objects.all(), MaterialRequest.objects.all())
+
+
+def _purchase_requests_changed(request):
+    from .models import MaterialRequest
+    
+    return _latest_change(MaterialRequest.objects.all(), MaterialRequest.objects.for_purchasing())
+
+
+def _inventory_items_changed(request):
+    from .models import InventoryItem
+    
+    return _latest_change(InventoryItem.objects.all(), InventoryItem.objects.all())
+
+
+def _searched_ids(request, search):
+    """Ranked ids for the ?q= search, or None when the page isn't searching"""
+    query = request.GET.get('q', '').strip()
+    return search.ranked_ids(query) if query else None
+
+
+def _filtered(request, list_filter, queryset, search=None):
+    """Bind the page's filters to `queryset`, narrowed to the ?q= matches; returns (filters, ranked ids or None)"""
+    ids = _searched_ids(request, search) if search else None
+    if ids is not None:
+        queryset = queryset.filter(pk__in=ids)
+    return list_filter.bind(request, queryset), ids
+
+
+def _filtered_page(request, filters, rows, ids=None):
+    """Page of `rows`: search results in rank order, otherwise keyset pages in the chosen sort"""
+    from common.pagination import KeysetPaginator, RankedPaginator
+    
+    if ids is not None:
+        paginator = RankedPaginator(rows, filters.rank(ids), per_page=10)
+    else:
+        # The facet counts already give the filtered total
+        paginator = KeysetPaginator(rows, ordering=filters.ordering, per_page=10, total=filters.count)
+    return paginator.get_page(after=request.GET.get('after'), before=request.GET.get('before'))
+
+
+@private_page(_purchase_requests_changed)
 @login_required
 def purchase_view(request):
-    """Purchase management view - shows only approved material requests"""
+    """Purchase management view - shows only approved material requests, with filters and sorting"""
+    from .filters import PURCHASE_LIST_FILTER
     from .models import MaterialRequest
-    from django.core.paginator import Paginator
     
     # Get only approved requests
-    approved_requests = MaterialRequest.objects.filter(status='approved').order_by('-created_at')
+    filters, _ = _filtered(request, PURCHASE_LIST_FILTER, MaterialRequest.objects.for_purchasing())
     
-    # Add pagination
-    paginator = Paginator(approved_requests, 10)  # Show 10 requests per page
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    # Keyset pagination: 10 requests per page, newest first unless sorted otherwise
+    page_obj = _filtered_page(request, filters, filters.queryset.for_listing())
     
     context = {
         'page_title': 'Purchase Management',
         'module': 'inventory',
         'requests': page_obj,
-        'total_requests': approved_requests.count(),
+        'total_requests': page_obj.paginator.count,
+        'filters': filters,
     }
     return render(request, 'inventory/purchase.html', context)
 
 
-@never_cache
+def _delivery_form_changed(request):
+    """The next delivery number the form shows, and the warehouses it lists"""
+    from common.numbering import peek_number
+    from .models import Warehouse
+    
+    warehouses = tuple(Warehouse.objects.filter(is_active=True).values_list('pk', 'name'))
+    return None, (peek_number('DN'), warehouses)
+
+
+@private_page(_delivery_form_changed)
 @login_required
 def delivery_view(request):
-    """Delivery management view"""
+    """Delivery management view: posts a delivery note and moves its materials between warehouses"""
+    from .delivery import UNIT_CHOICES, DeliveryError, build_lines, post_delivery, read_lines
+    from .forms import DeliveryNoteForm
+    from django.contrib import messages
+    from django.shortcuts import redirect
+    
+    rows = []
+    if request.method == 'POST':
+        form = DeliveryNoteForm(request.POST)
+        rows = read_lines(request.POST)
+        if form.is_valid():
+            try:
+                note = post_delivery(form.save(commit=False), build_lines(rows), user=request.user)
+            except DeliveryError as error:
+                for message in error.errors:
+                    messages.error(request, message)
+            else:
+                messages.success(request, f'Delivery {note.delivery_number} has been posted with {len(rows)} material(s).')
+                return redirect('inventory:delivery')
+        else:
+            for field, errors in form.errors.items():
+                for error in errors:
+                    messages.error(request, f'{form.fields[field].label if field in form.fields else field}: {error}')
+    else:
+        form = DeliveryNoteForm()
+    
     context = {
         'page_title': 'Delivery Management',
-        'module': 'inventory'
+        'module': 'inventory',
+        'form': form,
+        'warehouses': form.fields['source_warehouse'].queryset,
+        'rows': rows,
+        'units': UNIT_CHOICES,
     }
     return render(request, 'inventory/delivery.html', context)
 
 
-@never_cache
+@private_page(_inventory_items_changed)
 @login_required
 def masterlist_view(request):
-    """Masterlist view with pagination"""
-    from django.core.paginator import Paginator
+    """Masterlist view with pagination, filters, sorting, ranked search (?q=) and the stock value rollups"""
+    from decimal import Decimal
+    from . import valuation
+    from .filters import INVENTORY_ITEM_FILTER
     from .models import InventoryItem
+    from .search import INVENTORY_ITEM_SEARCH
     
-    items_list = InventoryItem.objects.all()
-    paginator = Paginator(items_list, 10)  # Show 10 items per page
+    filters, ids = _filtered(request, INVENTORY_ITEM_FILTER, InventoryItem.objects.all(), INVENTORY_ITEM_SEARCH)
+    items = _filtered_page(request, filters, filters.queryset, ids)  # Show 10 items per page
     
-    page_number = request.GET.get('page')
-    items = paginator.get_page(page_number)
+    # Totals come from the rollup rows, not from the items
+    totals = valuation.totals()
+    selected_categories = filters.selected['category']
+    selected_value = sum(
+        (row['value'] for row in totals['categories'] if row['category'] in selected_categories), Decimal('0'),
+    ) if selected_categories else None
     
     context = {
         'page_title': 'Masterlist',
         'module': 'inventory',
         'items': items,
-        'total_items': items_list.count()
+        'total_items': items.paginator.count,
+        'query': request.GET.get('q', '').strip(),
+        'filters': filters,
+        'total_value': totals['total'],
+        'selected_value': selected_value,
     }
     return render(request, 'inventory/masterlist.html', context)
 
 
-@never_cache
+@private_page(_requests_changed)
 @login_required
 def request_list_view(request):
-    """Material Requests List view"""
+    """Material Requests List view, with filters, sorting and ranked search (?q=)"""
+    from .filters import REQUEST_LIST_FILTER
     from .models import MaterialRequest
-    from django.core.paginator import Paginator
-    
-    # Get all material requests ordered by most recent first
-    requests = MaterialRequest.objects.select_related('requested_by').order_by('-created_at')
+    from .search import MATERIAL_REQUEST_SEARCH
     
-    # Add pagination
-    paginator = Paginator(requests, 10)  # Show 10 requests per page
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    filters, ids = _filtered(request, REQUEST_LIST_FILTER, MaterialRequest.objects.all(), MATERIAL_REQUEST_SEARCH)
+    # 10 requests per page: best match first when searching, else most recent first unless sorted otherwise
+    page_obj = _filtered_page(request, filters, filters.queryset.for_listing(), ids)
     
     context = {
         'page_title': 'Request List',
         'module': 'inventory',
         'requests': page_obj,
-        'total_requests': requests.count(),
+        'total_requests': page_obj.paginator.count,
+        'query': request.GET.get('q', '').strip(),
+        'filters': filters,
     }
     return render(request, 'inventory/request_list.html', context)
 
 
 @never_cache
 @login_required
+def request_list_export_view(request):
+    """Stream every request on the Request List, as filtered and sorted on screen, as CSV or XLSX"""
+    from common.export import export_response
+    from .exports import REQUEST_COLUMNS
+    from .filters import REQUEST_LIST_FILTER
+    from .models import MaterialRequest
+    from .search import MATERIAL_REQUEST_SEARCH
+    
+    filters, _ = _filtered(request, REQUEST_LIST_FILTER, MaterialRequest.objects.all(), MATERIAL_REQUEST_SEARCH)
+    requests = filters.queryset.with_totals().order_by(*filters.ordering)
+    return export_response(request, requests, REQUEST_COLUMNS, 'material-requests')
+
+
+@never_cache
+@login_required
+def purchase_export_view(request):
+    """Stream every request on the Purchase Management page, as filtered and sorted on screen, as CSV or XLSX"""
+    from common.export import export_response
+    from .exports import REQUEST_COLUMNS
+    from .filters import PURCHASE_LIST_FILTER
+    from .models import MaterialRequest
+    
+    filters, _ = _filtered(request, PURCHASE_LIST_FILTER, MaterialRequest.objects.for_purchasing())
+    requests = filters.queryset.with_totals().order_by(*filters.ordering)
+    return export_response(request, requests, REQUEST_COLUMNS, 'purchase-requests')
+
+
+@never_cache
+@login_required
+def masterlist_export_view(request):
+    """Stream the inventory master list, as filtered and sorted on screen, as CSV or XLSX"""
+    from common.export import export_response
+    from .exports import INVENTORY_ITEM_COLUMNS
+    from .filters import INVENTORY_ITEM_FILTER
+    from .models import InventoryItem
+    from .search import INVENTORY_ITEM_SEARCH
+    
+    filters, _ = _filtered(request, INVENTORY_ITEM_FILTER, InventoryItem.objects.all(), INVENTORY_ITEM_SEARCH)
+    items = filters.queryset.order_by(*filters.ordering)
+    return export_response(request, items, INVENTORY_ITEM_COLUMNS, 'masterlist')
+
+
+def _request_form_changed(request):
+    """The edited request's updated_at; today's date and the next request number too, which the form shows"""
+    from common.numbering import peek_number
+    from django.utils import timezone
+    from .models import MaterialRequest
+    
+    request_id = request.GET.get('id')
+    updated_at = None
+    if request_id and request_id.isdigit():
+        updated_at = MaterialRequest.objects.filter(id=request_id).values_list('updated_at', flat=True).first()
+    return updated_at, (timezone.localdate(), peek_number('REQ'))
+
+
+@private_page(_request_form_changed)
+@login_required
 def request_form_view(request):
     """Material Request Form view"""
     from .forms import MaterialRequestForm, MaterialItemFormSet
@@ -174,6 +333,7 @@ def request_form_view(request):
 @login_required
 def approve_request_view(request, request_id):
     """Approve a material request"""
+    from common import metrics
     from .models import MaterialRequest
     from django.contrib import messages
     from django.shortcuts import redirect, get_object_or_404
@@ -188,6 +348,8 @@ def approve_request_view(request, request_id):
             material_request.approved_by = request.user
             material_request.approved_date = timezone.now()
             material_request.save()
+            metrics.observe_approvals('material_request', 'engineer', [material_request.created_at],
+                                      material_request.approved_date)
             
             messages.success(request, f'Material request {material_request.request_number} has been approved successfully!')
         else:
@@ -196,53 +358,103 @@ def approve_request_view(request, request_id):
     return redirect('inventory:request_list')
 
 
-@never_cache
+def _request_updated_at(request, request_id):
+    """updated_at of the material request, looked up once per HTTP request"""
+    from .models import MaterialRequest
+    
+    if not hasattr(request, '_material_request_updated_at'):
+        request._material_request_updated_at = (
+            MaterialRequest.objects.filter(id=request_id).values_list('updated_at', flat=True).first()
+        )
+    return request._material_request_updated_at
+
+
+def _request_details_etag(request, request_id):
+    updated_at = _request_updated_at(request, request_id)
+    return f"{request_id}-{updated_at.timestamp()}" if updated_at else None
+
+
+# Browsers keep the JSON privately but must revalidate it on every open; unchanged
+# requests are answered with 304 from the ETag/Last-Modified check alone.
+@cache_control(private=True, no_cache=True)
 @login_required
+@condition(etag_func=_request_details_etag, last_modified_func=_request_updated_at)
 def request_details_api(request, request_id):
     """API endpoint to get request details in JSON format"""
-    from django.http import JsonResponse
-    from django.shortcuts import get_object_or_404
-    from .models import MaterialRequest
+    from django.http import Http404, JsonResponse
+    from .serializers import request_payload
     
-    material_request = get_object_or_404(MaterialRequest, id=request_id)
-    
-    # Build items list
-    items = []
-    for item in material_request.items.all():
-        items.append({
-            'material_name': item.material_name,
-            'quantity': float(item.quantity),
-            'estimated_unit_price': float(item.estimated_unit_price),
-        })
-    
-    # Build response data
-    data = {
-        'request_number': material_request.request_number,
-        'requested_by': material_request.requested_by.get_full_name() or material_request.requested_by.username,
-        'project_name': material_request.project_name,
-        'site_supervisor': material_request.site_supervisor,
-        'purpose': material_request.purpose,
-        'created_at': material_request.created_at.strftime('%b %d, %Y'),
-        'project_location': material_request.project_location,
-        'delivery_date_needed': material_request.delivery_date_needed.strftime('%b %d, %Y'),
-        'status': material_request.get_status_display(),
-        'purchase_status': material_request.purchase_status,
-        'purchase_status_display': material_request.get_purchase_status_display(),
-        'rejection_reason': material_request.remarks if material_request.purchase_status == 'rejected' else None,
-        'approved_by': material_request.approved_by.get_full_name() or material_request.approved_by.username if material_request.approved_by else None,
-        'approved_date': material_request.approved_date.strftime('%b %d, %Y') if material_request.approved_date else None,
-        'purchase_approved_by': material_request.purchase_approved_by.get_full_name() or material_request.purchase_approved_by.username if material_request.purchase_approved_by else None,
-        'purchase_approved_date': material_request.purchase_approved_date.strftime('%b %d, %Y') if material_request.purchase_approved_date else None,
-        'items': items,
-    }
+    data = request_payload(request_id)
+    if data is None:
+        raise Http404('No MaterialRequest matches the given query.')
     
     return JsonResponse(data)
 
 
+@never_cache
+@login_required
+def valuation_api(request):
+    """API endpoint for the stock value in total, per warehouse and per category"""
+    from django.http import JsonResponse
+    from . import valuation
+    
+    totals = valuation.totals()
+    return JsonResponse({
+        'total_value': float(totals['total']),
+        'warehouses': [
+            {'code': row['code'], 'name': row['name'], 'value': float(row['value'])} for row in totals['warehouses']
+        ],
+        'categories': [
+            {'category': row['category'], 'value': float(row['value'])} for row in totals['categories']
+        ],
+    })
+
+
+MAX_BATCH_SIZE = 500
+
+
+def _parse_request_ids(values):
+    """Parse ids from ['1,2', '3'] style query values or a JSON list of ints and strings; None if any is invalid"""
+    ids = []
+    for value in values:
+        if isinstance(value, str):
+            parts = [part.strip() for part in value.split(',') if part.strip()]
+            if not all(part.isdigit() for part in parts):
+                return None
+            ids.extend(int(part) for part in parts)
+        elif isinstance(value, int) and not isinstance(value, bool):
+            ids.append(value)
+        else:
+            # Floats, booleans, null and nested values would silently become other ids
+            return None
+    return list(dict.fromkeys(ids))
+
+
+@never_cache
+@login_required
+def batch_request_details_api(request):
+    """API endpoint returning details for many requests at once (?ids=1,2,3)"""
+    from django.http import JsonResponse
+    from .serializers import request_payloads
+    
+    ids = _parse_request_ids(request.GET.getlist('ids'))
+    if not ids:
+        return JsonResponse({'success': False, 'message': 'Provide one or more request ids'}, status=400)
+    if len(ids) > MAX_BATCH_SIZE:
+        return JsonResponse({'success': False, 'message': f'At most {MAX_BATCH_SIZE} requests per batch'}, status=400)
+    
+    payloads = request_payloads(ids)
+    return JsonResponse({
+        'requests': {str(request_id): payload for request_id, payload in payloads.items()},
+        'missing': [request_id for request_id in ids if request_id not in payloads],
+    })
+
+
 @never_cache
 @login_required
 def approve_purchase_view(request, request_id):
     """Approve a material request for purchase"""
+    from common import metrics
     from django.http import JsonResponse
     from django.shortcuts import get_object_or_404
     from django.utils import timezone
@@ -256,6 +468,8 @@ def approve_purchase_view(request, request_id):
         material_request.purchase_approved_by = request.user
         material_request.purchase_approved_date = timezone.now()
         material_request.save()
+        metrics.observe_approvals('material_request', 'purchase', [material_request.created_at],
+                                  material_request.purchase_approved_date)
         
         return JsonResponse({'success': True, 'message': f'Material request {material_request.request_number} has been approved successfully!'})
     
@@ -290,3 +504,91 @@ def reject_purchase_view(request, request_id):
     
     return JsonResponse({'success': False, 'message': 'Invalid request'}, status=400)
 
+
+def _read_bulk_body(request):
+    """Parse a {"ids": [...], ...} JSON body; returns (ids, data, error_response)"""
+    from django.http import JsonResponse
+    import json
+    
+    try:
+        data = json.loads(request.body or '{}')
+    except ValueError:
+        data = None
+    if not isinstance(data, dict):
+        return None, None, JsonResponse({'success': False, 'message': 'Invalid JSON body'}, status=400)
+    
+    ids = data.get('ids') or []
+    if isinstance(ids, str):
+        ids = [ids]
+    ids = _parse_request_ids(ids) if isinstance(ids, list) else None
+    if not ids:
+        return None, None, JsonResponse({'success': False, 'message': 'Provide one or more request ids'}, status=400)
+    if len(ids) > MAX_BATCH_SIZE:
+        return None, None, JsonResponse({'success': False, 'message': f'At most {MAX_BATCH_SIZE} requests per batch'}, status=400)
+    return ids, data, None
+
+
+def _bulk_purchase_decision(request, ids, purchase_status, **extra_fields):
+    """Apply a purchase decision to the pending, approved requests among `ids` with one UPDATE"""
+    from common import metrics
+    from django.db import transaction
+    from django.utils import timezone
+    from .models import MaterialRequest
+    
+    now = timezone.now()
+    pending = MaterialRequest.objects.filter(id__in=ids, status='approved', purchase_status='pending')
+    # update() skips auto_now, so bump updated_at explicitly to invalidate detail ETags
+    changes = dict(
+        purchase_status=purchase_status,
+        purchase_approved_by=request.user,
+        purchase_approved_date=now,
+        updated_at=now,
+        **extra_fields,
+    )
+    if not (purchase_status == 'approved_for_purchase' and metrics.enabled()):
+        return pending.update(**changes)
+    
+    # Lock the rows the latencies are read from, so a concurrent decision can't change them before the UPDATE
+    with transaction.atomic():
+        rows = list(pending.select_for_update().values_list('id', 'created_at'))
+        updated = MaterialRequest.objects.filter(id__in=[request_id for request_id, _ in rows]).update(**changes)
+    metrics.observe_approvals('material_request', 'purchase', [created_at for _, created_at in rows], now)
+    return updated
+
+
+@never_cache
+@login_required
+def bulk_approve_purchase_view(request):
+    """Approve many material requests for purchase in one statement"""
+    from django.http import JsonResponse
+    
+    if request.method == 'POST':
+        ids, data, error = _read_bulk_body(request)
+        if error:
+            return error
+        
+        updated = _bulk_purchase_decision(request, ids, 'approved_for_purchase')
+        return JsonResponse({'success': True, 'updated': updated, 'message': f'{updated} material request(s) approved for purchase.'})
+    
+    return JsonResponse({'success': False, 'message': 'Invalid request'}, status=400)
+
+
+@never_cache
+@login_required
+def bulk_reject_purchase_view(request):
+    """Reject many material requests for purchase in one statement"""
+    from django.http import JsonResponse
+    
+    if request.method == 'POST':
+        ids, data, error = _read_bulk_body(request)
+        if error:
+            return error
+        
+        reason = str(data.get('reason') or '')
+        if not reason.strip():
+            return JsonResponse({'success': False, 'message': 'Please provide a reason for rejection'}, status=400)
+        
+        updated = _bulk_purchase_decision(request, ids, 'rejected', remarks=reason)
+        return JsonResponse({'success': True, 'updated': updated, 'message': f'{updated} material request(s) rejected.'})
+    
+    return JsonResponse({'success': False, 'message': 'Invalid request'}, status=400)
@@ -4,6 +4,7 @@ import django
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'erp_system.settings')
 django.setup()
 
+from inventory import stock
 from inventory.models import InventoryItem
 
 # Sample inventory data
@@ -46,4 +47,7 @@ for data in inventory_data:
     else:
         print(f"Already exists: {item.item_code}")
 
+# Book the starting quantities of new items to the stock ledger
+stock.record_opening_balances(InventoryItem.objects.filter(item_code__in=[data["item_code"] for data in inventory_data]))
+
 print(f"\nTotal items in inventory: {InventoryItem.objects.count()}")